@@ -1,8 +1,13 @@
+import agora.common.background as background
+import agora.common.cache as cache
 import agora.common.core as core
+import agora.common.deadline as deadline
 import agora.common.errors as errors
+import agora.common.eviction as eviction
 import agora.common.executor as executor
 import agora.common.function_schema as function_schema
 import agora.common.interpreters as interpreters
 import agora.common.memory as memory
+import agora.common.singleflight as singleflight
 import agora.common.storage as storage
 import agora.common.toolformers as toolformers
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class BackgroundRunner:
+    """Runs jobs in background threads, with at most one job per key at a time.
+
+    Submitting a job whose key is already queued or running returns the existing job instead of
+    starting a new one, so that e.g. a protocol is negotiated once even if many calls need it.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        """Initializes the BackgroundRunner.
+
+        Args:
+            max_workers (int, optional): Maximum number of jobs running at once. Defaults to 4.
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="agora-background"
+        )
+        self._lock = threading.Lock()
+        self._jobs: Dict[Hashable, Future] = {}
+        # The error of the last job of each key, if it failed
+        self.errors: Dict[Hashable, BaseException] = {}
+
+    def submit(
+        self, key: Hashable, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Future:
+        """Runs a function in the background, unless a job with the same key is queued or running.
+
+        Args:
+            key (Hashable): The key identifying the job.
+            func (Callable[..., Any]): The function to run.
+            *args (Any): Positional arguments for the function.
+            **kwargs (Any): Keyword arguments for the function.
+
+        Returns:
+            Future: The future of the new job, or of the existing job with the same key.
+        """
+        with self._lock:
+            if key in self._jobs:
+                return self._jobs[key]
+
+            future = self._executor.submit(func, *args, **kwargs)
+            self._jobs[key] = future
+
+        future.add_done_callback(lambda future: self._on_done(key, future))
+        return future
+
+    def _on_done(self, key: Hashable, future: Future) -> None:
+        """Removes a completed job and records its error, if any.
+
+        Args:
+            key (Hashable): The key of the job.
+            future (Future): The future of the job.
+        """
+        with self._lock:
+            if self._jobs.get(key) is future:
+                del self._jobs[key]
+
+            if future.cancelled():
+                return
+
+            if future.exception() is None:
+                self.errors.pop(key, None)
+            else:
+                self.errors[key] = future.exception()
+
+    def is_running(self, key: Hashable) -> bool:
+        """Checks whether a job with the given key is queued or running.
+
+        Args:
+            key (Hashable): The key of the job.
+
+        Returns:
+            bool: True if the job is queued or running, False otherwise.
+        """
+        with self._lock:
+            return key in self._jobs
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the jobs queued or running when called to complete.
+
+        Args:
+            timeout (Optional[float], optional): Maximum number of seconds to wait. Defaults to None (no limit).
+
+        Returns:
+            bool: True if all the jobs completed, False if the timeout expired.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+
+        _, not_done = wait_futures(jobs, timeout=timeout)
+        return len(not_done) == 0
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops accepting jobs and cancels the queued ones.
+
+        Args:
+            wait (bool, optional): If True, waits for the running jobs to complete. Defaults to True.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,230 @@
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """A thread-safe mapping with a bounded size, evicting the least recently used entries."""
+
+    def __init__(self, max_size: int = 128) -> None:
+        """Initializes the LRUCache.
+
+        Args:
+            max_size (int, optional): Maximum number of entries. Defaults to 128.
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Retrieves an entry, marking it as recently used.
+
+        Args:
+            key (Hashable): The key of the entry.
+            default (Optional[Any], optional): The value to return if the key is missing. Defaults to None.
+
+        Returns:
+            Any: The cached value, or the default if not found.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Adds or replaces an entry, evicting the least recently used ones if needed.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value to cache.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Removes an entry.
+
+        Args:
+            key (Hashable): The key of the entry.
+            default (Optional[Any], optional): The value to return if the key is missing. Defaults to None.
+
+        Returns:
+            Any: The removed value, or the default if not found.
+        """
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self) -> None:
+        """Removes all the entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: object) -> bool:
+        """Checks if a key is cached, without marking it as recently used.
+
+        Args:
+            key (object): The key to check.
+
+        Returns:
+            bool: True if the key is cached, False otherwise.
+        """
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        """Returns the number of cached entries.
+
+        Returns:
+            int: The count of entries.
+        """
+        with self._lock:
+            return len(self._entries)
+
+
+class ResultCache:
+    """A thread-safe cache of task results, whose entries expire after a TTL.
+
+    When the cache is full, expired entries are removed first, then entries are evicted according
+    to the policy: "lru" evicts the least recently used entry, "lfu" the least frequently used one
+    (the least recently used among them in case of ties).
+    """
+
+    def __init__(
+        self, ttl: Optional[float] = None, max_size: int = 1024, policy: str = "lru"
+    ) -> None:
+        """Initializes the ResultCache.
+
+        Args:
+            ttl (Optional[float], optional): Seconds after which an entry expires. Defaults to None (never).
+            max_size (int, optional): Maximum number of entries. Defaults to 1024.
+            policy (str, optional): The eviction policy, "lru" or "lfu". Defaults to "lru".
+
+        Raises:
+            ValueError: If the policy is not supported.
+        """
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unsupported eviction policy: {policy}")
+
+        self.ttl = ttl
+        self.max_size = max_size
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        # Maps each key to [value, expiration time, number of uses], from the least recently used
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(task_id: str, target: Optional[str], task_data: dict) -> Tuple:
+        """Builds the key of a task execution.
+
+        The task data is canonicalized, so that equal data with keys in different orders share the same key.
+
+        Args:
+            task_id (str): The task identifier.
+            target (Optional[str]): The target system or service.
+            task_data (dict): The data of the task.
+
+        Returns:
+            Tuple: The key.
+        """
+        canonical_data = json.dumps(
+            task_data, sort_keys=True, separators=(",", ":"), default=repr
+        )
+        return (task_id, target, canonical_data)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Retrieves a result that has not expired.
+
+        Results are not copied, so the same object is returned by every hit.
+
+        Args:
+            key (Hashable): The key of the result.
+            default (Optional[Any], optional): The value to return if the key is missing or expired. Defaults to None.
+
+        Returns:
+            Any: The cached result, or the default if not found.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            entry[2] += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Adds or replaces a result, evicting other entries if needed.
+
+        Args:
+            key (Hashable): The key of the result.
+            value (Any): The result to cache.
+        """
+        expires_at = math.inf if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            self._entries[key] = [value, expires_at, 1]
+            self._entries.move_to_end(key)
+
+            if len(self._entries) > self.max_size:
+                self._remove_expired()
+
+            while len(self._entries) > self.max_size:
+                if self.policy == "lru":
+                    self._entries.popitem(last=False)
+                else:
+                    # min returns the first of the least used entries, i.e. the least recently used
+                    evicted_key = min(
+                        self._entries, key=lambda key: self._entries[key][2]
+                    )
+                    del self._entries[evicted_key]
+
+    def _remove_expired(self) -> None:
+        """Removes the expired entries. The lock must be held."""
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[1] <= now]:
+            del self._entries[key]
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Removes a result.
+
+        Args:
+            key (Hashable): The key of the result.
+            default (Optional[Any], optional): The value to return if the key is missing. Defaults to None.
+
+        Returns:
+            Any: The removed result, or the default if not found.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        """Removes all the results."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Returns the number of cached results, including the expired ones not removed yet.
+
+        Returns:
+            int: The count of results.
+        """
+        with self._lock:
+            return len(self._entries)
@@ -1,6 +1,7 @@
+import asyncio
 from abc import ABC, abstractmethod
 from enum import Enum
-from types import TracebackType
+from types import MappingProxyType, TracebackType
 from typing import Any, Dict, List, Optional
 
 from agora.utils import compute_hash, extract_metadata
@@ -74,9 +75,68 @@ class Conversation(ABC):
         """
         self.close()
 
+    async def acall(self, message: str, print_output: bool = True) -> Any:
+        """
+        Processes a message within the conversation asynchronously.
+
+        The default implementation runs the conversation in a worker thread. Subclasses with
+        a native asynchronous implementation override this method.
+
+        Args:
+            message (str): The message to process.
+            print_output (bool): Whether to print the response.
+
+        Returns:
+            Any: The response generated by processing the message.
+        """
+        return await asyncio.to_thread(self, message, print_output)
+
+    async def aclose(self) -> None:
+        """
+        Closes the conversation asynchronously.
+
+        Returns:
+            None
+        """
+        await asyncio.to_thread(self.close)
+
+    async def __aenter__(self) -> "Conversation":
+        """
+        Enters the conversation context asynchronously.
+
+        Returns:
+            Conversation: The current conversation instance.
+        """
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """
+        Exits the conversation context asynchronously, ensuring closure.
+
+        Args:
+            exc_type (Optional[type]): The exception type if an error occurred.
+            exc_value (Optional[BaseException]): The exception instance if raised.
+            traceback (Optional[TracebackType]): The traceback object.
+
+        Returns:
+            None
+        """
+        await self.aclose()
+
 
 class Protocol:
-    """Represents a protocol document with associated sources and metadata."""
+    """Represents a protocol document with associated sources and metadata.
+
+    Protocols are immutable values: the hash of the document is computed once, when the
+    protocol is created, and is available as the `hash` attribute.
+    """
+
+    __slots__ = ("protocol_document", "sources", "metadata", "hash")
 
     def __init__(
         self,
@@ -91,23 +151,67 @@ class Protocol:
             sources (List[str]): Sources where the protocol is referenced.
             metadata (Optional[Dict[str, str]]): Additional metadata for the protocol.
         """
-        self.protocol_document = protocol_document
-        self.sources = sources
-
         if metadata is None:
             metadata = extract_metadata(protocol_document)
 
-        self.metadata = metadata
+        object.__setattr__(self, "protocol_document", protocol_document)
+        object.__setattr__(self, "sources", tuple(sources))
+        object.__setattr__(self, "metadata", MappingProxyType(dict(metadata)))
+        object.__setattr__(self, "hash", compute_hash(protocol_document))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Prevents the modification of the protocol.
 
-    @property
-    def hash(self) -> str:
+        Raises:
+            AttributeError: Always.
         """
-        Computes and returns the hash of the protocol document.
+        raise AttributeError("Protocol objects are immutable")
+
+    def __delattr__(self, name: str) -> None:
+        """Prevents the modification of the protocol.
+
+        Raises:
+            AttributeError: Always.
+        """
+        raise AttributeError("Protocol objects are immutable")
+
+    def __eq__(self, other: object) -> bool:
+        """Checks whether two protocols have the same document, sources and metadata.
+
+        Args:
+            other (object): The object to compare with.
+
+        Returns:
+            bool: True if the protocols are equal, False otherwise.
+        """
+        if not isinstance(other, Protocol):
+            return NotImplemented
+
+        return (
+            self.hash == other.hash
+            and self.protocol_document == other.protocol_document
+            and self.sources == other.sources
+            and self.metadata == other.metadata
+        )
+
+    def __hash__(self) -> int:
+        """Returns a hash based on the protocol hash.
+
+        Returns:
+            int: The hash value.
+        """
+        return hash(self.hash)
+
+    def __reduce__(self) -> tuple:
+        """Supports pickling, which cannot restore immutable slots directly.
 
         Returns:
-            str: The computed hash value.
+            tuple: The constructor and its arguments.
         """
-        return compute_hash(self.protocol_document)
+        return (
+            Protocol,
+            (self.protocol_document, list(self.sources), dict(self.metadata)),
+        )
 
     def __str__(self) -> str:
         """
@@ -116,4 +220,4 @@ class Protocol:
         Returns:
             str: The string representation including hash, sources, metadata, and document.
         """
-        return f"Protocol {self.hash}\nSources: {self.sources}\nMetadata: {self.metadata}\n\n{self.protocol_document}\n\n"
+        return f"Protocol {self.hash}\nSources: {list(self.sources)}\nMetadata: {dict(self.metadata)}\n\n{self.protocol_document}\n\n"
@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from agora.common.errors import DeadlineExceededError
+
+# The deadline of the current task, as a time.monotonic() timestamp
+_deadline: ContextVar[Optional[float]] = ContextVar("agora_deadline", default=None)
+
+
+@contextmanager
+def deadline(timeout: Optional[float]) -> Iterator[None]:
+    """Sets a deadline for the code run in the context, including the code it calls.
+
+    The deadline is stored in a context variable, so it follows the calls made in the same thread,
+    coroutines and `asyncio.to_thread`. Nested deadlines cannot extend the enclosing one.
+
+    Args:
+        timeout (Optional[float]): Seconds from now until the deadline. None keeps the current deadline, if any.
+
+    Yields:
+        None
+    """
+    if timeout is None:
+        yield
+        return
+
+    new_deadline = time.monotonic() + timeout
+    current_deadline = _deadline.get()
+    if current_deadline is not None:
+        new_deadline = min(new_deadline, current_deadline)
+
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Computes the time left until the current deadline.
+
+    Returns:
+        Optional[float]: The seconds left (at least 0), or None if there is no deadline.
+    """
+    current_deadline = _deadline.get()
+    if current_deadline is None:
+        return None
+    return max(current_deadline - time.monotonic(), 0.0)
+
+
+def check_deadline() -> None:
+    """Checks that the current deadline, if any, has not expired.
+
+    Raises:
+        DeadlineExceededError: If the deadline has expired.
+    """
+    if remaining_time() == 0.0:
+        raise DeadlineExceededError()
@@ -100,3 +100,29 @@ class ProtocolTransportError(ProtocolError):
             message (str, optional): The error message. Defaults to an empty string.
         """
         super().__init__(message)
+
+
+class CircuitOpenError(ProtocolTransportError):
+    """Exception raised when messages to a target are blocked by its circuit breaker."""
+
+    def __init__(self, message: str = ""):
+        """
+        Initializes CircuitOpenError with an optional message.
+
+        Args:
+            message (str, optional): The error message. Defaults to 'Circuit open' if empty.
+        """
+        super().__init__(message or "Circuit open")
+
+
+class DeadlineExceededError(Exception):
+    """Exception raised when the deadline of a task expires before it completes."""
+
+    def __init__(self, message: str = ""):
+        """
+        Initializes DeadlineExceededError with an optional message.
+
+        Args:
+            message (str, optional): The error message. Defaults to 'Deadline exceeded' if empty.
+        """
+        super().__init__(message or "Deadline exceeded")
@@ -0,0 +1,145 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+
+class EvictionPolicy(ABC):
+    """Abstract base class for the policies that select which protocols to remove from a ProtocolMemory.
+
+    Policies receive the usage statistics of the protocols that can be evicted, i.e. the
+    protocols that are not pinned and that have not been used in the last `grace_period` seconds.
+    """
+
+    def __init__(self, grace_period: float = 60.0) -> None:
+        """Initializes the EvictionPolicy.
+
+        Args:
+            grace_period (float, optional): Seconds since the last use during which a protocol cannot be evicted,
+                so that protocols being negotiated or used are kept. Defaults to 60.
+        """
+        self.grace_period = grace_period
+
+    @abstractmethod
+    def select(
+        self, candidates: Dict[str, dict], num_protocols: int, now: float
+    ) -> List[str]:
+        """Selects the protocols to evict.
+
+        Args:
+            candidates (Dict[str, dict]): The protocols that can be evicted, mapped to their usage
+                ("conversations" and "last_used", a UNIX timestamp).
+            num_protocols (int): The total number of protocols, including those that cannot be evicted.
+            now (float): The current UNIX timestamp.
+
+        Returns:
+            List[str]: The identifiers of the protocols to evict.
+        """
+        pass
+
+
+class LRUEvictionPolicy(EvictionPolicy):
+    """Keeps at most `max_protocols` protocols, evicting the least recently used ones."""
+
+    def __init__(self, max_protocols: int, grace_period: float = 60.0) -> None:
+        """Initializes the LRUEvictionPolicy.
+
+        Args:
+            max_protocols (int): The maximum number of protocols to keep.
+            grace_period (float, optional): Seconds since the last use during which a protocol cannot be evicted. Defaults to 60.
+        """
+        super().__init__(grace_period)
+        self.max_protocols = max_protocols
+
+    def select(
+        self, candidates: Dict[str, dict], num_protocols: int, now: float
+    ) -> List[str]:
+        """Selects the least recently used protocols in excess of `max_protocols`.
+
+        Args:
+            candidates (Dict[str, dict]): The protocols that can be evicted, mapped to their usage.
+            num_protocols (int): The total number of protocols.
+            now (float): The current UNIX timestamp.
+
+        Returns:
+            List[str]: The identifiers of the protocols to evict.
+        """
+        num_excess = num_protocols - self.max_protocols
+        if num_excess <= 0:
+            return []
+
+        ordered = sorted(candidates, key=lambda pid: candidates[pid]["last_used"])
+        return ordered[:num_excess]
+
+
+class LFUEvictionPolicy(EvictionPolicy):
+    """Keeps at most `max_protocols` protocols, evicting the ones used in the fewest conversations."""
+
+    def __init__(self, max_protocols: int, grace_period: float = 60.0) -> None:
+        """Initializes the LFUEvictionPolicy.
+
+        Args:
+            max_protocols (int): The maximum number of protocols to keep.
+            grace_period (float, optional): Seconds since the last use during which a protocol cannot be evicted. Defaults to 60.
+        """
+        super().__init__(grace_period)
+        self.max_protocols = max_protocols
+
+    def select(
+        self, candidates: Dict[str, dict], num_protocols: int, now: float
+    ) -> List[str]:
+        """Selects the least frequently used protocols in excess of `max_protocols`.
+
+        Ties are broken by evicting the least recently used protocol first.
+
+        Args:
+            candidates (Dict[str, dict]): The protocols that can be evicted, mapped to their usage.
+            num_protocols (int): The total number of protocols.
+            now (float): The current UNIX timestamp.
+
+        Returns:
+            List[str]: The identifiers of the protocols to evict.
+        """
+        num_excess = num_protocols - self.max_protocols
+        if num_excess <= 0:
+            return []
+
+        ordered = sorted(
+            candidates,
+            key=lambda pid: (
+                candidates[pid]["conversations"],
+                candidates[pid]["last_used"],
+            ),
+        )
+        return ordered[:num_excess]
+
+
+class TTLEvictionPolicy(EvictionPolicy):
+    """Evicts the protocols that have not been used for `ttl` seconds."""
+
+    def __init__(self, ttl: float) -> None:
+        """Initializes the TTLEvictionPolicy.
+
+        Args:
+            ttl (float): Seconds since the last use after which a protocol is evicted.
+        """
+        # Protocols used in the last `ttl` seconds are never candidates
+        super().__init__(grace_period=ttl)
+        self.ttl = ttl
+
+    def select(
+        self, candidates: Dict[str, dict], num_protocols: int, now: float
+    ) -> List[str]:
+        """Selects the protocols whose last use is older than the TTL.
+
+        Args:
+            candidates (Dict[str, dict]): The protocols that can be evicted, mapped to their usage.
+            num_protocols (int): The total number of protocols.
+            now (float): The current UNIX timestamp.
+
+        Returns:
+            List[str]: The identifiers of the protocols to evict.
+        """
+        return [
+            protocol_id
+            for protocol_id, usage in candidates.items()
+            if now - usage["last_used"] >= self.ttl
+        ]
@@ -1,6 +1,6 @@
 import importlib
 from abc import abstractmethod
-from typing import Any, List
+from typing import Any, Callable, List, Optional
 
 from agora.common.interpreters.restricted import execute_restricted
 from agora.common.toolformers.base import Conversation, Tool, ToolLike
@@ -33,7 +33,12 @@ class Executor:
         pass
 
     def new_conversation(
-        self, protocol_id: str, code: str, multiround: bool, tools: List[ToolLike]
+        self,
+        protocol_id: str,
+        code: str,
+        multiround: bool,
+        tools: List[ToolLike],
+        on_run: Optional[Callable[[str, Optional[Exception]], None]] = None,
     ) -> Conversation:
         """Starts a new conversation using the executor.
 
@@ -42,11 +47,15 @@ class Executor:
             code (str): The code to execute.
             multiround (bool): Whether multiple rounds are allowed.
             tools (List[ToolLike]): Tools allowed for execution.
+            on_run (Optional[Callable[[str, Optional[Exception]], None]], optional): Called after each message with
+                the message and the error raised by the code, if any. Defaults to None.
 
         Returns:
             Conversation: A conversation object for execution.
         """
-        return ExecutorConversation(self, protocol_id, code, multiround, tools)
+        return ExecutorConversation(
+            self, protocol_id, code, multiround, tools, on_run=on_run
+        )
 
 
 class UnsafeExecutor(Executor):
@@ -130,6 +139,7 @@ class ExecutorConversation(Conversation):
         code: str,
         multiround: bool,
         tools: List[ToolLike],
+        on_run: Optional[Callable[[str, Optional[Exception]], None]] = None,
     ) -> None:
         """Initializes ExecutorConversation.
 
@@ -139,6 +149,8 @@ class ExecutorConversation(Conversation):
             code (str): The code to be executed.
             multiround (bool): Whether multiple rounds are allowed.
             tools (List[ToolLike]): Tools allowed for execution.
+            on_run (Optional[Callable[[str, Optional[Exception]], None]], optional): Called after each message with
+                the message and the error raised by the code, if any. Defaults to None.
         """
         self.executor = executor
         self.protocol_id = protocol_id
@@ -146,6 +158,7 @@ class ExecutorConversation(Conversation):
         self.multiround = multiround
         self.tools = [Tool.from_toollike(tool) for tool in tools]
         self.memory = {} if multiround else None
+        self.on_run = on_run
 
     def __call__(self, message: str, print_output: bool = True) -> Any:
         """Processes a message by executing the implementation code.
@@ -158,18 +171,26 @@ class ExecutorConversation(Conversation):
             Any: The output from the execution of the code.
         """
 
-        if self.multiround:
-            response, self.memory = self.executor(
-                self.protocol_id,
-                self.code,
-                self.tools,
-                [message, dict(self.memory)],
-                {},
-            )
-        else:
-            response = self.executor(
-                self.protocol_id, self.code, self.tools, [message], {}
-            )
+        try:
+            if self.multiround:
+                response, self.memory = self.executor(
+                    self.protocol_id,
+                    self.code,
+                    self.tools,
+                    [message, dict(self.memory)],
+                    {},
+                )
+            else:
+                response = self.executor(
+                    self.protocol_id, self.code, self.tools, [message], {}
+                )
+        except Exception as e:
+            if self.on_run is not None:
+                self.on_run(message, e)
+            raise
+
+        if self.on_run is not None:
+            self.on_run(message, None)
 
         if print_output:
             print(response)
@@ -73,7 +73,10 @@ def add_annotations_from_docstring(
 
     func_def = None
     for node in tree.body:
-        if isinstance(node, ast.FunctionDef) and node.name == func.__name__:
+        if (
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and node.name == func.__name__
+        ):
             func_def = node
             break
 
@@ -314,10 +317,18 @@ def set_params_and_annotations(
             parameters=new_params, return_annotation=return_type
         )
 
-        # Define the wrapper function
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            return func(*args, **kwargs)
+        # Define the wrapper function, keeping coroutine functions awaitable
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await func(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return func(*args, **kwargs)
 
         # Set the new signature on the wrapper
         wrapper.__name__ = name
@@ -0,0 +1,126 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from types import TracebackType
+from typing import Dict, Hashable, Iterator, List, Optional
+
+from agora.common.errors import StorageError
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows
+    fcntl = None
+
+
+class KeyedLock:
+    """A collection of reentrant locks, one per key, created on demand.
+
+    Locks are dropped once no thread holds or waits for them, so they do not accumulate for unused keys.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the KeyedLock."""
+        self._lock = threading.Lock()
+        # Maps each key to its lock and the number of threads using it
+        self._locks: Dict[Hashable, List] = {}
+
+    @contextmanager
+    def __call__(self, key: Hashable) -> Iterator[None]:
+        """Holds the lock of a key for the duration of the context.
+
+        Args:
+            key (Hashable): The key to lock.
+
+        Yields:
+            None
+        """
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.RLock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+
+class FileLock:
+    """A reentrant advisory lock on a file, excluding both the other threads and the other processes.
+
+    The lock is based on `fcntl.flock`, so it is only available on POSIX systems.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initializes the FileLock.
+
+        Args:
+            path (str): The path of the lock file. It is created if needed.
+
+        Raises:
+            StorageError: If file locks are not supported on this platform.
+        """
+        if fcntl is None:
+            raise StorageError("File locks are not supported on this platform")
+
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self) -> None:
+        """Acquires the lock, waiting for the other threads and processes to release it."""
+        self._lock.acquire()
+
+        if self._depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a")
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+
+        self._depth += 1
+
+    def release(self) -> None:
+        """Releases the lock."""
+        self._depth -= 1
+
+        if self._depth == 0:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+        self._lock.release()
+
+    def __enter__(self) -> "FileLock":
+        """Acquires the lock.
+
+        Returns:
+            FileLock: The lock itself.
+        """
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Releases the lock.
+
+        Args:
+            exc_type (Optional[type]): The exception type, if raised.
+            exc_value (Optional[BaseException]): The exception instance, if raised.
+            traceback (Optional[TracebackType]): The traceback object, if an exception occurred.
+        """
+        self.release()
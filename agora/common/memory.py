@@ -1,33 +1,225 @@
-from typing import List, Optional
-
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agora.common.cache import LRUCache
 from agora.common.core import Protocol
 from agora.common.errors import StorageError
-from agora.common.storage import Storage
+from agora.common.eviction import EvictionPolicy
+from agora.common.locking import KeyedLock
+from agora.common.storage import BlobStore, Storage
+
+logger = logging.getLogger(__name__)
 
 
 class ProtocolMemory:
     """Manages protocol-related memory, including registration and retrieval of protocols and their implementations."""
 
-    def __init__(self, storage: Storage, **kwargs):
+    def __init__(
+        self,
+        storage: Storage,
+        counter_flush_every: int = 10,
+        blob_store: Optional[BlobStore] = None,
+        cache_size: int = 128,
+        eviction_policy: Optional[EvictionPolicy] = None,
+        eviction_interval: Optional[float] = None,
+        **kwargs,
+    ):
         """
         Initializes ProtocolMemory with the given storage and additional keyword arguments.
 
+        Conversation counters are kept in memory and written to the storage every
+        `counter_flush_every` increments, when `flush_counters` or `close` is called, and at process exit
+        if the memory was not closed.
+        If the process crashes, at most `counter_flush_every - 1` increments are lost.
+
+        If a blob store is provided, protocol documents and implementations are stored in it and
+        the storage only keeps references to them. They are loaded on demand and the most recently
+        used ones are kept in memory.
+
+        If an eviction policy is provided, unpinned protocols can be removed with `evict`, which is
+        also run in the background every `eviction_interval` seconds if set.
+
         Args:
             storage (Storage): The storage backend to use for managing protocols.
+            counter_flush_every (int, optional): Number of counter increments after which counters are written. Defaults to 10.
+            blob_store (Optional[BlobStore], optional): The store for documents and implementations. Defaults to None (stored inline).
+            cache_size (int, optional): Maximum number of protocols, documents and implementations kept in memory. Defaults to 128.
+            eviction_policy (Optional[EvictionPolicy], optional): The policy used by `evict`. Defaults to None.
+            eviction_interval (Optional[float], optional): Seconds between background evictions. Defaults to None (no background eviction).
             **kwargs: Additional keyword arguments, with their default values.
         """
         self.storage = storage
+        self.counter_flush_every = counter_flush_every
+        self.blob_store = blob_store
+        self.cache_size = cache_size
 
-        self.storage.load_memory()
+        self._protocol_cache = LRUCache(cache_size)
+        # Blobs are content-addressed, so cached blobs never become stale
+        self._blob_cache = LRUCache(cache_size)
 
-        if "protocols" not in self.storage:
-            self.storage["protocols"] = {}
+        self._pending_counters: Dict[Tuple[str, ...], int] = {}
+        self._pending_last_used: Dict[str, float] = {}
+        self._num_pending_increments = 0
+        self._counter_lock = threading.Lock()
+        atexit.register(self.flush_counters)
+
+        self._protocol_locks = KeyedLock()
+        self._implementation_locks = KeyedLock()
+
+        # Changes made by other processes invalidate the derived state
+        self.storage.add_reload_listener(self._rebuild_indexes)
+
+        # The storage was loaded by its constructor, and the transaction refreshes shared storages
+        with self.transaction():
+            if "protocols" not in self.storage:
+                self.storage.set_path(("protocols",), {})
+
+            for key, value in kwargs.items():
+                if key not in self.storage:
+                    self.storage.set_path((key,), value)
+
+        if self.blob_store is not None:
+            self._move_inline_blobs()
+
+        self.eviction_policy = eviction_policy
+        # Protocols stored before usage tracking are considered used when the memory is loaded
+        self._loaded_at = time.time()
+        self._eviction_stop = threading.Event()
+        self._eviction_thread = None
+
+        if eviction_interval is not None:
+            self.start_eviction(eviction_interval)
+
+    def _rebuild_indexes(self) -> None:
+        """
+        Rebuilds the in-memory indexes derived from the storage. Subclasses that maintain
+        indexes extend this method.
+        """
+        self._protocol_cache.clear()
+
+    def _load_blob(self, key: str) -> str:
+        """
+        Loads a blob from the blob store, going through the cache.
+
+        Args:
+            key (str): The key of the blob.
+
+        Returns:
+            str: The content of the blob.
+
+        Raises:
+            StorageError: If no blob store is configured or the blob does not exist.
+        """
+        content = self._blob_cache.get(key)
+
+        if content is None:
+            if self.blob_store is None:
+                raise StorageError(
+                    f"Blob {key} referenced, but no blob store configured"
+                )
+            content = self.blob_store.get(key)
+            self._blob_cache.put(key, content)
+
+        return content
+
+    def _store_blob(self, content: str) -> str:
+        """
+        Stores a blob in the blob store and caches it.
+
+        Args:
+            content (str): The content of the blob.
+
+        Returns:
+            str: The key of the blob.
+        """
+        key = self.blob_store.put(content)
+        self._blob_cache.put(key, content)
+        return key
+
+    def _move_inline_blobs(self) -> None:
+        """
+        Moves the documents and implementations stored inline (e.g. by a memory without a blob store)
+        to the blob store, replacing them with references.
+        """
+        with self.transaction():
+            for protocol_id, protocol_info in list(self.storage["protocols"].items()):
+                if protocol_info.get("document") is not None:
+                    self.storage.set_path(
+                        ("protocols", protocol_id, "document_ref"),
+                        self._store_blob(protocol_info["document"]),
+                    )
+                    self.storage.delete_path(("protocols", protocol_id, "document"))
+
+                if protocol_info.get("implementation") is not None:
+                    self.storage.set_path(
+                        ("protocols", protocol_id, "implementation_ref"),
+                        self._store_blob(protocol_info["implementation"]),
+                    )
+                    self.storage.set_path(
+                        ("protocols", protocol_id, "implementation"), None
+                    )
+
+    def refresh(self) -> None:
+        """
+        Loads the changes made by other processes sharing the storage.
+        """
+        self.storage.refresh()
+
+    @contextmanager
+    def protocol_lock(self, protocol_id: str) -> Iterator[None]:
+        """
+        Holds a lock specific to a protocol, e.g. to avoid registering or checking it twice.
+
+        The lock is only shared by the threads of this process.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Yields:
+            None
+        """
+        with self._protocol_locks(protocol_id):
+            yield
+
+    @contextmanager
+    def implementation_lock(self, protocol_id: str) -> Iterator[None]:
+        """
+        Holds a lock specific to the implementation of a protocol, to avoid generating it twice.
 
-        for key, value in kwargs.items():
-            if key not in self.storage:
-                self.storage[key] = value
+        It is distinct from the protocol lock, so that writing an implementation does not block
+        the conversations using the protocol. The lock is only shared by the threads of this process.
 
-        self.storage.save_memory()
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Yields:
+            None
+        """
+        with self._implementation_locks(protocol_id):
+            yield
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Groups the mutations performed inside the context into a single atomic commit.
+
+        If an exception is raised inside the context, the mutations are rolled back.
+        Nested transactions join the enclosing one.
+
+        Yields:
+            None
+        """
+        try:
+            with self.storage.transaction():
+                yield
+        except BaseException:
+            # The storage might have been rolled back
+            self._rebuild_indexes()
+            raise
 
     def protocol_ids(self) -> List[str]:
         """
@@ -77,27 +269,43 @@ class ProtocolMemory:
             raise StorageError(f"Protocol {protocol_id} already in memory")
 
         protocol_info = {
-            "document": protocol_document,
-            "sources": sources,
-            "metadata": metadata,
-            "implementation": implementation,
+            "sources": list(sources),
+            "metadata": dict(metadata) if metadata is not None else None,
         }
 
+        if self.blob_store is None:
+            protocol_info["document"] = protocol_document
+            protocol_info["implementation"] = implementation
+        else:
+            protocol_info["document_ref"] = self._store_blob(protocol_document)
+            protocol_info["implementation"] = None
+            protocol_info["implementation_ref"] = (
+                self._store_blob(implementation) if implementation is not None else None
+            )
+
+        protocol_info["last_used"] = time.time()
         protocol_info.update(kwargs)
 
-        self.storage["protocols"][protocol_id] = protocol_info
-        self.storage.save_memory()
+        self.storage.set_path(("protocols", protocol_id), protocol_info)
+        self._protocol_cache.pop(protocol_id, None)
 
     def get_protocol(self, protocol_id: str) -> Optional[Protocol]:
         """
         Retrieves a Protocol object based on the protocol ID.
 
+        Since protocols are immutable, the same object is returned until the protocol is registered
+        again or evicted from the cache.
+
         Args:
             protocol_id (str): The identifier of the protocol to retrieve.
 
         Returns:
             Optional[Protocol]: The Protocol object if found, else None.
         """
+        protocol = self._protocol_cache.get(protocol_id)
+        if protocol is not None:
+            return protocol
+
         if "protocols" not in self.storage:
             return None
         if protocol_id not in self.storage["protocols"]:
@@ -105,11 +313,19 @@ class ProtocolMemory:
 
         protocol_info = self.storage["protocols"][protocol_id]
 
-        return Protocol(
-            protocol_info["document"],
+        if protocol_info.get("document_ref") is not None:
+            protocol_document = self._load_blob(protocol_info["document_ref"])
+        else:
+            protocol_document = protocol_info["document"]
+
+        protocol = Protocol(
+            protocol_document,
             protocol_info["sources"],
             protocol_info["metadata"],
         )
+        self._protocol_cache.put(protocol_id, protocol)
+
+        return protocol
 
     def get_implementation(self, protocol_id: str) -> Optional[str]:
         """
@@ -123,7 +339,12 @@ class ProtocolMemory:
         """
         if protocol_id not in self.storage["protocols"]:
             return None
-        return self.storage["protocols"][protocol_id]["implementation"]
+
+        protocol_info = self.storage["protocols"][protocol_id]
+
+        if protocol_info.get("implementation_ref") is not None:
+            return self._load_blob(protocol_info["implementation_ref"])
+        return protocol_info["implementation"]
 
     def register_implementation(self, protocol_id: str, implementation: str):
         """
@@ -138,8 +359,57 @@ class ProtocolMemory:
         """
         if protocol_id not in self.storage["protocols"]:
             raise StorageError(f"Protocol {protocol_id} not in memory")
-        self.storage["protocols"][protocol_id]["implementation"] = implementation
-        self.storage.save_memory()
+
+        with self.transaction():
+            if self.blob_store is None:
+                self.storage.set_path(
+                    ("protocols", protocol_id, "implementation"), implementation
+                )
+            else:
+                self.storage.set_path(
+                    ("protocols", protocol_id, "implementation_ref"),
+                    self._store_blob(implementation),
+                )
+
+            # The statistics of the previous implementation do not apply to the new one
+            self._reset_counter(("protocols", protocol_id, "implementation_runs"))
+            self._reset_counter(("protocols", protocol_id, "implementation_failures"))
+
+        self._protocol_cache.pop(protocol_id, None)
+
+    def demote_implementation(self, protocol_id: str) -> Optional[str]:
+        """
+        Removes the implementation of a protocol, e.g. because it fails too often, and resets its statistics.
+
+        The protocol is then handled without an implementation until a new one is registered.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+
+        Returns:
+            Optional[str]: The demoted implementation, or None if the protocol had none.
+        """
+        with self.transaction():
+            implementation = self.get_implementation(protocol_id)
+            if implementation is None:
+                return None
+
+            self.storage.set_path(("protocols", protocol_id, "implementation"), None)
+            if self.get_extra_field(protocol_id, "implementation_ref") is not None:
+                self.storage.set_path(
+                    ("protocols", protocol_id, "implementation_ref"), None
+                )
+
+            self.set_extra_field(
+                protocol_id,
+                "demotions",
+                self.get_extra_field(protocol_id, "demotions", 0) + 1,
+            )
+            self._reset_counter(("protocols", protocol_id, "implementation_runs"))
+            self._reset_counter(("protocols", protocol_id, "implementation_failures"))
+
+        self._protocol_cache.pop(protocol_id, None)
+        return implementation
 
     def get_extra_field(self, protocol_id: str, field: str, default=None):
         """
@@ -171,5 +441,306 @@ class ProtocolMemory:
         """
         if protocol_id not in self.storage["protocols"]:
             raise StorageError(f"Protocol {protocol_id} not in memory")
-        self.storage["protocols"][protocol_id][field] = value
-        self.storage.save_memory()
+        self.storage.set_path(("protocols", protocol_id, field), value)
+
+    def _get_counter(self, path: Tuple[str, ...]) -> int:
+        """
+        Retrieves a counter, including the increments that have not been written yet.
+
+        Args:
+            path (Tuple[str, ...]): The storage path of the counter.
+
+        Returns:
+            int: The value of the counter.
+        """
+        with self._counter_lock:
+            return self.storage.get_path(path, 0) + self._pending_counters.get(path, 0)
+
+    def _increment_counter(self, path: Tuple[str, ...]) -> None:
+        """
+        Increments a counter in memory, writing all counters once enough increments are pending.
+
+        Args:
+            path (Tuple[str, ...]): The storage path of the counter.
+        """
+        with self._counter_lock:
+            self._pending_counters[path] = self._pending_counters.get(path, 0) + 1
+            self._num_pending_increments += 1
+            should_flush = self._num_pending_increments >= self.counter_flush_every
+
+        if should_flush:
+            self.flush_counters()
+
+    def _reset_counter(self, path: Tuple[str, ...]) -> None:
+        """
+        Sets a counter to zero, discarding the increments that have not been written yet.
+
+        Args:
+            path (Tuple[str, ...]): The storage path of the counter.
+        """
+        # The transaction lock is always taken before the counter lock
+        with self.transaction(), self._counter_lock:
+            self._num_pending_increments -= self._pending_counters.pop(path, 0)
+            if self.storage.get_path(path, 0) != 0:
+                self.storage.set_path(path, 0)
+
+    def flush_counters(self) -> None:
+        """
+        Writes the pending counter increments to the storage in a single transaction.
+        """
+        # The transaction lock is always taken before the counter lock
+        with self.transaction(), self._counter_lock:
+            for path, increment in self._pending_counters.items():
+                if path[0] == "protocols" and not self.is_known(path[1]):
+                    # The protocol was removed in the meantime
+                    continue
+                self.storage.set_path(path, self.storage.get_path(path, 0) + increment)
+
+            for protocol_id, last_used in self._pending_last_used.items():
+                if self.is_known(protocol_id):
+                    self.storage.set_path(
+                        ("protocols", protocol_id, "last_used"), last_used
+                    )
+
+            self._pending_counters = {}
+            self._pending_last_used = {}
+            self._num_pending_increments = 0
+
+    def get_protocol_conversations(self, protocol_id: str) -> int:
+        """
+        Retrieves the number of conversations that used a protocol.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Returns:
+            int: The number of conversations.
+        """
+        return self._get_counter(("protocols", protocol_id, "conversations"))
+
+    def increment_protocol_conversations(self, protocol_id: str) -> None:
+        """
+        Increments the number of conversations that used a protocol and marks it as used.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Raises:
+            StorageError: If the protocol is not registered.
+        """
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
+
+        with self._counter_lock:
+            self._pending_last_used[protocol_id] = time.time()
+
+        self._increment_counter(("protocols", protocol_id, "conversations"))
+
+    def record_implementation_run(self, protocol_id: str, failed: bool) -> None:
+        """
+        Counts a run of the implementation of a protocol, and whether it failed.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+            failed (bool): Whether the run failed.
+
+        Raises:
+            StorageError: If the protocol is not registered.
+        """
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
+
+        self._increment_counter(("protocols", protocol_id, "implementation_runs"))
+        if failed:
+            self._increment_counter(
+                ("protocols", protocol_id, "implementation_failures")
+            )
+
+    def get_implementation_stats(self, protocol_id: str) -> Tuple[int, int]:
+        """
+        Retrieves the number of runs and failures of the current implementation of a protocol.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Returns:
+            Tuple[int, int]: The number of runs and the number of failed runs.
+        """
+        return (
+            self._get_counter(("protocols", protocol_id, "implementation_runs")),
+            self._get_counter(("protocols", protocol_id, "implementation_failures")),
+        )
+
+    def get_last_used(self, protocol_id: str) -> float:
+        """
+        Retrieves the last time a protocol was used in a conversation or registered.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Returns:
+            float: The UNIX timestamp of the last use.
+        """
+        with self._counter_lock:
+            if protocol_id in self._pending_last_used:
+                return self._pending_last_used[protocol_id]
+
+        return self.get_extra_field(protocol_id, "last_used", self._loaded_at)
+
+    def has_implementation(self, protocol_id: str) -> bool:
+        """
+        Checks whether a protocol has an implementation, without loading it.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Returns:
+            bool: True if the protocol has an implementation, False otherwise.
+        """
+        return (
+            self.get_extra_field(protocol_id, "implementation") is not None
+            or self.get_extra_field(protocol_id, "implementation_ref") is not None
+        )
+
+    def is_pinned(self, protocol_id: str) -> bool:
+        """
+        Checks whether a protocol must never be evicted. Subclasses override this method.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Returns:
+            bool: True if the protocol is pinned, False otherwise.
+        """
+        return False
+
+    def remove_protocol(self, protocol_id: str) -> None:
+        """
+        Removes a protocol, along with its implementation and statistics.
+
+        Documents and implementations in the blob store are kept, since other memories can share them.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+
+        Raises:
+            StorageError: If the protocol is not registered.
+        """
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
+
+        with self.transaction():
+            self.storage.delete_path(("protocols", protocol_id))
+
+            with self._counter_lock:
+                self._pending_last_used.pop(protocol_id, None)
+                for path in list(self._pending_counters):
+                    if path[:2] == ("protocols", protocol_id):
+                        self._num_pending_increments -= self._pending_counters.pop(path)
+
+            self._protocol_cache.pop(protocol_id, None)
+
+    def evict(self, policy: Optional[EvictionPolicy] = None) -> List[str]:
+        """
+        Removes the protocols selected by an eviction policy.
+
+        Pinned protocols and protocols used within the grace period of the policy are never evicted.
+
+        Args:
+            policy (Optional[EvictionPolicy], optional): The policy to use. Defaults to the policy of the memory.
+
+        Returns:
+            List[str]: The identifiers of the evicted protocols.
+
+        Raises:
+            ValueError: If no policy is provided and the memory has no eviction policy.
+        """
+        if policy is None:
+            policy = self.eviction_policy
+        if policy is None:
+            raise ValueError("No eviction policy configured")
+
+        with self.transaction():
+            now = time.time()
+            protocol_ids = self.protocol_ids()
+
+            candidates = {}
+            for protocol_id in protocol_ids:
+                last_used = self.get_last_used(protocol_id)
+                if now - last_used < policy.grace_period or self.is_pinned(protocol_id):
+                    continue
+
+                candidates[protocol_id] = {
+                    "conversations": self.get_protocol_conversations(protocol_id),
+                    "last_used": last_used,
+                }
+
+            evicted = [
+                protocol_id
+                for protocol_id in policy.select(candidates, len(protocol_ids), now)
+                if protocol_id in candidates
+            ]
+
+            for protocol_id in evicted:
+                self.remove_protocol(protocol_id)
+
+        return evicted
+
+    def _run_eviction(self, interval: float) -> None:
+        """
+        Runs `evict` every `interval` seconds, until `stop_eviction` is called.
+
+        Errors are logged, and the next eviction is attempted after `interval` seconds.
+
+        Args:
+            interval (float): Seconds between evictions.
+        """
+        while not self._eviction_stop.wait(interval):
+            try:
+                self.evict()
+            except Exception:
+                logger.exception("Background eviction failed")
+
+    def start_eviction(self, interval: float) -> None:
+        """
+        Starts evicting protocols in a background thread, unless it is already running.
+
+        Args:
+            interval (float): Seconds between evictions.
+
+        Raises:
+            ValueError: If the memory has no eviction policy.
+        """
+        if self.eviction_policy is None:
+            raise ValueError("No eviction policy configured")
+
+        if self._eviction_thread is not None and self._eviction_thread.is_alive():
+            return
+
+        self._eviction_stop.clear()
+        self._eviction_thread = threading.Thread(
+            target=self._run_eviction, args=(interval,), daemon=True
+        )
+        self._eviction_thread.start()
+
+    def stop_eviction(self) -> None:
+        """
+        Stops the background eviction, waiting for the current pass to finish.
+        """
+        self._eviction_stop.set()
+
+        if self._eviction_thread is not None:
+            self._eviction_thread.join()
+            self._eviction_thread = None
+
+    def close(self) -> None:
+        """
+        Stops the background eviction, writes the pending counters and detaches the memory from the
+        storage and from process exit.
+
+        The memory is kept alive until process exit unless it is closed. The storage is not closed.
+        """
+        self.stop_eviction()
+        self.flush_counters()
+        atexit.unregister(self.flush_counters)
+        self.storage.remove_reload_listener(self._rebuild_indexes)
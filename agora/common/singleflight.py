@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from agora.common.deadline import remaining_time
+from agora.common.errors import DeadlineExceededError
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution.
+
+    The first call with a key (the leader) runs the function, while the calls with the same key
+    made before it completes wait for it and receive the same result, or raise the same exception.
+    Waiting calls stop waiting at their own deadline, if any (see agora.common.deadline).
+    Results are not copied, so every caller receives the same object.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the SingleFlight."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        # Number of functions run, and number of calls that waited for another call instead
+        self.executions = 0
+        self.collapsed = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Joins the call in flight for a key, or starts a new one.
+
+        Args:
+            key (Hashable): The key of the call.
+
+        Returns:
+            Tuple[Future, bool]: The future of the call, and whether the caller is the leader.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+
+            if future is not None:
+                self.collapsed += 1
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            self.executions += 1
+            return future, True
+
+    def _complete(self, key: Hashable, future: Future) -> None:
+        """Removes a completed call, so that the next call with its key runs again.
+
+        Args:
+            key (Hashable): The key of the call.
+            future (Future): The future of the call.
+        """
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Runs a function, unless a call with the same key is in flight.
+
+        Args:
+            key (Hashable): The key identifying identical calls.
+            func (Callable[[], Any]): The function to run.
+
+        Returns:
+            Any: The result of the function.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the caller expires while waiting for another call.
+        """
+        future, is_leader = self._join(key)
+
+        if not is_leader:
+            wait([future], timeout=remaining_time())
+            if not future.done():
+                raise DeadlineExceededError()
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._complete(key, future)
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Asynchronous version of `do`, which shares the calls in flight with it.
+
+        Args:
+            key (Hashable): The key identifying identical calls.
+            func (Callable[[], Awaitable[Any]]): The coroutine function to run.
+
+        Returns:
+            Any: The result of the function.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the caller expires while waiting for another call.
+        """
+        future, is_leader = self._join(key)
+
+        if not is_leader:
+            # Shielded, so that a follower that stops waiting does not cancel the call of the leader
+            waiter = asyncio.shield(asyncio.wrap_future(future))
+            await asyncio.wait([waiter], timeout=remaining_time())
+            if not future.done():
+                raise DeadlineExceededError()
+            return await waiter
+
+        try:
+            result = await func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._complete(key, future)
+
+    def __len__(self) -> int:
+        """Returns the number of calls in flight.
+
+        Returns:
+            int: The count of calls.
+        """
+        with self._lock:
+            return len(self._calls)
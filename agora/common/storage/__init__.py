@@ -0,0 +1,11 @@
+from agora.common.storage.base import (
+    BufferedStorage,
+    Durability,
+    JSONStorage,
+    Storage,
+)
+from agora.common.storage.blob import DEFAULT_BLOB_STORE_PATH, BlobStore
+from agora.common.storage.factory import open_storage
+from agora.common.storage.snapshot import SnapshotStorage
+from agora.common.storage.sqlite import SQLiteStorage
+from agora.common.storage.wal import WALStorage
@@ -0,0 +1,636 @@
+import atexit
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterator, List, Optional, Sequence
+
+from agora.common.locking import FileLock
+
+_MISSING = object()
+
+
+def apply_record(data: dict, record: dict) -> None:
+    """Applies a single mutation record to a nested dictionary.
+
+    Args:
+        data (dict): The dictionary to update.
+        record (dict): The record, with an "op" ("set", "del" or "batch"), a "path" and (for "set") a "value".
+            Batch records contain a list of records under "records".
+    """
+    if record["op"] == "batch":
+        for inner_record in record["records"]:
+            apply_record(data, inner_record)
+        return
+
+    *parents, last = record["path"]
+
+    container = data
+    for key in parents:
+        if not isinstance(container.get(key), dict):
+            if record["op"] == "del":
+                return
+            container[key] = {}
+        container = container[key]
+
+    if record["op"] == "set":
+        container[last] = record["value"]
+    else:
+        container.pop(last, None)
+
+
+class Storage(ABC, MutableMapping):
+    """Abstract base class for a key-value storage.
+
+    This class extends both the 'ABC' class and the 'MutableMapping' interface.
+    Values stored under a key can be nested dictionaries, which can be updated
+    in a fine-grained way through `set_path` and `delete_path`, optionally grouped
+    in a `transaction`.
+
+    If a lock path is provided, the storage can be shared by several processes: transactions
+    hold an advisory lock on that file and start by loading the changes made by the other
+    processes (see `refresh`).
+    """
+
+    def __init__(self, lock_path: Optional[str] = None) -> None:
+        """Initializes the transaction state. Subclasses must call this method.
+
+        Args:
+            lock_path (Optional[str], optional): The lock file shared with the other processes. Defaults to None (single process).
+        """
+        self._transaction_lock = threading.RLock()
+        self._transaction_depth = 0
+        self._transaction_records = []
+        self._undo_records = []
+
+        self._file_lock = FileLock(lock_path) if lock_path is not None else None
+        self._reload_listeners: List[Callable[[], None]] = []
+
+    @property
+    def is_shared(self) -> bool:
+        """Whether the storage is shared with other processes.
+
+        Returns:
+            bool: True if the storage uses a file lock.
+        """
+        return self._file_lock is not None
+
+    @abstractmethod
+    def save_memory(self) -> None:
+        """Saves current state to the underlying storage mechanism."""
+        pass
+
+    @abstractmethod
+    def load_memory(self) -> None:
+        """Loads state from the underlying storage mechanism."""
+        pass
+
+    def flush(self) -> None:
+        """Writes any buffered changes to the underlying storage mechanism."""
+        self.save_memory()
+
+    def close(self) -> None:
+        """Writes any buffered changes and releases the resources of the storage.
+
+        The storage must not be used afterwards.
+        """
+        self.flush()
+
+    def _process_lock(self) -> ContextManager:
+        """Returns the lock excluding the other processes, or a no-op lock for storages that are not shared.
+
+        Returns:
+            ContextManager: The lock.
+        """
+        return self._file_lock if self._file_lock is not None else nullcontext()
+
+    def _refresh(self) -> bool:
+        """Loads the changes made by other processes. Called while holding the file lock.
+
+        The default implementation reloads the whole state. Subclasses can override it to
+        only load what changed.
+
+        Returns:
+            bool: True if the state changed.
+        """
+        self.load_memory()
+        return True
+
+    def _load_external_changes(self) -> bool:
+        """Loads the changes made by other processes and notifies the reload listeners.
+
+        Returns:
+            bool: True if the state changed.
+        """
+        changed = self._refresh()
+
+        if changed:
+            for listener in self._reload_listeners:
+                listener()
+
+        return changed
+
+    def refresh(self) -> bool:
+        """Loads the changes made by other processes since the last refresh.
+
+        Transactions refresh the storage automatically. Storages that are not shared never change.
+
+        Returns:
+            bool: True if the state changed.
+        """
+        if self._file_lock is None:
+            return False
+
+        with self._transaction_lock:
+            if self._transaction_depth > 0:
+                # Already refreshed when the transaction started
+                return False
+
+            with self._file_lock:
+                return self._load_external_changes()
+
+    def add_reload_listener(self, listener: Callable[[], None]) -> None:
+        """Registers a function called after changes made by other processes are loaded.
+
+        Args:
+            listener (Callable[[], None]): The function to call.
+        """
+        self._reload_listeners.append(listener)
+
+    def remove_reload_listener(self, listener: Callable[[], None]) -> None:
+        """Unregisters a function registered with `add_reload_listener`.
+
+        Args:
+            listener (Callable[[], None]): The function to remove.
+        """
+        self._reload_listeners.remove(listener)
+
+    def _apply(self, record: dict) -> None:
+        """Applies a mutation record to the in-memory state.
+
+        The default implementation updates the stored dictionaries in place.
+
+        Args:
+            record (dict): The mutation record.
+        """
+        path = record["path"]
+
+        if len(path) == 1:
+            if record["op"] == "set":
+                self[path[0]] = record["value"]
+            elif path[0] in self:
+                del self[path[0]]
+            return
+
+        root = self.get(path[0])
+        if not isinstance(root, dict):
+            if record["op"] == "del":
+                return
+            root = {}
+            self[path[0]] = root
+
+        apply_record(root, {**record, "path": path[1:]})
+
+    def _persist(self, records: List[dict]) -> None:
+        """Persists mutation records that were already applied to the in-memory state.
+
+        The default implementation saves the whole state. Subclasses can override it to
+        only persist the mutations. The records must be persisted atomically.
+
+        Args:
+            records (List[dict]): The mutation records, in order.
+        """
+        self.save_memory()
+
+    def _undo_record(self, path: Sequence[str]) -> dict:
+        """Builds the record that reverts a mutation of the given path.
+
+        Args:
+            path (Sequence[str]): The path that is about to be mutated.
+
+        Returns:
+            dict: The mutation record restoring the current state.
+        """
+        for i in range(1, len(path) + 1):
+            prefix = list(path[:i])
+            value = self.get_path(prefix, _MISSING)
+
+            # Missing or non-dictionary ancestors are replaced by the mutation
+            if value is _MISSING or (i < len(path) and not isinstance(value, dict)):
+                break
+
+        if value is _MISSING:
+            return {"op": "del", "path": prefix}
+        return {"op": "set", "path": prefix, "value": value}
+
+    def _mutate(self, record: dict) -> None:
+        """Applies a mutation record, persisting it unless a transaction is open.
+
+        Args:
+            record (dict): The mutation record.
+        """
+        with self.transaction():
+            self._undo_records.append(self._undo_record(record["path"]))
+            self._apply(record)
+            self._transaction_records.append(record)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Groups mutations into a single atomic commit.
+
+        Mutations performed through `set_path` and `delete_path` are immediately visible, but
+        they are persisted only when the outermost transaction exits. If an exception is raised,
+        they are rolled back. Nested transactions join the enclosing one. Other threads (and,
+        for shared storages, other processes) wait for the transaction to finish before mutating the storage.
+
+        Yields:
+            None
+        """
+        with self._transaction_lock:
+            lock_file = self._transaction_depth == 0 and self._file_lock is not None
+
+            if lock_file:
+                self._file_lock.acquire()
+
+            try:
+                if lock_file:
+                    self._load_external_changes()
+
+                self._transaction_depth += 1
+                try:
+                    yield
+                except BaseException:
+                    self._transaction_depth -= 1
+                    if self._transaction_depth == 0:
+                        self._rollback()
+                    raise
+
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self._commit()
+            finally:
+                if lock_file:
+                    self._file_lock.release()
+
+    def _commit(self) -> None:
+        """Persists the records of the transaction, rolling back if that fails."""
+        if self._transaction_records:
+            try:
+                self._persist(self._transaction_records)
+            except BaseException:
+                self._rollback()
+                raise
+
+        self._transaction_records = []
+        self._undo_records = []
+
+    def _rollback(self) -> None:
+        """Reverts the in-memory effects of the transaction."""
+        for record in reversed(self._undo_records):
+            self._apply(record)
+
+        self._transaction_records = []
+        self._undo_records = []
+
+    def get_path(self, path: Sequence[str], default: Any = None) -> Any:
+        """Retrieves a nested value.
+
+        Args:
+            path (Sequence[str]): The sequence of keys leading to the value.
+            default (Any, optional): The value to return if the path does not exist. Defaults to None.
+
+        Returns:
+            Any: The stored value, or the default if not found.
+        """
+        if path[0] not in self:
+            return default
+
+        value = self[path[0]]
+
+        for key in path[1:]:
+            if not isinstance(value, dict) or key not in value:
+                return default
+            value = value[key]
+
+        return value
+
+    def set_path(self, path: Sequence[str], value: Any) -> None:
+        """Sets a nested value, creating intermediate dictionaries as needed.
+
+        Args:
+            path (Sequence[str]): The sequence of keys leading to the value.
+            value (Any): The value to store.
+        """
+        self._mutate({"op": "set", "path": list(path), "value": value})
+
+    def delete_path(self, path: Sequence[str]) -> None:
+        """Deletes a nested value. Missing paths are ignored.
+
+        Args:
+            path (Sequence[str]): The sequence of keys leading to the value.
+        """
+        self._mutate({"op": "del", "path": list(path)})
+
+
+class Durability(str, Enum):
+    """
+    Enumeration of the durability levels of a buffered storage.
+    """
+
+    NONE = "none"
+    PERIODIC = "periodic"
+    FSYNC = "fsync"
+
+
+class BufferedStorage(Storage):
+    """Base class for storages that can coalesce saves.
+
+    Every call to `save_memory` is a commit. How commits reach the disk depends on the durability level:
+    - None: every commit is written immediately, without fsync.
+    - Durability.NONE: commits are buffered and written every `flush_every` commits, on `flush()`, on `close()`
+      and at process exit if the storage was not closed.
+    - Durability.PERIODIC: like Durability.NONE, but buffered commits are also written (and fsynced)
+      at most `flush_interval` seconds after the first one. At most `flush_interval` seconds
+      (or `flush_every` commits) of changes can be lost in a crash.
+    - Durability.FSYNC: every commit is written and fsynced immediately.
+
+    Shared storages cannot buffer commits, since other processes would not see them.
+    """
+
+    def __init__(
+        self,
+        durability: Optional[Durability] = None,
+        flush_interval: float = 1.0,
+        flush_every: int = 100,
+        lock_path: Optional[str] = None,
+    ) -> None:
+        """Initializes the buffering state.
+
+        Args:
+            durability (Optional[Durability], optional): The durability level. Defaults to None (write-through).
+            flush_interval (float, optional): Seconds after which buffered commits are written with Durability.PERIODIC. Defaults to 1.
+            flush_every (int, optional): Number of buffered commits after which they are written. Defaults to 100.
+            lock_path (Optional[str], optional): The lock file shared with the other processes. Defaults to None (single process).
+
+        Raises:
+            ValueError: If a buffered durability level is used with a lock path.
+        """
+        super().__init__(lock_path)
+
+        if lock_path is not None and durability in (
+            Durability.NONE,
+            Durability.PERIODIC,
+        ):
+            raise ValueError("Shared storages cannot buffer commits")
+
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+
+        self._pending_commits = 0
+        self._flush_timer = None
+
+        if self.is_buffered:
+            atexit.register(self.flush)
+
+    @property
+    def is_buffered(self) -> bool:
+        """Whether commits are buffered instead of being written immediately.
+
+        Returns:
+            bool: True if commits are buffered.
+        """
+        return self.durability in (Durability.NONE, Durability.PERIODIC)
+
+    @abstractmethod
+    def _write(self, fsync: bool) -> None:
+        """Writes the current state to the underlying storage mechanism.
+
+        Args:
+            fsync (bool): Whether to wait for the data to reach the disk.
+        """
+        pass
+
+    def save_memory(self) -> None:
+        """Commits the current state, writing it according to the durability level.
+
+        Inside a transaction, the state is written when the transaction is committed.
+        """
+        with self._transaction_lock:
+            self._pending_commits += 1
+
+            if self._transaction_depth > 0:
+                return
+
+            if not self.is_buffered:
+                self.flush()
+                return
+
+            if self._pending_commits >= self.flush_every:
+                self.flush()
+            elif self.durability == Durability.PERIODIC and self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Writes the buffered commits, if any.
+
+        Waits for transactions running in other threads, so that only committed state is written.
+        """
+        with self._transaction_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if self._pending_commits == 0 or self._transaction_depth > 0:
+                # Inside a transaction, the state is written by the commit
+                return
+
+            self._write(
+                fsync=self.durability in (Durability.PERIODIC, Durability.FSYNC)
+            )
+            self._pending_commits = 0
+
+    def close(self) -> None:
+        """Writes the buffered commits, and stops writing them at process exit.
+
+        Buffered storages are kept alive until process exit unless they are closed.
+        """
+        self.flush()
+
+        if self.is_buffered:
+            atexit.unregister(self.flush)
+
+
+class JSONStorage(BufferedStorage):
+    """A JSON-based storage implementation."""
+
+    def __init__(
+        self,
+        storage_path: str,
+        autosave: bool = True,
+        durability: Optional[Durability] = None,
+        flush_interval: float = 1.0,
+        flush_every: int = 100,
+        shared: bool = False,
+    ) -> None:
+        """Instantiates JSONStorage.
+
+        Args:
+            storage_path (str): Path to the JSON file.
+            autosave (bool): If True, saves automatically after updates.
+            durability (Optional[Durability], optional): The durability level (see BufferedStorage). Defaults to None (write-through).
+            flush_interval (float, optional): Seconds after which buffered commits are written with Durability.PERIODIC. Defaults to 1.
+            flush_every (int, optional): Number of buffered commits after which they are written. Defaults to 100.
+            shared (bool, optional): If True, the file can be shared with other processes. Mutations must then go through
+                transactions or `set_path`/`delete_path`. Defaults to False.
+        """
+        self.storage_path = Path(storage_path)
+        super().__init__(
+            durability,
+            flush_interval,
+            flush_every,
+            str(self.storage_path) + ".lock" if shared else None,
+        )
+        self.data = {}
+        self._file_signature = None
+        self.load_memory()
+
+        self.autosave = autosave
+
+    def _apply(self, record: dict) -> None:
+        """Applies a mutation record to the in-memory state.
+
+        Args:
+            record (dict): The mutation record.
+        """
+        apply_record(self.data, record)
+
+    def _write(self, fsync: bool) -> None:
+        """Atomically replaces the JSON file with the current state.
+
+        Args:
+            fsync (bool): Whether to wait for the data to reach the disk.
+        """
+        if not self.storage_path.parent.exists():
+            self.storage_path.parent.mkdir(parents=True)
+
+        temp_path = self.storage_path.with_name(self.storage_path.name + ".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, self.storage_path)
+
+        self._file_signature = self._get_file_signature()
+
+    def _get_file_signature(self) -> Optional[tuple]:
+        """Computes a signature of the JSON file that changes whenever it is replaced.
+
+        Returns:
+            Optional[tuple]: The signature, or None if the file does not exist.
+        """
+        try:
+            stat = self.storage_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load_memory(self) -> None:
+        """Loads the state from the JSON file."""
+        with self._process_lock():
+            if not self.storage_path.exists():
+                self._write(fsync=False)
+            with open(self.storage_path, "r") as f:
+                # Taken from the opened file, in case it is replaced while reading
+                stat = os.fstat(f.fileno())
+                self.data = json.load(f)
+
+        self._file_signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self) -> bool:
+        """Reloads the JSON file if it was replaced by another process.
+
+        Returns:
+            bool: True if the state changed.
+        """
+        if self._get_file_signature() == self._file_signature:
+            return False
+
+        self.load_memory()
+        return True
+
+    def __getitem__(self, key: str) -> Any:
+        """Retrieves an item by key.
+
+        Args:
+            key (str): Key to retrieve.
+
+        Returns:
+            Any: The stored value or None if not found.
+        """
+        return self.data.get(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Sets a value for the specified key.
+
+        Args:
+            key (str): Key to modify.
+            value (Any): The data to store.
+        """
+        self.data[key] = value
+
+        if self.autosave:
+            self.save_memory()
+
+    def __delitem__(self, key: str) -> None:
+        """Deletes the entry associated with the specified key.
+
+        Args:
+            key (str): Key to delete.
+        """
+        del self.data[key]
+
+        if self.autosave:
+            self.save_memory()
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over stored keys.
+
+        Returns:
+            Iterator[str]: An iterator over the keys.
+        """
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        """Returns the number of stored items.
+
+        Returns:
+            int: The count of items.
+        """
+        return len(self.data)
+
+    def __contains__(self, key: object) -> bool:
+        """Checks if a key is contained.
+
+        Args:
+            key (object): Key to check.
+
+        Returns:
+            bool: True if the key exists, False otherwise.
+        """
+        return key in self.data
+
+    def __str__(self) -> str:
+        """Returns a string representation of this storage.
+
+        Returns:
+            str: String describing the JSONStorage path.
+        """
+        return f"JSONStorage({self.storage_path})"
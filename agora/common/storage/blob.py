@@ -0,0 +1,181 @@
+import lzma
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
+
+from agora.common.errors import StorageError
+from agora.utils import compute_hash
+
+DEFAULT_BLOB_STORE_PATH = "./.agora/storage/blobs"
+
+BLOB_MAGIC = b"AGB"
+BLOB_VERSION = 1
+
+_CODECS = {
+    None: (0, lambda data: data, lambda data: data),
+    "zlib": (1, zlib.compress, zlib.decompress),
+    "lzma": (2, lzma.compress, lzma.decompress),
+}
+_DECOMPRESSORS = {codec_id: decompress for codec_id, _, decompress in _CODECS.values()}
+
+
+class BlobStore:
+    """A content-addressed store for large strings, such as protocol documents and implementations.
+
+    Every blob is stored in its own file, named after the hash of its content (see `compute_hash`).
+    Storing the same content twice returns the same key and writes nothing, so blobs are never
+    modified once written. Several stores (e.g. the ones of a Sender and a Receiver) can share
+    the same directory, in which case identical documents are stored once.
+
+    Blobs are compressed. Each file starts with a header recording the format version and the
+    compression codec, so stores with different codecs can read each other's blobs. Files
+    without a header are read as uncompressed text.
+    """
+
+    def __init__(
+        self,
+        root_path: str = DEFAULT_BLOB_STORE_PATH,
+        compression: Optional[str] = "zlib",
+    ) -> None:
+        """Instantiates BlobStore.
+
+        Args:
+            root_path (str, optional): The directory containing the blobs. Defaults to DEFAULT_BLOB_STORE_PATH.
+            compression (Optional[str], optional): The codec used for new blobs: "zlib", "lzma" or None. Defaults to "zlib".
+
+        Raises:
+            ValueError: If the codec is not supported.
+        """
+        if compression not in _CODECS:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        self.root_path = Path(root_path)
+        self.compression = compression
+        self._lock = threading.Lock()
+
+    def _blob_path(self, key: str) -> Path:
+        """Computes the file path of a blob.
+
+        Hashes are Base64-encoded, so "/" and "+" are replaced to obtain valid file names.
+        Blobs are sharded in subdirectories by the first two characters of their name.
+
+        Args:
+            key (str): The key of the blob.
+
+        Returns:
+            Path: The path of the file.
+        """
+        file_name = key.replace("/", "_").replace("+", "-")
+        return self.root_path / file_name[:2] / file_name
+
+    def put(self, content: str) -> str:
+        """Stores a blob.
+
+        Args:
+            content (str): The content of the blob.
+
+        Returns:
+            str: The key of the blob.
+        """
+        key = compute_hash(content)
+        blob_path = self._blob_path(key)
+
+        if blob_path.exists():
+            return key
+
+        with self._lock:
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Other processes might be writing the same blob, so the temporary file is unique
+            temp_path = blob_path.with_name(
+                f"{blob_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            codec_id, compress, _ = _CODECS[self.compression]
+            with open(temp_path, "wb") as f:
+                f.write(BLOB_MAGIC + bytes([BLOB_VERSION, codec_id]))
+                f.write(compress(content.encode("utf-8")))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, blob_path)
+
+        return key
+
+    def get(self, key: str) -> str:
+        """Retrieves a blob.
+
+        Args:
+            key (str): The key of the blob.
+
+        Returns:
+            str: The content of the blob.
+
+        Raises:
+            StorageError: If the blob does not exist or is corrupted.
+        """
+        try:
+            with open(self._blob_path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise StorageError(f"Blob {key} not found in {self.root_path}")
+
+        header_length = len(BLOB_MAGIC) + 2
+
+        if not data.startswith(BLOB_MAGIC):
+            return data.decode("utf-8")
+
+        version, codec_id = data[len(BLOB_MAGIC) : header_length]
+        if version != BLOB_VERSION or codec_id not in _DECOMPRESSORS:
+            raise StorageError(f"Blob {key} has an unsupported format")
+
+        try:
+            content = _DECOMPRESSORS[codec_id](data[header_length:]).decode("utf-8")
+        except (zlib.error, lzma.LZMAError, UnicodeDecodeError) as e:
+            raise StorageError(f"Blob {key} is corrupted: {e}")
+
+        if compute_hash(content) != key:
+            raise StorageError(f"Blob {key} is corrupted: hash mismatch")
+
+        return content
+
+    def delete(self, key: str) -> None:
+        """Deletes a blob. Missing blobs are ignored.
+
+        Args:
+            key (str): The key of the blob.
+        """
+        self._blob_path(key).unlink(missing_ok=True)
+
+    def __contains__(self, key: object) -> bool:
+        """Checks if a blob exists.
+
+        Args:
+            key (object): The key of the blob.
+
+        Returns:
+            bool: True if the blob exists, False otherwise.
+        """
+        return isinstance(key, str) and self._blob_path(key).exists()
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over the keys of the stored blobs.
+
+        Returns:
+            Iterator[str]: An iterator over the keys.
+        """
+        if not self.root_path.exists():
+            return
+
+        for blob_path in self.root_path.glob("*/*"):
+            if blob_path.name.endswith(".tmp"):
+                continue
+            yield blob_path.name.replace("_", "/").replace("-", "+")
+
+    def __str__(self) -> str:
+        """Returns a string representation of this blob store.
+
+        Returns:
+            str: String describing the BlobStore path.
+        """
+        return f"BlobStore({self.root_path})"
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from agora.common.storage.base import JSONStorage, Storage
+from agora.common.storage.snapshot import SnapshotStorage
+from agora.common.storage.sqlite import SQLiteStorage
+from agora.common.storage.wal import WALStorage
+
+STORAGE_TYPES = {
+    ".json": JSONStorage,
+    ".snap": SnapshotStorage,
+    ".wal": WALStorage,
+    ".db": SQLiteStorage,
+    ".sqlite": SQLiteStorage,
+    ".sqlite3": SQLiteStorage,
+}
+
+
+def open_storage(storage_path: str, **kwargs) -> Storage:
+    """Opens a storage, choosing the backend from the suffix of the path.
+
+    Suffixes: ".json" (JSONStorage), ".snap" (SnapshotStorage), ".wal" (WALStorage)
+    and ".db", ".sqlite", ".sqlite3" (SQLiteStorage).
+
+    Args:
+        storage_path (str): The path of the storage.
+        **kwargs: Additional keyword arguments for the backend.
+
+    Returns:
+        Storage: The opened storage.
+
+    Raises:
+        ValueError: If the suffix is not supported.
+    """
+    suffix = Path(storage_path).suffix.lower()
+
+    if suffix not in STORAGE_TYPES:
+        raise ValueError(f"Unsupported storage suffix: {suffix}")
+
+    return STORAGE_TYPES[suffix](storage_path, **kwargs)
@@ -0,0 +1,243 @@
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+import zlib
+from enum import Enum
+from pathlib import Path
+from typing import Any, Optional
+
+from agora.common.errors import StorageError
+from agora.common.storage.base import Durability, JSONStorage, apply_record
+
+SNAPSHOT_MAGIC = b"AGSNAP"
+SNAPSHOT_VERSION = 2
+
+# Magic and format version, common to all the versions of the format
+_PREFIX = struct.Struct("<6sH")
+# Magic, format version, marshal version, Python version (major and minor), payload length and CRC32 of the payload
+_HEADER = struct.Struct("<6sHBBBQI")
+# Header of version 1: magic, format version, payload length and CRC32 of the payload
+_HEADER_V1 = struct.Struct("<6sHQI")
+_MARSHAL_VERSION = 4
+
+
+def to_plain(value: Any) -> Any:
+    """Converts a value to the plain types that can be stored in a snapshot.
+
+    Enums are replaced by their values and tuples by lists, as JSON serialization would do.
+
+    Args:
+        value (Any): The value to convert.
+
+    Returns:
+        Any: The converted value.
+    """
+    if isinstance(value, dict):
+        return {to_plain(key): to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class SnapshotStorage(JSONStorage):
+    """A storage saved as a binary snapshot, which loads much faster than JSON.
+
+    The snapshot starts with a versioned header, followed by the state serialized with `marshal`
+    and protected by a CRC32 checksum. It is memory-mapped on load. The header also records the
+    marshal and Python versions that wrote the snapshot, to report them if it cannot be decoded.
+    If the snapshot does not exist, the state is imported from a JSON file (by default the file
+    with the same name and a ".json" suffix, as written by JSONStorage). The JSON file is not
+    updated afterwards, so it replaces an unreadable snapshot only if `recover_from_import` is set.
+
+    Like JSONStorage, every commit rewrites the whole snapshot. Use Durability.PERIODIC to
+    write it periodically instead.
+    """
+
+    def __init__(
+        self,
+        storage_path: str,
+        import_path: Optional[str] = None,
+        autosave: bool = True,
+        durability: Optional[Durability] = None,
+        flush_interval: float = 1.0,
+        flush_every: int = 100,
+        shared: bool = False,
+        recover_from_import: bool = False,
+    ) -> None:
+        """Instantiates SnapshotStorage.
+
+        Args:
+            storage_path (str): Path to the snapshot file.
+            import_path (Optional[str], optional): Path to the JSON file to import if the snapshot does not exist.
+                Defaults to the snapshot path with a ".json" suffix.
+            autosave (bool): If True, saves automatically after updates.
+            durability (Optional[Durability], optional): The durability level (see BufferedStorage). Defaults to None (write-through).
+            flush_interval (float, optional): Seconds after which buffered commits are written with Durability.PERIODIC. Defaults to 1.
+            flush_every (int, optional): Number of buffered commits after which they are written. Defaults to 100.
+            shared (bool, optional): If True, the file can be shared with other processes (see JSONStorage). Defaults to False.
+            recover_from_import (bool, optional): If True, a snapshot that cannot be read is moved to a file with an
+                ".unreadable" suffix and the JSON file is imported instead, losing the changes made since the import.
+                Otherwise, a StorageError is raised. Defaults to False.
+        """
+        if import_path is None:
+            import_path = Path(storage_path).with_suffix(".json")
+        self.import_path = Path(import_path)
+        self.recover_from_import = recover_from_import
+
+        super().__init__(
+            storage_path, autosave, durability, flush_interval, flush_every, shared
+        )
+
+    def _apply(self, record: dict) -> None:
+        """Applies a mutation record to the in-memory state.
+
+        Args:
+            record (dict): The mutation record.
+        """
+        if record["op"] == "set":
+            record = {**record, "value": to_plain(record["value"])}
+        apply_record(self.data, record)
+
+    def _write(self, fsync: bool) -> None:
+        """Atomically replaces the snapshot with the current state.
+
+        Args:
+            fsync (bool): Whether to wait for the data to reach the disk.
+        """
+        if not self.storage_path.parent.exists():
+            self.storage_path.parent.mkdir(parents=True)
+
+        payload = marshal.dumps(self.data, _MARSHAL_VERSION)
+        header = _HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            _MARSHAL_VERSION,
+            *sys.version_info[:2],
+            len(payload),
+            zlib.crc32(payload),
+        )
+
+        temp_path = self.storage_path.with_name(self.storage_path.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(payload)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, self.storage_path)
+
+        self._file_signature = self._get_file_signature()
+
+    def _read_snapshot(self) -> dict:
+        """Reads the snapshot file.
+
+        Returns:
+            dict: The stored state.
+
+        Raises:
+            StorageError: If the snapshot is corrupted, has an unsupported version or cannot be decoded.
+        """
+        with open(self.storage_path, "rb") as f:
+            # Taken from the opened file, in case it is replaced while reading
+            stat = os.fstat(f.fileno())
+
+            if stat.st_size < _PREFIX.size:
+                raise StorageError(f"Snapshot {self.storage_path} is truncated")
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, version = _PREFIX.unpack_from(mapped, 0)
+
+                if magic != SNAPSHOT_MAGIC:
+                    raise StorageError(f"{self.storage_path} is not a snapshot")
+
+                if version == SNAPSHOT_VERSION:
+                    header = _HEADER
+                elif version == 1:
+                    header = _HEADER_V1
+                else:
+                    raise StorageError(
+                        f"Snapshot {self.storage_path} has unsupported version {version}"
+                    )
+
+                if stat.st_size < header.size:
+                    raise StorageError(f"Snapshot {self.storage_path} is truncated")
+
+                if version == SNAPSHOT_VERSION:
+                    _, _, marshal_version, major, minor, length, checksum = (
+                        header.unpack_from(mapped, 0)
+                    )
+                    writer = (
+                        f"Python {major}.{minor}, marshal version {marshal_version}"
+                    )
+                else:
+                    _, _, length, checksum = header.unpack_from(mapped, 0)
+                    writer = "an unknown version of Python"
+
+                with memoryview(mapped)[header.size : header.size + length] as payload:
+                    if len(payload) != length or zlib.crc32(payload) != checksum:
+                        raise StorageError(f"Snapshot {self.storage_path} is corrupted")
+
+                    try:
+                        data = marshal.loads(payload)
+                    except (ValueError, EOFError, TypeError) as e:
+                        raise StorageError(
+                            f"Snapshot {self.storage_path} (written by {writer}) cannot be decoded: {e}"
+                        ) from e
+
+        if not isinstance(data, dict):
+            raise StorageError(
+                f"Snapshot {self.storage_path} does not contain a dictionary"
+            )
+
+        self._file_signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return data
+
+    def load_memory(self) -> None:
+        """Loads the state from the snapshot, importing the JSON file if the snapshot does not exist.
+
+        Raises:
+            StorageError: If the snapshot cannot be read, unless `recover_from_import` is set.
+        """
+        with self._process_lock():
+            if self.storage_path.exists():
+                try:
+                    self.data = self._read_snapshot()
+                    return
+                except StorageError:
+                    if not self.recover_from_import or not self.import_path.exists():
+                        raise
+
+                # Kept aside, since it may contain changes that are not in the JSON file
+                os.replace(
+                    self.storage_path,
+                    self.storage_path.with_name(self.storage_path.name + ".unreadable"),
+                )
+
+            self.data = {}
+            if self.import_path.exists():
+                with open(self.import_path, "r") as f:
+                    self.data = json.load(f)
+
+            self._write(fsync=True)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Sets a value for the specified key.
+
+        Args:
+            key (str): Key to modify.
+            value (Any): The data to store.
+        """
+        super().__setitem__(key, to_plain(value))
+
+    def __str__(self) -> str:
+        """Returns a string representation of this storage.
+
+        Returns:
+            str: String describing the SnapshotStorage path.
+        """
+        return f"SnapshotStorage({self.storage_path})"
@@ -0,0 +1,270 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Iterator, List, Sequence
+
+from agora.common.storage.base import Storage, apply_record
+
+PATH_SEPARATOR = "\x1f"
+
+
+def encode_path(path: Sequence[str]) -> str:
+    """Encodes a path as a row key.
+
+    Each key is JSON-encoded (which escapes the separator), so that the encoded paths of the
+    descendants of a node all start with the encoded path of the node followed by the separator.
+
+    Args:
+        path (Sequence[str]): The sequence of keys.
+
+    Returns:
+        str: The encoded path.
+    """
+    return PATH_SEPARATOR.join(json.dumps(key) for key in path)
+
+
+def decode_path(encoded_path: str) -> List[str]:
+    """Decodes a row key produced by `encode_path`.
+
+    Args:
+        encoded_path (str): The encoded path.
+
+    Returns:
+        List[str]: The sequence of keys.
+    """
+    return [json.loads(key) for key in encoded_path.split(PATH_SEPARATOR)]
+
+
+class SQLiteStorage(Storage):
+    """A SQLite-based storage implementation.
+
+    Every nested value written through `set_path` is stored in its own row, so that updating
+    a protocol field or a counter only rewrites that row. The rows of a transaction are written
+    in a single SQLite transaction. Rows for deeper paths take precedence
+    over the rows of their ancestors. The database runs in WAL mode, which allows several
+    processes to share the same file. By default, the storage is shared: transactions exclude the
+    other processes and reload the state whenever another connection committed a change
+    (detected with `PRAGMA data_version`).
+    """
+
+    def __init__(
+        self, storage_path: str, timeout: float = 30.0, shared: bool = True
+    ) -> None:
+        """Instantiates SQLiteStorage.
+
+        Args:
+            storage_path (str): Path to the SQLite database.
+            timeout (float, optional): Seconds to wait for a lock held by another connection. Defaults to 30.
+            shared (bool, optional): If True, the database can be shared with other processes. Only set it to False
+                if a single process uses the database, since the state is then never reloaded and the rows written
+                from a stale state can overwrite the changes of other processes. Defaults to True.
+        """
+        self.storage_path = Path(storage_path)
+        self.timeout = timeout
+        super().__init__(str(self.storage_path) + ".lock" if shared else None)
+        self.data = {}
+        self._data_version = None
+
+        if not self.storage_path.parent.exists():
+            self.storage_path.parent.mkdir(parents=True)
+
+        self._connection = sqlite3.connect(
+            self.storage_path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (path TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+        self.load_memory()
+
+    def save_memory(self) -> None:
+        """Writes are committed as soon as they happen, so there is nothing to save."""
+        pass
+
+    def load_memory(self) -> None:
+        """Rebuilds the state from the stored rows."""
+        with self._transaction_lock:
+            self._data_version = self._get_data_version()
+            rows = self._connection.execute(
+                "SELECT path, value FROM entries"
+            ).fetchall()
+
+            entries = [(decode_path(path), json.loads(value)) for path, value in rows]
+            # Ancestors first, so that deeper rows override them
+            entries.sort(key=lambda entry: len(entry[0]))
+
+            self.data = {}
+            for path, value in entries:
+                apply_record(self.data, {"op": "set", "path": path, "value": value})
+
+    def _get_data_version(self) -> int:
+        """Retrieves the data version of the database, which changes when other connections commit.
+
+        Returns:
+            int: The data version.
+        """
+        return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _refresh(self) -> bool:
+        """Reloads the state if another connection committed a change.
+
+        Returns:
+            bool: True if the state changed.
+        """
+        if self._get_data_version() == self._data_version:
+            return False
+
+        self.load_memory()
+        return True
+
+    def _delete_descendants(self, encoded_path: str) -> None:
+        """Deletes the rows of all the paths below the given one.
+
+        Args:
+            encoded_path (str): The encoded path.
+        """
+        # The separator is the character right before " ", so this matches exactly the
+        # paths starting with encoded_path + PATH_SEPARATOR
+        self._connection.execute(
+            "DELETE FROM entries WHERE path >= ? AND path < ?",
+            (encoded_path + PATH_SEPARATOR, encoded_path + " "),
+        )
+
+    def _apply(self, record: dict) -> None:
+        """Applies a mutation record to the in-memory state.
+
+        Args:
+            record (dict): The mutation record.
+        """
+        apply_record(self.data, record)
+
+    def _persist_record(self, record: dict) -> None:
+        """Writes the rows affected by a mutation record.
+
+        Args:
+            record (dict): The mutation record.
+        """
+        path = record["path"]
+        encoded_path = encode_path(path)
+
+        self._delete_descendants(encoded_path)
+
+        if record["op"] == "set":
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (path, value) VALUES (?, ?)",
+                (encoded_path, json.dumps(record["value"])),
+            )
+            return
+
+        self._connection.execute("DELETE FROM entries WHERE path = ?", (encoded_path,))
+
+        # If the value is also part of an ancestor row, rewrite the closest one
+        ancestors = [encode_path(path[:i]) for i in range(1, len(path))]
+
+        if ancestors:
+            placeholders = ", ".join("?" for _ in ancestors)
+            stored_ancestors = {
+                row[0]
+                for row in self._connection.execute(
+                    f"SELECT path FROM entries WHERE path IN ({placeholders})",
+                    ancestors,
+                )
+            }
+
+            for i in reversed(range(len(ancestors))):
+                if ancestors[i] in stored_ancestors:
+                    self._connection.execute(
+                        "UPDATE entries SET value = ? WHERE path = ?",
+                        (json.dumps(self.get_path(path[: i + 1])), ancestors[i]),
+                    )
+                    break
+
+    def _persist(self, records: List[dict]) -> None:
+        """Writes the rows affected by the records in a single SQLite transaction.
+
+        Args:
+            records (List[dict]): The mutation records, in order.
+        """
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            for record in records:
+                self._persist_record(record)
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._transaction_lock:
+            self._connection.close()
+
+    def __getitem__(self, key: str) -> Any:
+        """Retrieves an item by key.
+
+        Args:
+            key (str): Key to retrieve.
+
+        Returns:
+            Any: The stored value or None if not found.
+        """
+        return self.data.get(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Sets a value for the specified key.
+
+        Args:
+            key (str): Key to modify.
+            value (Any): The data to store.
+        """
+        self.set_path([key], value)
+
+    def __delitem__(self, key: str) -> None:
+        """Deletes the entry associated with the specified key.
+
+        Args:
+            key (str): Key to delete.
+        """
+        if key not in self.data:
+            raise KeyError(key)
+        self.delete_path([key])
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over stored keys.
+
+        Returns:
+            Iterator[str]: An iterator over the keys.
+        """
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        """Returns the number of stored items.
+
+        Returns:
+            int: The count of items.
+        """
+        return len(self.data)
+
+    def __contains__(self, key: object) -> bool:
+        """Checks if a key is contained.
+
+        Args:
+            key (object): Key to check.
+
+        Returns:
+            bool: True if the key exists, False otherwise.
+        """
+        return key in self.data
+
+    def __str__(self) -> str:
+        """Returns a string representation of this storage.
+
+        Returns:
+            str: String describing the SQLiteStorage path.
+        """
+        return f"SQLiteStorage({self.storage_path})"
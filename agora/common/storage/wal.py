@@ -0,0 +1,325 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+from agora.common.storage.base import BufferedStorage, Durability, apply_record
+
+
+class WALStorage(BufferedStorage):
+    """An append-only storage implementation.
+
+    Every mutation is appended as a JSON line to a write-ahead log, so the cost of a write
+    does not depend on the size of the store. On load, the log is replayed on top of the
+    latest snapshot. Once the log grows past `compaction_threshold` records, a background
+    thread folds it into a new snapshot.
+
+    The durability level controls when appended records are flushed and fsynced (see BufferedStorage).
+
+    Shared WAL storages load the changes made by other processes incrementally, by replaying
+    the records appended to the log since the last refresh.
+    """
+
+    def __init__(
+        self,
+        storage_path: str,
+        compaction_threshold: int = 1000,
+        durability: Optional[Durability] = None,
+        flush_interval: float = 1.0,
+        flush_every: int = 100,
+        shared: bool = False,
+    ) -> None:
+        """Instantiates WALStorage.
+
+        Args:
+            storage_path (str): Path to the JSON snapshot. The log is stored next to it with a ".log" suffix.
+            compaction_threshold (int, optional): Number of log records after which the log is compacted. Defaults to 1000.
+            durability (Optional[Durability], optional): The durability level (see BufferedStorage). Defaults to None (write-through).
+            flush_interval (float, optional): Seconds after which buffered records are flushed with Durability.PERIODIC. Defaults to 1.
+            flush_every (int, optional): Number of buffered commits after which records are flushed. Defaults to 100.
+            shared (bool, optional): If True, the storage can be shared with other processes. Defaults to False.
+        """
+        self.storage_path = Path(storage_path)
+        super().__init__(
+            durability,
+            flush_interval,
+            flush_every,
+            str(self.storage_path) + ".lock" if shared else None,
+        )
+        self.log_path = self.storage_path.with_name(self.storage_path.name + ".log")
+        self.compaction_threshold = compaction_threshold
+
+        self.data = {}
+        self._log = None
+        # Number of bytes of the log already applied to the state
+        self._log_offset = 0
+        self._num_records = 0
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread = None
+
+        self.load_memory()
+
+    @property
+    def _rotated_log_path(self) -> Path:
+        return self.log_path.with_name(self.log_path.name + ".old")
+
+    def _replay(self, path: Path, truncate: bool = False, offset: int = 0) -> int:
+        """Replays the records of a log file on top of the current state.
+
+        Args:
+            path (Path): The log file to replay.
+            truncate (bool): If True, a partially written trailing record is removed from the file.
+            offset (int): The position in the file of the first record to replay.
+
+        Returns:
+            int: The number of records replayed. The end of the last complete record is stored in `_log_offset`.
+        """
+        self._log_offset = offset
+
+        if not path.exists():
+            return 0
+
+        num_records = 0
+        valid_length = offset
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Interrupted write, the mutation was never acknowledged
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                apply_record(self.data, record)
+                num_records += 1
+                valid_length += len(line)
+
+        if truncate and valid_length != path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(valid_length)
+
+        self._log_offset = valid_length
+        return num_records
+
+    def load_memory(self) -> None:
+        """Loads the snapshot and replays the log on top of it."""
+        with self._transaction_lock, self._process_lock():
+            if self._log is not None:
+                self._log.close()
+
+            if not self.storage_path.parent.exists():
+                self.storage_path.parent.mkdir(parents=True)
+
+            self.data = {}
+            if self.storage_path.exists():
+                with open(self.storage_path, "r") as f:
+                    self.data = json.load(f)
+
+            self._num_records = self._replay(self._rotated_log_path)
+            self._num_records += self._replay(self.log_path, truncate=True)
+
+            if self._rotated_log_path.exists():
+                # A previous compaction was interrupted, finish it before appending
+                self._write_snapshot(json.dumps(self.data))
+                self._rotated_log_path.unlink()
+                self.log_path.unlink(missing_ok=True)
+                self._num_records = 0
+                self._log_offset = 0
+
+            self._log = open(self.log_path, "a", encoding="utf-8")
+
+    def _refresh(self) -> bool:
+        """Replays the records appended by other processes since the last refresh.
+
+        If another process compacted the log, the state is reloaded from the new snapshot.
+
+        Returns:
+            bool: True if the state changed.
+        """
+        try:
+            log_stat = self.log_path.stat()
+        except FileNotFoundError:
+            log_stat = None
+
+        if log_stat is None or log_stat.st_ino != os.fstat(self._log.fileno()).st_ino:
+            self.load_memory()
+            return True
+
+        if log_stat.st_size == self._log_offset:
+            return False
+
+        num_records = self._replay(self.log_path, offset=self._log_offset)
+        self._num_records += num_records
+        return num_records > 0
+
+    def _write(self, fsync: bool) -> None:
+        """Flushes the appended records.
+
+        Args:
+            fsync (bool): Whether to wait for the records to reach the disk.
+        """
+        with self._transaction_lock:
+            self._log.flush()
+            if fsync:
+                os.fsync(self._log.fileno())
+
+            # Shared storages refresh before appending, so the log contains no unseen records
+            self._log_offset = os.fstat(self._log.fileno()).st_size
+
+    def _apply(self, record: dict) -> None:
+        """Applies a mutation record to the in-memory state.
+
+        Args:
+            record (dict): The mutation record.
+        """
+        apply_record(self.data, record)
+
+    def _persist(self, records: List[dict]) -> None:
+        """Appends the records to the log as a single line, so that they are replayed atomically.
+
+        Args:
+            records (List[dict]): The mutation records, in order.
+        """
+        if len(records) == 1:
+            record = records[0]
+        else:
+            record = {"op": "batch", "records": records}
+
+        self._log.write(json.dumps(record) + "\n")
+        self._num_records += len(records)
+
+        if self._num_records >= self.compaction_threshold:
+            self._start_compaction()
+
+        self.save_memory()
+
+    def _start_compaction(self) -> None:
+        """Starts a background compaction, unless one is already running."""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
+
+    def compact(self) -> None:
+        """Folds the log into a new snapshot.
+
+        The committed state is serialized and the log is rotated while holding the transaction lock,
+        so writers only wait for an in-memory dump. The snapshot is then written without the lock.
+        Shared storages hold the lock for the whole compaction, since other processes
+        must not load a rotated log without its snapshot.
+        """
+        with self._compaction_lock:
+            if self.is_shared:
+                with self._transaction_lock, self._file_lock:
+                    # Other processes might have appended records since the last refresh
+                    self._load_external_changes()
+                    self._rotate_log()
+            else:
+                self._rotate_log()
+
+    def close(self) -> None:
+        """Waits for the background compaction, writes the buffered records and closes the log."""
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+
+        super().close()
+
+        with self._transaction_lock:
+            self._log.close()
+
+    def _rotate_log(self) -> None:
+        """Rotates the log and folds it into a new snapshot."""
+        with self._transaction_lock:
+            serialized = json.dumps(self.data)
+
+            self._log.close()
+            os.replace(self.log_path, self._rotated_log_path)
+            self._log = open(self.log_path, "a", encoding="utf-8")
+            self._num_records = 0
+            self._log_offset = 0
+
+        self._write_snapshot(serialized)
+        self._rotated_log_path.unlink(missing_ok=True)
+
+    def _write_snapshot(self, serialized: str) -> None:
+        """Atomically replaces the snapshot file.
+
+        Args:
+            serialized (str): The JSON-serialized state.
+        """
+        temp_path = self.storage_path.with_name(self.storage_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(serialized)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.storage_path)
+
+    def __getitem__(self, key: str) -> Any:
+        """Retrieves an item by key.
+
+        Args:
+            key (str): Key to retrieve.
+
+        Returns:
+            Any: The stored value or None if not found.
+        """
+        return self.data.get(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Sets a value for the specified key.
+
+        Args:
+            key (str): Key to modify.
+            value (Any): The data to store.
+        """
+        self.set_path([key], value)
+
+    def __delitem__(self, key: str) -> None:
+        """Deletes the entry associated with the specified key.
+
+        Args:
+            key (str): Key to delete.
+        """
+        if key not in self.data:
+            raise KeyError(key)
+        self.delete_path([key])
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over stored keys.
+
+        Returns:
+            Iterator[str]: An iterator over the keys.
+        """
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        """Returns the number of stored items.
+
+        Returns:
+            int: The count of items.
+        """
+        return len(self.data)
+
+    def __contains__(self, key: object) -> bool:
+        """Checks if a key is contained.
+
+        Args:
+            key (object): Key to check.
+
+        Returns:
+            bool: True if the key exists, False otherwise.
+        """
+        return key in self.data
+
+    def __str__(self) -> str:
+        """Returns a string representation of this storage.
+
+        Returns:
+            str: String describing the WALStorage path.
+        """
+        return f"WALStorage({self.storage_path})"
@@ -1,6 +1,6 @@
 from typing import List
 
-from agora.common.toolformers.base import Tool, Toolformer, ToolLike
+from agora.common.toolformers.base import Conversation, Tool, Toolformer, ToolLike
 from agora.utils import extract_substring
 
 NO_MULTIROUND_REPLY = """ reply takes a single argument, "query", which is a string, and must return a string.
@@ -80,6 +80,22 @@ class ReceiverProgrammer:
         Returns:
             str: The generated implementation code.
         """
+        conversation = self._new_conversation(multiround, additional_info)
+
+        return self._request_implementation(
+            conversation, self._describe_protocol(tools, protocol_document)
+        )
+
+    def _describe_protocol(self, tools: List[ToolLike], protocol_document: str) -> str:
+        """Describe the protocol and the available tools to the language model.
+
+        Args:
+            tools (List[ToolLike]): A list of tools available for implementation.
+            protocol_document (str): The protocol document outlining requirements.
+
+        Returns:
+            str: The description.
+        """
         message = (
             "Protocol document:\n\n"
             + protocol_document
@@ -94,6 +110,20 @@ class ReceiverProgrammer:
                 tool = Tool.from_toollike(tool)
                 message += str(tool) + "\n\n"
 
+        return message
+
+    def _new_conversation(
+        self, multiround: bool, additional_info: str = ""
+    ) -> Conversation:
+        """Start a programming conversation with the language model.
+
+        Args:
+            multiround (bool): Indicates if the protocol supports multiple rounds of interaction.
+            additional_info (str, optional): Additional information for implementation. Defaults to ''.
+
+        Returns:
+            Conversation: The conversation.
+        """
         prompt = TOOL_PROGRAMMER_PROMPT.format(
             reply_description=MULTIROUND_REPLY if multiround else NO_MULTIROUND_REPLY,
             example=MULTIROUND_EXAMPLE if multiround else NO_MULTIROUND_EXAMPLE,
@@ -102,10 +132,60 @@ class ReceiverProgrammer:
         if additional_info:
             prompt += "\n\n" + additional_info
 
-        conversation = self.toolformer.new_conversation(
-            prompt, [], category="programming"
+        return self.toolformer.new_conversation(prompt, [], category="programming")
+
+    def repair(
+        self,
+        tools: List[ToolLike],
+        protocol_document: str,
+        multiround: bool,
+        implementation: str,
+        error: str,
+        query: str,
+        additional_info: str = "",
+    ) -> str:
+        """Generate a fixed version of an implementation that failed.
+
+        Args:
+            tools (List[ToolLike]): A list of tools available for implementation.
+            protocol_document (str): The protocol document outlining requirements.
+            multiround (bool): Indicates if the protocol supports multiple rounds of interaction.
+            implementation (str): The implementation code that failed.
+            error (str): The traceback of the failure.
+            query (str): The query for which the implementation failed.
+            additional_info (str, optional): Additional information for implementation. Defaults to ''.
+
+        Returns:
+            str: The fixed implementation code.
+        """
+        conversation = self._new_conversation(multiround, additional_info)
+        message = (
+            self._describe_protocol(tools, protocol_document)
+            + "\n\n"
+            + "The following implementation was written for this protocol:\n\n"
+            + implementation.replace("def run(", "def reply(")
+            + "\n\n"
+            + "It failed with the following query:\n\n"
+            + query
+            + "\n\n"
+            + "The error was:\n\n"
+            + error
+            + "\n\n"
+            + "Fix the implementation."
         )
 
+        return self._request_implementation(conversation, message)
+
+    def _request_implementation(self, conversation: Conversation, message: str) -> str:
+        """Ask the language model for an implementation until it provides one.
+
+        Args:
+            conversation (Conversation): The conversation with the language model.
+            message (str): The first message of the request.
+
+        Returns:
+            str: The implementation code, with `reply` renamed to `run`.
+        """
         for _ in range(self.num_attempts):
             reply = conversation(message, print_output=False)
 
@@ -1,9 +1,16 @@
+import traceback
 from typing import List, Optional
 
+from agora.common.background import BackgroundRunner
 from agora.common.core import Suitability
 from agora.common.errors import ProtocolRejectedError, ProtocolRetrievalError
 from agora.common.executor import Executor, RestrictedExecutor
-from agora.common.storage import JSONStorage, Storage
+from agora.common.storage import (
+    DEFAULT_BLOB_STORE_PATH,
+    BlobStore,
+    Storage,
+    open_storage,
+)
 from agora.common.toolformers.base import Conversation, ToolLike
 from agora.receiver.components.negotiator import ReceiverNegotiator
 from agora.receiver.components.programmer import ReceiverProgrammer
@@ -29,6 +36,10 @@ class Receiver:
         tools: List[ToolLike],
         additional_info: str = "",
         implementation_threshold: int = 5,
+        background_programming: bool = False,
+        background_runner: Optional[BackgroundRunner] = None,
+        demotion_failure_rate: Optional[float] = None,
+        demotion_min_runs: int = 5,
     ):
         """
         Initializes the Receiver with needed components and configurations.
@@ -43,6 +54,13 @@ class Receiver:
             tools (List[ToolLike]): A list of available tools.
             additional_info (str, optional): Extra info used during operation.
             implementation_threshold (int, optional): Threshold for auto-generating code.
+            background_programming (bool, optional): If True, implementations are written in the background, while the
+                conversations using the protocol are handled by the responder until the implementation is registered. Defaults to False.
+            background_runner (Optional[BackgroundRunner], optional): Runs the background jobs. Defaults to None (a new BackgroundRunner).
+            demotion_failure_rate (Optional[float], optional): Fraction of failed runs from which an implementation is demoted,
+                in which case the responder handles the protocol while the implementation is repaired in the background.
+                Defaults to None (never demoted).
+            demotion_min_runs (int, optional): Minimum number of runs of an implementation before it can be demoted. Defaults to 5.
         """
         self.memory = memory
         self.responder = responder
@@ -53,6 +71,12 @@ class Receiver:
         self.tools = tools
         self.additional_info = additional_info
         self.implementation_threshold = implementation_threshold
+        self.background_programming = background_programming
+        self.background_runner = (
+            background_runner if background_runner is not None else BackgroundRunner()
+        )
+        self.demotion_failure_rate = demotion_failure_rate
+        self.demotion_min_runs = demotion_min_runs
 
     @staticmethod
     def make_default(
@@ -65,8 +89,11 @@ class Receiver:
         executor: Executor = None,
         tools: List[ToolLike] = None,
         additional_info: str = "",
-        storage_path: str = "./.agora/storage/receiver.json",
+        storage_path: str = "./.agora/storage/receiver.snap",
+        blob_store_path: Optional[str] = DEFAULT_BLOB_STORE_PATH,
         implementation_threshold: int = 5,
+        background_programming: bool = False,
+        demotion_failure_rate: Optional[float] = None,
     ) -> "Receiver":
         """
         Creates a default Receiver instance with customizable components.
@@ -81,8 +108,14 @@ class Receiver:
             executor (Executor, optional): The executor component.
             tools (List[ToolLike], optional): A list of tools. Defaults to empty list.
             additional_info (str, optional): Extra info. Defaults to ''.
-            storage_path (str, optional): Path for JSON storage. Defaults to './receiver_storage.json'.
+            storage_path (str, optional): Path of the storage, whose suffix selects the backend (see open_storage).
+                An existing JSON storage with the same name is imported. Defaults to './.agora/storage/receiver.snap'.
+            blob_store_path (Optional[str], optional): Directory of the blob store for protocol documents and implementations,
+                shared by default between Senders and Receivers. None stores them inline. Defaults to DEFAULT_BLOB_STORE_PATH.
             implementation_threshold (int, optional): Threshold for code generation.
+            background_programming (bool, optional): If True, implementations are written in the background. Defaults to False.
+            demotion_failure_rate (Optional[float], optional): Fraction of failed runs from which an implementation is demoted
+                and repaired. Defaults to None (never demoted).
 
         Returns:
             Receiver: A configured Receiver instance.
@@ -91,8 +124,12 @@ class Receiver:
             tools = []
 
         if storage is None:
-            storage = JSONStorage(storage_path)
-        memory = ReceiverMemory(storage)
+            storage = open_storage(storage_path)
+
+        blob_store = None
+        if blob_store_path is not None:
+            blob_store = BlobStore(blob_store_path)
+        memory = ReceiverMemory(storage, blob_store=blob_store)
 
         if responder is None:
             responder = Responder(toolformer)
@@ -119,6 +156,8 @@ class Receiver:
             tools,
             additional_info,
             implementation_threshold,
+            background_programming,
+            demotion_failure_rate=demotion_failure_rate,
         )
 
     def _get_implementation(self, protocol_id: str) -> Optional[str]:
@@ -138,16 +177,127 @@ class Receiver:
             implementation is None
             and self.memory.get_protocol_conversations(protocol_id)
             >= self.implementation_threshold
+            # A demoted implementation is being repaired
+            and not self.background_runner.is_running(("repair", protocol_id))
+        ):
+            if self.background_programming:
+                # The implementation is used by the conversations created after its registration
+                self.background_runner.submit(
+                    ("programming", protocol_id), self._program_protocol, protocol_id
+                )
+            else:
+                implementation = self._program_protocol(protocol_id)
+
+        return implementation
+
+    def _program_protocol(self, protocol_id: str) -> Optional[str]:
+        """
+        Writes and registers the implementation of a protocol, unless it already has one.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+
+        Returns:
+            Optional[str]: The implementation code, or None if the protocol was removed in the meantime.
+        """
+        # Concurrent conversations wait instead of writing two implementations
+        with self.memory.implementation_lock(protocol_id):
+            if not self.memory.is_known(protocol_id):
+                return None
+
+            implementation = self.memory.get_implementation(protocol_id)
+
+            if implementation is None:
+                protocol = self.memory.get_protocol(protocol_id)
+                implementation = self.programmer(
+                    self.tools,
+                    protocol.protocol_document,
+                    protocol.metadata.get("multiround", False),
+                )
+                self.memory.register_implementation(protocol_id, implementation)
+
+            return implementation
+
+    def _record_implementation_run(
+        self,
+        protocol_id: str,
+        implementation: str,
+        query: str,
+        error: Optional[Exception],
+    ) -> None:
+        """
+        Records the outcome of a run of an implementation, demoting and repairing it if it fails too often.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            implementation (str): The implementation that was run.
+            query (str): The query handled by the implementation.
+            error (Optional[Exception]): The error raised by the implementation, if any.
+        """
+        if not self.memory.is_known(protocol_id):
+            return
+
+        self.memory.record_implementation_run(protocol_id, error is not None)
+
+        if error is None or self.demotion_failure_rate is None:
+            return
+
+        runs, failures = self.memory.get_implementation_stats(protocol_id)
+        if (
+            runs < self.demotion_min_runs
+            or failures < self.demotion_failure_rate * runs
         ):
+            return
+
+        with self.memory.implementation_lock(protocol_id):
+            # Another conversation might have demoted or replaced it already
+            if self.memory.get_implementation(protocol_id) != implementation:
+                return
+
+            self.memory.demote_implementation(protocol_id)
+            self.background_runner.submit(
+                ("repair", protocol_id),
+                self._repair_implementation,
+                protocol_id,
+                implementation,
+                "".join(traceback.format_exception(error)),
+                query,
+            )
+
+    def _repair_implementation(
+        self, protocol_id: str, implementation: str, error: str, query: str
+    ) -> Optional[str]:
+        """
+        Writes and registers a fixed version of a demoted implementation, unless a new one was registered.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            implementation (str): The demoted implementation.
+            error (str): The traceback of its last failure.
+            query (str): The query for which it failed.
+
+        Returns:
+            Optional[str]: The fixed implementation, or None if it was not needed anymore.
+        """
+        with self.memory.implementation_lock(protocol_id):
+            if (
+                not self.memory.is_known(protocol_id)
+                or self.memory.get_implementation(protocol_id) is not None
+            ):
+                return None
+
             protocol = self.memory.get_protocol(protocol_id)
-            implementation = self.programmer(
+            repaired_implementation = self.programmer.repair(
                 self.tools,
                 protocol.protocol_document,
                 protocol.metadata.get("multiround", False),
+                implementation,
+                error,
+                query,
             )
-            self.memory.register_implementation(protocol_id, implementation)
+            self.memory.register_implementation(protocol_id, repaired_implementation)
 
-        return implementation
+            return repaired_implementation
 
     def create_conversation(
         self, protocol_hash: str, protocol_sources: List[str]
@@ -173,43 +323,57 @@ class Receiver:
         implementation = None
 
         if protocol_hash is not None:
-            if not self.memory.is_known(protocol_hash):
-                for protocol_source in protocol_sources:
-                    protocol_document = download_and_verify_protocol(
-                        protocol_hash, protocol_source
-                    )
-                    if protocol_document is not None:
-                        break
-
-                if protocol_document is None:
-                    raise ProtocolRetrievalError("Failed to download protocol")
-
-                metadata = extract_metadata(protocol_document)
-                self.memory.register_new_protocol(
-                    protocol_hash, protocol_sources, protocol_document, metadata
-                )
-
-            self.memory.increment_protocol_conversations(protocol_hash)
-
-            protocol = self.memory.get_protocol(protocol_hash)
-            protocol_document = protocol.protocol_document
-            metadata = protocol.metadata
-
-            if self.memory.get_suitability(protocol_hash) == Suitability.UNKNOWN:
-                if self.protocol_checker(protocol_document, self.tools):
-                    self.memory.set_suitability(protocol_hash, Suitability.ADEQUATE)
+            self.memory.refresh()
+
+            # Concurrent conversations wait instead of registering or checking the protocol twice
+            with self.memory.protocol_lock(protocol_hash):
+                if not self.memory.is_known(protocol_hash):
+                    for protocol_source in protocol_sources:
+                        protocol_document = download_and_verify_protocol(
+                            protocol_hash, protocol_source
+                        )
+                        if protocol_document is not None:
+                            break
+
+                    if protocol_document is None:
+                        raise ProtocolRetrievalError("Failed to download protocol")
+
+                    metadata = extract_metadata(protocol_document)
+
+                    with self.memory.transaction():
+                        # Another process sharing the storage might have registered it
+                        if not self.memory.is_known(protocol_hash):
+                            self.memory.register_new_protocol(
+                                protocol_hash,
+                                protocol_sources,
+                                protocol_document,
+                                metadata,
+                            )
+
+                self.memory.increment_protocol_conversations(protocol_hash)
+
+                protocol = self.memory.get_protocol(protocol_hash)
+                protocol_document = protocol.protocol_document
+                metadata = protocol.metadata
+
+                if self.memory.get_suitability(protocol_hash) == Suitability.UNKNOWN:
+                    if self.protocol_checker(protocol_document, self.tools):
+                        self.memory.set_suitability(protocol_hash, Suitability.ADEQUATE)
+                    else:
+                        self.memory.set_suitability(
+                            protocol_hash, Suitability.INADEQUATE
+                        )
+
+                if self.memory.get_suitability(protocol_hash) == Suitability.ADEQUATE:
+                    protocol_document = self.memory.get_protocol(
+                        protocol_hash
+                    ).protocol_document
                 else:
-                    self.memory.set_suitability(protocol_hash, Suitability.INADEQUATE)
-
-            if self.memory.get_suitability(protocol_hash) == Suitability.ADEQUATE:
-                protocol_document = self.memory.get_protocol(
-                    protocol_hash
-                ).protocol_document
-            else:
-                raise ProtocolRejectedError(
-                    f"{protocol_hash} is not suitable for execution"
-                )
+                    raise ProtocolRejectedError(
+                        f"{protocol_hash} is not suitable for execution"
+                    )
 
+            # Outside of the protocol lock, so that other conversations are not blocked while it is written
             implementation = self._get_implementation(protocol_hash)
 
         if implementation is None:
@@ -222,4 +386,7 @@ class Receiver:
                 implementation,
                 metadata.get("multiround", False),
                 self.tools,
+                on_run=lambda query, error: self._record_implementation_run(
+                    protocol_hash, implementation, query, error
+                ),
             )
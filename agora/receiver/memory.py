@@ -35,31 +35,6 @@ class ReceiverMemory(ProtocolMemory):
             conversations=0,
         )
 
-    def get_protocol_conversations(self, protocol_id: str) -> int:
-        """
-        Returns the number of conversations associated with a protocol.
-
-        Args:
-            protocol_id (str): The protocol's identifier.
-
-        Returns:
-            int: The conversation count.
-        """
-        return self.get_extra_field(protocol_id, "conversations", 0)
-
-    def increment_protocol_conversations(self, protocol_id: str) -> None:
-        """
-        Increments the conversation count for the specified protocol.
-
-        Args:
-            protocol_id (str): The identifier of the protocol.
-        """
-        self.set_extra_field(
-            protocol_id,
-            "conversations",
-            self.get_protocol_conversations(protocol_id) + 1,
-        )
-
     def set_suitability(self, protocol_id: str, suitability: Suitability) -> None:
         """
         Sets the suitability for a given protocol.
@@ -81,3 +56,19 @@ class ReceiverMemory(ProtocolMemory):
             Suitability: The current suitability status.
         """
         return self.get_extra_field(protocol_id, "suitability", Suitability.UNKNOWN)
+
+    def is_pinned(self, protocol_id: str) -> bool:
+        """
+        Checks whether a protocol must never be evicted.
+
+        Adequate protocols with an implementation are pinned.
+
+        Args:
+            protocol_id (str): The protocol's identifier.
+
+        Returns:
+            bool: True if the protocol is pinned, False otherwise.
+        """
+        return self.get_suitability(
+            protocol_id
+        ) == Suitability.ADEQUATE and self.has_implementation(protocol_id)
@@ -1,9 +1,12 @@
 import agora.sender.components.negotiator as negotiator
 import agora.sender.components.programmer as programmer
 import agora.sender.components.protocol_picker as protocol_picker
+import agora.sender.components.protocol_ranker as protocol_ranker
 import agora.sender.components.querier as querier
 import agora.sender.components.transporter as transporter
 import agora.sender.schema_generator as schema_generator
+from agora.sender.circuit_breaker import CircuitBreaker, CircuitState
 from agora.sender.core import Sender
 from agora.sender.memory import SenderMemory
+from agora.sender.scatter import CompletionPolicy, ScatterResult
 from agora.sender.schema_generator import TaskSchemaGenerator
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+from agora.common.errors import CircuitOpenError
+
+
+class CircuitState(str, Enum):
+    """
+    Enumeration of the states of the circuit of a target.
+    """
+
+    # Messages are sent normally
+    CLOSED = "closed"
+    # Messages are blocked
+    OPEN = "open"
+    # A limited number of tasks are let through to probe the target
+    HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    """The state of the circuit of a target."""
+
+    def __init__(self, window_size: int) -> None:
+        """Initializes the circuit, closed.
+
+        Args:
+            window_size (int): Number of recent messages whose outcome is kept.
+        """
+        self.state = CircuitState.CLOSED
+        # True for each failed message
+        self.outcomes = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.probes = 0
+
+
+class CircuitBreaker:
+    """Stops sending tasks to targets that fail or are too slow.
+
+    The outcome of the recent messages sent to each target is tracked. A message fails if the
+    transporter raises an error or, optionally, if the target takes too long to answer. When the
+    failure rate of a target reaches a threshold, its circuit opens and its tasks fail immediately
+    with CircuitOpenError. After `reset_timeout` seconds, the circuit becomes half-open and lets a
+    few tasks through: the circuit closes on the first successful message, and opens again on the
+    first failure.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        min_messages: int = 5,
+        slow_message_threshold: Optional[float] = None,
+        reset_timeout: float = 30.0,
+        half_open_max_tasks: int = 1,
+    ) -> None:
+        """Initializes the CircuitBreaker.
+
+        Args:
+            failure_rate_threshold (float, optional): Fraction of failed messages from which the circuit opens. Defaults to 0.5.
+            window_size (int, optional): Number of recent messages used to compute the failure rate. Defaults to 20.
+            min_messages (int, optional): Minimum number of recent messages before the circuit can open. Defaults to 5.
+            slow_message_threshold (Optional[float], optional): Seconds after which a message that succeeded counts as failed.
+                Defaults to None (latency is ignored).
+            reset_timeout (float, optional): Seconds after which an open circuit becomes half-open. Defaults to 30.
+            half_open_max_tasks (int, optional): Maximum number of tasks let through at once by a half-open circuit. Defaults to 1.
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_size = window_size
+        self.min_messages = min_messages
+        self.slow_message_threshold = slow_message_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_tasks = half_open_max_tasks
+
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, _Circuit] = {}
+
+    def _get_circuit(self, target: str) -> _Circuit:
+        """Retrieves the circuit of a target, moving it to half-open if its reset timeout expired.
+
+        The lock must be held.
+
+        Args:
+            target (str): The target.
+
+        Returns:
+            _Circuit: The circuit.
+        """
+        circuit = self._circuits.get(target)
+        if circuit is None:
+            circuit = _Circuit(self.window_size)
+            self._circuits[target] = circuit
+
+        if (
+            circuit.state == CircuitState.OPEN
+            and time.monotonic() - circuit.opened_at >= self.reset_timeout
+        ):
+            circuit.state = CircuitState.HALF_OPEN
+            circuit.probes = 0
+
+        return circuit
+
+    def get_state(self, target: str) -> CircuitState:
+        """Returns the state of the circuit of a target.
+
+        Args:
+            target (str): The target.
+
+        Returns:
+            CircuitState: The state.
+        """
+        with self._lock:
+            return self._get_circuit(target).state
+
+    @contextmanager
+    def guard(self, target: str) -> Iterator[None]:
+        """Lets a task for a target run in the context, unless its circuit is open.
+
+        Args:
+            target (str): The target.
+
+        Yields:
+            None
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with enough tasks already probing the target.
+        """
+        with self._lock:
+            circuit = self._get_circuit(target)
+
+            if circuit.state == CircuitState.OPEN:
+                raise CircuitOpenError(f"Circuit open for {target}")
+
+            is_probe = circuit.state == CircuitState.HALF_OPEN
+            if is_probe:
+                if circuit.probes >= self.half_open_max_tasks:
+                    raise CircuitOpenError(f"Circuit half-open for {target}")
+                circuit.probes += 1
+
+        try:
+            yield
+        finally:
+            if is_probe:
+                with self._lock:
+                    circuit.probes = max(circuit.probes - 1, 0)
+
+    def check(self, target: str) -> None:
+        """Checks that messages can be sent to a target.
+
+        Args:
+            target (str): The target.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        if self.get_state(target) == CircuitState.OPEN:
+            raise CircuitOpenError(f"Circuit open for {target}")
+
+    def record(self, target: str, latency: float, failed: bool) -> None:
+        """Records the outcome of a message sent to a target.
+
+        Args:
+            target (str): The target.
+            latency (float): Seconds taken by the message.
+            failed (bool): Whether the transporter raised an error.
+        """
+        if (
+            self.slow_message_threshold is not None
+            and latency >= self.slow_message_threshold
+        ):
+            failed = True
+
+        with self._lock:
+            circuit = self._get_circuit(target)
+
+            if circuit.state == CircuitState.HALF_OPEN:
+                circuit.outcomes.clear()
+                if failed:
+                    circuit.state = CircuitState.OPEN
+                    circuit.opened_at = time.monotonic()
+                else:
+                    circuit.state = CircuitState.CLOSED
+                return
+
+            if circuit.state == CircuitState.OPEN:
+                # Sent before the circuit opened
+                return
+
+            circuit.outcomes.append(failed)
+
+            if (
+                len(circuit.outcomes) >= self.min_messages
+                and sum(circuit.outcomes) / len(circuit.outcomes)
+                >= self.failure_rate_threshold
+            ):
+                circuit.state = CircuitState.OPEN
+                circuit.opened_at = time.monotonic()
+                circuit.outcomes.clear()
+
+    def reset(self, target: str) -> None:
+        """Closes the circuit of a target and forgets its history.
+
+        Args:
+            target (str): The target.
+        """
+        with self._lock:
+            self._circuits.pop(target, None)
@@ -1,4 +1,6 @@
-from agora.common.toolformers.base import Toolformer
+import json
+
+from agora.common.toolformers.base import Conversation, Toolformer
 from agora.sender.task_schema import TaskSchema, TaskSchemaLike
 from agora.utils import extract_substring
 
@@ -70,6 +72,63 @@ class SenderProgrammer:
             + protocol_document
         )
 
+        return self._request_implementation(conversation, message)
+
+    def repair(
+        self,
+        task_schema: TaskSchemaLike,
+        protocol_document: str,
+        implementation: str,
+        error: str,
+        task_data: dict,
+    ) -> str:
+        """Generates a fixed version of an implementation that failed.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task.
+            protocol_document (str): The protocol specifications.
+            implementation (str): The implementation code that failed.
+            error (str): The traceback of the failure.
+            task_data (dict): The task data for which the implementation failed.
+
+        Returns:
+            str: The fixed implementation code.
+        """
+        task_schema = TaskSchema.from_taskschemalike(task_schema)
+        conversation = self.toolformer.new_conversation(
+            TASK_PROGRAMMER_PROMPT, [], category="programming"
+        )
+        message = (
+            "JSON schema:\n\n"
+            + str(task_schema)
+            + "\n\n"
+            + "Protocol document:\n\n"
+            + protocol_document
+            + "\n\n"
+            + "The following implementation was written for this protocol:\n\n"
+            + implementation.replace("def run(", "def send_query(")
+            + "\n\n"
+            + "It failed with the following task data:\n\n"
+            + json.dumps(task_data, default=repr)
+            + "\n\n"
+            + "The error was:\n\n"
+            + error
+            + "\n\n"
+            + "Fix the implementation."
+        )
+
+        return self._request_implementation(conversation, message)
+
+    def _request_implementation(self, conversation: Conversation, message: str) -> str:
+        """Asks the language model for an implementation until it provides one.
+
+        Args:
+            conversation (Conversation): The conversation with the language model.
+            message (str): The first message of the request.
+
+        Returns:
+            str: The implementation code, with `send_query` renamed to `run`.
+        """
         for _ in range(self.num_attempts):
             reply = conversation(message, print_output=False)
 
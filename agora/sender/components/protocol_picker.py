@@ -1,3 +1,4 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Optional, Tuple
 
 from agora.common.core import Protocol, Suitability
@@ -15,13 +16,15 @@ CHECKER_TASK_PROMPT = (
 class ProtocolPicker:
     """Facilitates checking and selecting protocols for a given task schema."""
 
-    def __init__(self, toolformer: Toolformer) -> None:
+    def __init__(self, toolformer: Toolformer, max_workers: int = 1) -> None:
         """Initializes the ProtocolPicker.
 
         Args:
             toolformer (Toolformer): The Toolformer instance used for protocol checking.
+            max_workers (int, optional): Maximum number of protocols checked concurrently. Defaults to 1 (one at a time).
         """
         self.toolformer = toolformer
+        self.max_workers = max_workers
 
     def check_protocol_for_task(
         self, protocol_document: str, task_schema: TaskSchemaLike
@@ -56,6 +59,11 @@ class ProtocolPicker:
     ) -> Tuple[Optional[Protocol], dict]:
         """Selects the first adequate protocol from provided lists.
 
+        With more than one worker, protocols are checked concurrently, and the first adequate
+        protocol in the order of the lists is returned as soon as the protocols before it are
+        known to be inadequate. The checks that are still queued are then cancelled and those
+        still running are ignored. The verdicts of all the finished checks are returned.
+
         Args:
             task_schema (TaskSchemaLike): The schema of the task.
             *protocol_lists (List[Protocol]): One or more lists of Protocol objects.
@@ -64,6 +72,9 @@ class ProtocolPicker:
             (Optional[Protocol], dict): A tuple of the chosen protocol (if any)
                 and a dictionary of hash evaluations.
         """
+        if self.max_workers > 1:
+            return self._pick_protocol_parallel(task_schema, *protocol_lists)
+
         protocol_evaluations = {}
 
         for protocol_list in protocol_lists:
@@ -77,3 +88,65 @@ class ProtocolPicker:
                     protocol_evaluations[protocol.hash] = Suitability.INADEQUATE
 
         return None, protocol_evaluations
+
+    def _pick_protocol_parallel(
+        self, task_schema: TaskSchemaLike, *protocol_lists: List[Protocol]
+    ) -> Tuple[Optional[Protocol], dict]:
+        """Selects the first adequate protocol from provided lists, checking them concurrently.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task.
+            *protocol_lists (List[Protocol]): One or more lists of Protocol objects.
+
+        Returns:
+            (Optional[Protocol], dict): A tuple of the chosen protocol (if any)
+                and a dictionary of hash evaluations.
+        """
+        protocols = [
+            protocol for protocol_list in protocol_lists for protocol in protocol_list
+        ]
+        protocol_evaluations = {}
+
+        if len(protocols) == 0:
+            return None, protocol_evaluations
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(protocols)),
+            thread_name_prefix="agora-protocol-picker",
+        )
+        try:
+            # Submitted in priority order, so the queued checks run in that order
+            futures = [
+                executor.submit(
+                    self.check_protocol_for_task,
+                    protocol.protocol_document,
+                    task_schema,
+                )
+                for protocol in protocols
+            ]
+            future_protocols = dict(zip(futures, protocols))
+            pending = set(futures)
+            # Index of the first protocol whose verdict is not known yet
+            next_index = 0
+
+            while next_index < len(protocols):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    protocol = future_protocols[future]
+                    if future.exception() is None:
+                        protocol_evaluations[protocol.hash] = (
+                            Suitability.ADEQUATE
+                            if future.result()
+                            else Suitability.INADEQUATE
+                        )
+
+                while next_index < len(protocols) and futures[next_index].done():
+                    # Raises the error of the check, if any
+                    if futures[next_index].result():
+                        return protocols[next_index], protocol_evaluations
+                    next_index += 1
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return None, protocol_evaluations
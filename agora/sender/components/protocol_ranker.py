@@ -0,0 +1,276 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from agora.sender.task_schema import TaskSchema, TaskSchemaLike
+
+# Words that carry no information about what a protocol or a task does
+STOP_WORDS = {
+    "a",
+    "an",
+    "and",
+    "are",
+    "as",
+    "be",
+    "by",
+    "for",
+    "from",
+    "in",
+    "is",
+    "it",
+    "of",
+    "on",
+    "or",
+    "that",
+    "the",
+    "this",
+    "to",
+    "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits a text into lowercase words, also splitting camelCase and snake_case identifiers.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The words, without stop words.
+    """
+    # Split camelCase before lowercasing
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [
+        token
+        for token in re.findall(r"[a-z0-9]+", text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def schema_field_names(schema: Optional[dict]) -> List[str]:
+    """Collects the names of the properties of a JSON schema, including nested ones.
+
+    Args:
+        schema (Optional[dict]): The JSON schema.
+
+    Returns:
+        List[str]: The names of the properties.
+    """
+    if not isinstance(schema, dict):
+        return []
+
+    names = []
+    for name, property_schema in schema.get("properties", {}).items():
+        names.append(name)
+        names += schema_field_names(property_schema)
+
+    names += schema_field_names(schema.get("items"))
+    return names
+
+
+def _set_similarity(first: Set[str], second: Set[str]) -> float:
+    """Computes the cosine similarity of two sets of words.
+
+    Args:
+        first (Set[str]): The first set.
+        second (Set[str]): The second set.
+
+    Returns:
+        float: The similarity, between 0 and 1.
+    """
+    if len(first) == 0 or len(second) == 0:
+        return 0.0
+    return len(first & second) / math.sqrt(len(first) * len(second))
+
+
+class ProtocolRanker:
+    """Ranks candidate protocols for a task without calling a language model.
+
+    The score of a protocol combines the TF-IDF cosine similarity between its document and the task
+    schema, the similarity between its metadata name and description and the task, and the fraction
+    of the field names of the task schema that appear in its document. It is used to select the few
+    protocols that are worth checking with the ProtocolPicker.
+
+    Documents are indexed incrementally: adding a protocol only tokenizes its document and updates
+    the document frequencies.
+    """
+
+    def __init__(
+        self,
+        top_k: Optional[int] = 5,
+        document_weight: float = 1.0,
+        metadata_weight: float = 0.5,
+        field_weight: float = 0.5,
+    ) -> None:
+        """Initializes the ProtocolRanker.
+
+        Args:
+            top_k (Optional[int], optional): Number of protocols returned by `rank`. Defaults to 5. None returns all of them.
+            document_weight (float, optional): Weight of the similarity with the protocol document. Defaults to 1.
+            metadata_weight (float, optional): Weight of the similarity with the name and description of the protocol. Defaults to 0.5.
+            field_weight (float, optional): Weight of the overlap with the field names of the task schema. Defaults to 0.5.
+        """
+        self.top_k = top_k
+        self.document_weight = document_weight
+        self.metadata_weight = metadata_weight
+        self.field_weight = field_weight
+
+        self._lock = threading.Lock()
+        self._term_counts: Dict[str, Counter] = {}
+        self._metadata_terms: Dict[str, Set[str]] = {}
+        self._document_frequencies: Counter = Counter()
+
+    def add_protocol(
+        self, protocol_id: str, protocol_document: str, metadata: dict
+    ) -> None:
+        """Adds a protocol to the index. Protocols already indexed are ignored.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            protocol_document (str): The protocol document.
+            metadata (dict): The metadata of the protocol.
+        """
+        term_counts = Counter(tokenize(protocol_document))
+        metadata_terms = set(
+            tokenize(f"{metadata.get('name', '')} {metadata.get('description', '')}")
+        )
+
+        with self._lock:
+            if protocol_id in self._term_counts:
+                return
+
+            self._term_counts[protocol_id] = term_counts
+            self._metadata_terms[protocol_id] = metadata_terms
+            self._document_frequencies.update(term_counts.keys())
+
+    def remove_protocol(self, protocol_id: str) -> None:
+        """Removes a protocol from the index. Missing protocols are ignored.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+        """
+        with self._lock:
+            term_counts = self._term_counts.pop(protocol_id, None)
+            self._metadata_terms.pop(protocol_id, None)
+
+            if term_counts is not None:
+                self._document_frequencies.subtract(term_counts.keys())
+                self._document_frequencies += Counter()
+
+    def protocol_ids(self) -> Set[str]:
+        """Returns the identifiers of the indexed protocols.
+
+        Returns:
+            Set[str]: The identifiers.
+        """
+        with self._lock:
+            return set(self._term_counts)
+
+    def _idf(self, term: str) -> float:
+        """Computes the smoothed inverse document frequency of a term. The lock must be held.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            float: The inverse document frequency.
+        """
+        return (
+            math.log(
+                (1 + len(self._term_counts)) / (1 + self._document_frequencies[term])
+            )
+            + 1
+        )
+
+    def _tf_idf(self, term_counts: Counter) -> Dict[str, float]:
+        """Computes the normalized TF-IDF vector of a text. The lock must be held.
+
+        Args:
+            term_counts (Counter): The number of occurrences of each term of the text.
+
+        Returns:
+            Dict[str, float]: The weight of each term.
+        """
+        vector = {term: count * self._idf(term) for term, count in term_counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+
+        if norm == 0:
+            return {}
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def score(
+        self, task_schema: TaskSchemaLike, protocol_ids: Iterable[str]
+    ) -> Dict[str, float]:
+        """Scores indexed protocols for a task.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task.
+            protocol_ids (Iterable[str]): The identifiers of the protocols to score. Protocols that are not indexed are ignored.
+
+        Returns:
+            Dict[str, float]: The score of each protocol.
+        """
+        task_schema = TaskSchema.from_taskschemalike(task_schema)
+
+        field_terms = set()
+        for field_name in schema_field_names(
+            task_schema.input_schema
+        ) + schema_field_names(task_schema.output_schema):
+            field_terms.update(tokenize(field_name))
+
+        task_terms = Counter(tokenize(task_schema.description or ""))
+        task_terms.update(field_terms)
+
+        scores = {}
+
+        with self._lock:
+            task_vector = self._tf_idf(task_terms)
+
+            for protocol_id in protocol_ids:
+                term_counts = self._term_counts.get(protocol_id)
+                if term_counts is None:
+                    continue
+
+                document_vector = self._tf_idf(term_counts)
+                document_similarity = sum(
+                    weight * document_vector.get(term, 0.0)
+                    for term, weight in task_vector.items()
+                )
+                metadata_similarity = _set_similarity(
+                    set(task_terms), self._metadata_terms[protocol_id]
+                )
+                field_overlap = (
+                    len(field_terms & term_counts.keys()) / len(field_terms)
+                    if field_terms
+                    else 0.0
+                )
+
+                scores[protocol_id] = (
+                    self.document_weight * document_similarity
+                    + self.metadata_weight * metadata_similarity
+                    + self.field_weight * field_overlap
+                )
+
+        return scores
+
+    def rank(self, task_schema: TaskSchemaLike, protocol_ids: List[str]) -> List[str]:
+        """Selects the `top_k` indexed protocols with the highest scores for a task.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task.
+            protocol_ids (List[str]): The identifiers of the candidate protocols. Protocols that are not indexed are ignored.
+
+        Returns:
+            List[str]: The identifiers of the selected protocols, from the best. Ties keep the order of `protocol_ids`.
+        """
+        scores = self.score(task_schema, protocol_ids)
+        ranked = sorted(
+            (protocol_id for protocol_id in protocol_ids if protocol_id in scores),
+            key=lambda protocol_id: -scores[protocol_id],
+        )
+
+        if self.top_k is None:
+            return ranked
+        return ranked[: self.top_k]
@@ -2,9 +2,16 @@
 # It receives the protocol document and writes the query that must be performed to the system.
 
 import json
-from typing import Any, Callable, Dict
-
-from agora.common.errors import ExecutionError, ProtocolRejectedError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from agora.common.core import Conversation
+from agora.common.deadline import check_deadline
+from agora.common.errors import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    ExecutionError,
+    ProtocolRejectedError,
+)
 from agora.common.toolformers.base import Tool, Toolformer
 from agora.sender.task_schema import TaskSchema, TaskSchemaLike
 
@@ -83,7 +90,7 @@ def parse_and_handle_query(query: str, callback: Callable[[str], Dict]) -> str:
             if response.get("message", "").lower() == "protocol rejected":
                 raise ProtocolRejectedError("Protocol was rejected by the service")
             return "Error calling the tool: " + response["message"]
-    except ProtocolRejectedError:
+    except (ProtocolRejectedError, CircuitOpenError, DeadlineExceededError):
         raise
     except Exception as e:
         # import traceback
@@ -119,24 +126,23 @@ class Querier:
         self.max_messages = max_messages
         self.force_query = force_query
 
-    def handle_conversation(
+    def _start_conversation(
         self,
         prompt: str,
-        message: str,
         output_schema: dict,
         callback: Callable[[str], Dict],
-    ) -> str:
+    ) -> Tuple[Conversation, Callable[[], Tuple[Optional[dict], Optional[str], int]]]:
         """
-        Manages the conversation flow for handling queries and delivering outputs.
+        Starts a conversation with the tools to send queries and deliver the output.
 
         Args:
             prompt (str): The initial prompt for the conversation.
-            message (str): The message to process in the conversation.
             output_schema (dict): The schema defining the structure of the expected output.
             callback (Callable[[str], Dict]): A callback function to handle query responses.
 
         Returns:
-            str: The structured output produced by the conversation.
+            Tuple[Conversation, Callable[[], Tuple[Optional[dict], Optional[str], int]]]: The conversation and a function
+                returning the registered output, the registered error and the number of queries sent so far.
         """
         query_counter = 0
 
@@ -219,43 +225,127 @@ class Querier:
             category="conversation",
         )
 
+        def get_state() -> Tuple[Optional[dict], Optional[str], int]:
+            return found_output, found_error, query_counter
+
+        return conversation, get_state
+
+    def _next_message(
+        self, get_state: Callable[[], Tuple[Optional[dict], Optional[str], int]]
+    ) -> Optional[str]:
+        """
+        Decides how to continue the conversation after a reply.
+
+        Args:
+            get_state (Callable[[], Tuple[Optional[dict], Optional[str], int]]): The state function returned by `_start_conversation`.
+
+        Returns:
+            Optional[str]: The next message to send, or None if the output was delivered.
+
+        Raises:
+            ExecutionError: If an error was registered.
+        """
+        found_output, found_error, query_counter = get_state()
+
+        if found_error is not None:
+            raise ExecutionError(found_error)
+
+        if found_output is not None:
+            return None
+
+        # If we haven't sent a query yet, we can't proceed
+        if query_counter == 0 and self.force_query:
+            return "You must send a query before delivering the structured output."
+        return "You must deliver the structured output."
+
+    def handle_conversation(
+        self,
+        prompt: str,
+        message: str,
+        output_schema: dict,
+        callback: Callable[[str], Dict],
+    ) -> str:
+        """
+        Manages the conversation flow for handling queries and delivering outputs.
+
+        Args:
+            prompt (str): The initial prompt for the conversation.
+            message (str): The message to process in the conversation.
+            output_schema (dict): The schema defining the structure of the expected output.
+            callback (Callable[[str], Dict]): A callback function to handle query responses.
+
+        Returns:
+            str: The structured output produced by the conversation.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the current task (see agora.common.deadline) expires.
+        """
+        conversation, get_state = self._start_conversation(
+            prompt, output_schema, callback
+        )
+
         for _ in range(self.max_messages):
+            check_deadline()
             conversation(message, print_output=False)
 
-            if found_error is not None:
-                raise ExecutionError(found_error)
-
-            if found_output is not None:
+            message = self._next_message(get_state)
+            if message is None:
                 break
 
-            # If we haven't sent a query yet, we can't proceed
-            if query_counter == 0 and self.force_query:
-                message = (
-                    "You must send a query before delivering the structured output."
-                )
-            elif found_output is None:
-                message = "You must deliver the structured output."
-
-        return found_output
+        return get_state()[0]
 
-    def __call__(
+    async def handle_conversation_async(
         self,
-        task_schema: TaskSchemaLike,
-        task_data: Any,
-        protocol_document: str,
+        prompt: str,
+        message: str,
+        output_schema: dict,
         callback: Callable[[str], Dict],
     ) -> str:
         """
-        Executes the querying process based on task schema and protocol document.
+        Asynchronous version of `handle_conversation`.
+
+        The callback is called synchronously by the tools of the conversation, which run in a
+        worker thread unless the conversation is natively asynchronous.
+
+        Args:
+            prompt (str): The initial prompt for the conversation.
+            message (str): The message to process in the conversation.
+            output_schema (dict): The schema defining the structure of the expected output.
+            callback (Callable[[str], Dict]): A callback function to handle query responses.
+
+        Returns:
+            str: The structured output produced by the conversation.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the current task (see agora.common.deadline) expires.
+        """
+        conversation, get_state = self._start_conversation(
+            prompt, output_schema, callback
+        )
+
+        for _ in range(self.max_messages):
+            check_deadline()
+            await conversation.acall(message, print_output=False)
+
+            message = self._next_message(get_state)
+            if message is None:
+                break
+
+        return get_state()[0]
+
+    def _prepare_query(
+        self, task_schema: TaskSchemaLike, task_data: Any, protocol_document: str
+    ) -> Tuple[str, dict, bool]:
+        """
+        Builds the message and the output schema of a querying conversation.
 
         Args:
             task_schema (TaskSchemaLike): The schema of the task to be performed.
             task_data (Any): The data associated with the task.
             protocol_document (str): The document defining the protocol for querying.
-            callback: A callback function to handle query responses.
 
         Returns:
-            str: The structured output resulting from the querying process.
+            Tuple[str, dict, bool]: The query description, the output schema and whether the task output is an object.
         """
         query_description = construct_query_description(
             protocol_document, task_schema, task_data
@@ -274,6 +364,31 @@ class Querier:
             output_schema = {"type": "object", "properties": {"output": output_schema}}
             object_output = False
 
+        return query_description, output_schema, object_output
+
+    def __call__(
+        self,
+        task_schema: TaskSchemaLike,
+        task_data: Any,
+        protocol_document: str,
+        callback: Callable[[str], Dict],
+    ) -> str:
+        """
+        Executes the querying process based on task schema and protocol document.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data (Any): The data associated with the task.
+            protocol_document (str): The document defining the protocol for querying.
+            callback: A callback function to handle query responses.
+
+        Returns:
+            str: The structured output resulting from the querying process.
+        """
+        query_description, output_schema, object_output = self._prepare_query(
+            task_schema, task_data, protocol_document
+        )
+
         result = self.handle_conversation(
             PROTOCOL_QUERIER_PROMPT, query_description, output_schema, callback
         )
@@ -282,3 +397,35 @@ class Querier:
             return result
 
         return result["output"]
+
+    async def acall(
+        self,
+        task_schema: TaskSchemaLike,
+        task_data: Any,
+        protocol_document: str,
+        callback: Callable[[str], Dict],
+    ) -> str:
+        """
+        Asynchronous version of `__call__`.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data (Any): The data associated with the task.
+            protocol_document (str): The document defining the protocol for querying.
+            callback: A callback function to handle query responses.
+
+        Returns:
+            str: The structured output resulting from the querying process.
+        """
+        query_description, output_schema, object_output = self._prepare_query(
+            task_schema, task_data, protocol_document
+        )
+
+        result = await self.handle_conversation_async(
+            PROTOCOL_QUERIER_PROMPT, query_description, output_schema, callback
+        )
+
+        if object_output:
+            return result
+
+        return result["output"]
@@ -1,10 +1,39 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import TYPE_CHECKING, Any, Callable, List, Tuple
 
 import requests
 
+if TYPE_CHECKING:
+    import httpx
+
+try:
+    import httpx
+
+    HTTPX_IMPORT_ERROR = None
+except ImportError as e:
+    HTTPX_IMPORT_ERROR = e
+
 from agora.common.core import Conversation
-from agora.common.errors import ProtocolTransportError
+from agora.common.deadline import check_deadline, remaining_time
+from agora.common.errors import DeadlineExceededError, ProtocolTransportError
+
+
+def _transport_error(error: Exception, is_timeout: bool) -> Exception:
+    """
+    Converts an error of the HTTP client into an error of the transporter.
+
+    Args:
+        error (Exception): The error raised by the HTTP client.
+        is_timeout (bool): Whether the error is a timeout.
+
+    Returns:
+        Exception: DeadlineExceededError if the request timed out at the deadline of the current task,
+            ProtocolTransportError otherwise.
+    """
+    if is_timeout and remaining_time() == 0.0:
+        return DeadlineExceededError()
+    return ProtocolTransportError(f"Error in external conversation: {error}")
 
 
 class SenderTransporter(ABC):
@@ -54,16 +83,17 @@ class SimpleSenderTransporter(SenderTransporter):
             self.protocol_hash = protocol_hash
             self.protocol_sources = protocol_sources
             self._conversation_id = None
+            self._client = None
 
-        def __call__(self, message: str):
+        def _build_query(self, message: str) -> Tuple[str, dict]:
             """
-            Sends a message in the current conversation.
+            Builds the request for a message.
 
             Args:
                 message (str): The message to send.
 
             Returns:
-                dict: The response containing 'status' and 'body'.
+                Tuple[str, dict]: The URL and the JSON body of the request.
             """
             if self._conversation_id is None:
                 target_url = self.target
@@ -79,14 +109,26 @@ class SimpleSenderTransporter(SenderTransporter):
             if self.multiround:
                 raw_query["multiround"] = True
 
-            raw_response = requests.post(target_url, json=raw_query)
+            return target_url, raw_query
 
-            if raw_response.status_code != 200:
-                raise ProtocolTransportError(
-                    "Error in external conversation: " + raw_response.text
-                )
+        def _handle_response(
+            self, status_code: int, text: str, response: Callable[[], Any]
+        ) -> dict:
+            """
+            Processes the response to a message.
+
+            Args:
+                status_code (int): The HTTP status code.
+                text (str): The raw body of the response.
+                response (Callable[[], Any]): A function returning the parsed JSON body.
 
-            response = raw_response.json()
+            Returns:
+                dict: The response containing 'status' and 'body'.
+            """
+            if status_code != 200:
+                raise ProtocolTransportError("Error in external conversation: " + text)
+
+            response = response()
 
             if self.multiround and self._conversation_id is None:
                 if "conversationId" not in response:
@@ -98,6 +140,73 @@ class SimpleSenderTransporter(SenderTransporter):
 
             return {"status": response["status"], "body": response["body"]}
 
+        def __call__(self, message: str):
+            """
+            Sends a message in the current conversation.
+
+            The request times out at the deadline of the current task, if any (see agora.common.deadline).
+
+            Args:
+                message (str): The message to send.
+
+            Returns:
+                dict: The response containing 'status' and 'body'.
+
+            Raises:
+                DeadlineExceededError: If the deadline of the current task has expired.
+                ProtocolTransportError: If the request fails or the target returns an error.
+            """
+            check_deadline()
+            target_url, raw_query = self._build_query(message)
+
+            try:
+                raw_response = requests.post(
+                    target_url, json=raw_query, timeout=remaining_time()
+                )
+            except requests.RequestException as e:
+                raise _transport_error(e, isinstance(e, requests.Timeout)) from e
+
+            return self._handle_response(
+                raw_response.status_code, raw_response.text, raw_response.json
+            )
+
+        async def acall(self, message: str, print_output: bool = True):
+            """
+            Sends a message in the current conversation asynchronously.
+
+            Uses httpx if it is installed, otherwise the request is sent from a worker thread.
+
+            Args:
+                message (str): The message to send.
+                print_output (bool): Ignored, for compatibility with Conversation.
+
+            Returns:
+                dict: The response containing 'status' and 'body'.
+
+            Raises:
+                DeadlineExceededError: If the deadline of the current task has expired.
+                ProtocolTransportError: If the request fails or the target returns an error.
+            """
+            if HTTPX_IMPORT_ERROR is not None:
+                return await asyncio.to_thread(self, message)
+
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=None)
+
+            check_deadline()
+            target_url, raw_query = self._build_query(message)
+
+            try:
+                raw_response = await self._client.post(
+                    target_url, json=raw_query, timeout=remaining_time()
+                )
+            except httpx.HTTPError as e:
+                raise _transport_error(e, isinstance(e, httpx.TimeoutException)) from e
+
+            return self._handle_response(
+                raw_response.status_code, raw_response.text, raw_response.json
+            )
+
         def close(self) -> None:
             """
             Closes the conversation by deleting it from the remote service.
@@ -111,6 +220,28 @@ class SimpleSenderTransporter(SenderTransporter):
                         "Error in closing external conversation:", raw_response.text
                     )
 
+        async def aclose(self) -> None:
+            """
+            Closes the conversation asynchronously.
+            """
+            if self._client is None:
+                await asyncio.to_thread(self.close)
+                return
+
+            try:
+                if self._conversation_id is not None:
+                    raw_response = await self._client.delete(
+                        f"{self.target}/conversations/{self._conversation_id}"
+                    )
+                    if raw_response.status_code != 200:
+                        raise Exception(
+                            "Error in closing external conversation:",
+                            raw_response.text,
+                        )
+            finally:
+                await self._client.aclose()
+                self._client = None
+
     def new_conversation(
         self,
         target: str,
@@ -1,24 +1,66 @@
+import asyncio
+import contextvars
+import copy
 import inspect
-from typing import Any, Optional
+import itertools
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from agora.common.background import BackgroundRunner
+from agora.common.cache import ResultCache
 from agora.common.core import Protocol
-from agora.common.errors import ExecutionError
+from agora.common.deadline import check_deadline, deadline
+from agora.common.errors import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    ExecutionError,
+    ProtocolTransportError,
+)
 from agora.common.executor import Executor, RestrictedExecutor
-from agora.common.storage import JSONStorage, Storage
+from agora.common.singleflight import SingleFlight
+from agora.common.storage import (
+    DEFAULT_BLOB_STORE_PATH,
+    BlobStore,
+    Storage,
+    open_storage,
+)
 from agora.common.toolformers.base import Tool
+from agora.sender.circuit_breaker import CircuitBreaker
 from agora.sender.components.negotiator import SenderNegotiator
 from agora.sender.components.programmer import SenderProgrammer
 from agora.sender.components.protocol_picker import ProtocolPicker
+from agora.sender.components.protocol_ranker import ProtocolRanker
 from agora.sender.components.querier import Querier
 from agora.sender.components.transporter import (
     SenderTransporter,
     SimpleSenderTransporter,
 )
 from agora.sender.memory import SenderMemory
+from agora.sender.scatter import CompletionPolicy, ScatterResult
 from agora.sender.schema_generator import TaskSchemaGenerator
+from agora.sender.shadow import outputs_agree
 from agora.sender.task_schema import TaskSchema, TaskSchemaLike
 from agora.utils import encode_as_data_uri
 
+# Marks missing results, since None is a valid result
+_MISSING = object()
+
 
 class Sender:
     """
@@ -37,6 +79,15 @@ class Sender:
         protocol_threshold: int = 5,
         negotiation_threshold: int = 10,
         implementation_threshold: int = 5,
+        background_negotiation: bool = False,
+        background_programming: bool = False,
+        background_runner: Optional[BackgroundRunner] = None,
+        protocol_ranker: Optional[ProtocolRanker] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        shadow_validation_runs: int = 0,
+        shadow_min_agreement: float = 1.0,
+        demotion_failure_rate: Optional[float] = None,
+        demotion_min_runs: int = 5,
     ):
         """Initialize the Sender with the necessary components and thresholds.
 
@@ -51,6 +102,23 @@ class Sender:
             protocol_threshold (int, optional): Minimum number of conversations to check existing protocols and see if one is suitable. Defaults to 5.
             negotiation_threshold (int, optional): Minimum number of conversations to negotiate a new protocol. Defaults to 10.
             implementation_threshold (int, optional): Minimum number of conversations using a protocol to write an implementation. Defaults to 5.
+            background_negotiation (bool, optional): If True, protocols are negotiated in the background, while the task that
+                triggered the negotiation is executed without a protocol. Defaults to False.
+            background_programming (bool, optional): If True, implementations are written in the background, while the tasks
+                using the protocol are executed with the querier until the implementation is registered. Defaults to False.
+            background_runner (Optional[BackgroundRunner], optional): Runs the background jobs. Defaults to None (a new BackgroundRunner).
+            protocol_ranker (Optional[ProtocolRanker], optional): Selects the unclassified protocols checked by the protocol picker.
+                Defaults to None (all of them are checked).
+            circuit_breaker (Optional[CircuitBreaker], optional): Stops sending tasks to failing targets. Defaults to None.
+            shadow_validation_runs (int, optional): If positive, new implementations are first run in shadow mode, next to
+                the querier, for this many tasks and are only used once their outputs agree with those of the querier.
+                Shadow runs send their own messages to the target, so only enable it for idempotent tasks. Defaults to 0 (disabled).
+            shadow_min_agreement (float, optional): Minimum fraction of shadow runs that must agree with the querier for
+                an implementation to be used. Defaults to 1 (all of them).
+            demotion_failure_rate (Optional[float], optional): Fraction of failed runs from which an implementation is demoted,
+                in which case the querier handles the protocol while the implementation is repaired in the background.
+                Defaults to None (never demoted).
+            demotion_min_runs (int, optional): Minimum number of runs of an implementation before it can be demoted. Defaults to 5.
         """
         self.memory = memory
         self.protocol_picker = protocol_picker
@@ -62,6 +130,21 @@ class Sender:
         self.protocol_threshold = protocol_threshold
         self.negotiation_threshold = negotiation_threshold
         self.implementation_threshold = implementation_threshold
+        self.protocol_ranker = protocol_ranker
+        self.circuit_breaker = circuit_breaker
+        self.shadow_validation_runs = shadow_validation_runs
+        self.shadow_min_agreement = shadow_min_agreement
+        self.demotion_failure_rate = demotion_failure_rate
+        self.demotion_min_runs = demotion_min_runs
+        self.background_negotiation = background_negotiation
+        self.background_programming = background_programming
+        self.background_runner = (
+            background_runner if background_runner is not None else BackgroundRunner()
+        )
+        # The result caches of the tasks declared with a cache TTL
+        self.result_caches: Dict[str, ResultCache] = {}
+        # The coalescers of the tasks declared with coalescing
+        self.single_flights: Dict[str, SingleFlight] = {}
 
     @staticmethod
     def make_default(
@@ -73,10 +156,17 @@ class Sender:
         executor: Executor = None,
         querier: Querier = None,
         transporter: SenderTransporter = None,
-        storage_path: str = "./.agora/storage/sender.json",
+        protocol_ranker: ProtocolRanker = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        storage_path: str = "./.agora/storage/sender.snap",
+        blob_store_path: Optional[str] = DEFAULT_BLOB_STORE_PATH,
         protocol_threshold: int = 5,
         negotiation_threshold: int = 10,
         implementation_threshold: int = 5,
+        background_negotiation: bool = False,
+        background_programming: bool = False,
+        shadow_validation_runs: int = 0,
+        demotion_failure_rate: Optional[float] = None,
     ):
         """Create a default Sender instance with optional custom components.
 
@@ -89,17 +179,32 @@ class Sender:
             executor (Executor, optional): Custom executor. Defaults to None.
             querier (Querier, optional): Custom querier. Defaults to None.
             transporter (SenderTransporter, optional): Custom transporter. Defaults to None.
-            storage_path (str, optional): Path to the storage file. Defaults to './sender_storage.json'.
+            protocol_ranker (ProtocolRanker, optional): Custom protocol ranker. Defaults to None.
+            circuit_breaker (Optional[CircuitBreaker], optional): Stops sending tasks to failing targets. Defaults to None (disabled).
+            storage_path (str, optional): Path to the storage file, whose suffix selects the backend (see open_storage).
+                An existing JSON storage with the same name is imported. Defaults to './.agora/storage/sender.snap'.
+            blob_store_path (Optional[str], optional): Directory of the blob store for protocol documents and implementations,
+                shared by default between Senders and Receivers. None stores them inline. Defaults to DEFAULT_BLOB_STORE_PATH.
             protocol_threshold (int, optional): Minimum number of conversations to check existing protocols and see if one is suitable. Defaults to 5.
             negotiation_threshold (int, optional): Minimum number of conversations to negotiate a new protocol. Defaults to 10.
             implementation_threshold (int, optional): Minimum number of conversations using a protocol to write an implementation. Defaults to 5.
+            background_negotiation (bool, optional): If True, protocols are negotiated in the background. Defaults to False.
+            background_programming (bool, optional): If True, implementations are written in the background. Defaults to False.
+            shadow_validation_runs (int, optional): Number of tasks for which new implementations are validated against
+                the querier before being used. Defaults to 0 (disabled).
+            demotion_failure_rate (Optional[float], optional): Fraction of failed runs from which an implementation is demoted
+                and repaired. Defaults to None (never demoted).
 
         Returns:
             Sender: A configured Sender instance.
         """
         if storage is None:
-            storage = JSONStorage(storage_path)
-        memory = SenderMemory(storage)
+            storage = open_storage(storage_path)
+
+        blob_store = None
+        if blob_store_path is not None:
+            blob_store = BlobStore(blob_store_path)
+        memory = SenderMemory(storage, blob_store=blob_store)
 
         if protocol_picker is None:
             protocol_picker = ProtocolPicker(toolformer)
@@ -113,6 +218,8 @@ class Sender:
             querier = Querier(toolformer)
         if transporter is None:
             transporter = SimpleSenderTransporter()
+        if protocol_ranker is None:
+            protocol_ranker = ProtocolRanker()
 
         return Sender(
             memory,
@@ -125,8 +232,66 @@ class Sender:
             protocol_threshold,
             negotiation_threshold,
             implementation_threshold,
+            background_negotiation,
+            background_programming,
+            protocol_ranker=protocol_ranker,
+            circuit_breaker=circuit_breaker,
+            shadow_validation_runs=shadow_validation_runs,
+            demotion_failure_rate=demotion_failure_rate,
         )
 
+    def _send_message(
+        self, target: str, send: Callable[[str], dict], query: str
+    ) -> dict:
+        """Send a message to a target, recording its outcome in the circuit breaker.
+
+        Args:
+            target (str): The target of the message.
+            send (Callable[[str], dict]): The function sending the message, e.g. a transporter conversation.
+            query (str): The message.
+
+        Returns:
+            dict: The response of the target.
+
+        Raises:
+            DeadlineExceededError: If the deadline of the task has expired.
+            CircuitOpenError: If the circuit of the target is open.
+        """
+        check_deadline()
+
+        if self.circuit_breaker is None:
+            return send(query)
+
+        self.circuit_breaker.check(target)
+
+        start_time = time.monotonic()
+        try:
+            response = send(query)
+        except DeadlineExceededError:
+            raise
+        except Exception:
+            self.circuit_breaker.record(target, time.monotonic() - start_time, True)
+            raise
+
+        self.circuit_breaker.record(target, time.monotonic() - start_time, False)
+        return response
+
+    def _guard_target(self, target: str) -> ContextManager:
+        """Let a task for a target through the circuit breaker, if any.
+
+        Args:
+            target (str): The target of the task.
+
+        Returns:
+            ContextManager: A context in which the task must run.
+
+        Raises:
+            CircuitOpenError: If the circuit of the target is open.
+        """
+        if self.circuit_breaker is None:
+            return nullcontext()
+        return self.circuit_breaker.guard(target)
+
     def _negotiate_protocol(
         self, task_id: str, task_schema: TaskSchemaLike, target: str
     ) -> Optional[Protocol]:
@@ -145,7 +310,7 @@ class Sender:
         ) as external_conversation:
 
             def send_query(query):
-                response = external_conversation(query)
+                response = self._send_message(target, external_conversation, query)
                 # print('Response to negotiator:', response)
                 return response
 
@@ -185,13 +350,27 @@ class Sender:
         """
         # Look in the memory
         suitable_protocol = self.memory.get_suitable_protocol(task_id, target)
+        protocol_ids = []
 
         if (
             suitable_protocol is None
             and self.memory.get_task_conversations(task_id, target)
             > self.protocol_threshold
         ):
-            protocol_ids = self.memory.get_unclassified_protocols(task_id)
+            schema_fingerprint = TaskSchema.from_taskschemalike(
+                task_schema
+            ).fingerprint()
+            protocol_ids = self._apply_cached_verdicts(
+                task_id,
+                schema_fingerprint,
+                self.memory.get_unclassified_protocols(task_id),
+            )
+            suitable_protocol = self.memory.get_suitable_protocol(task_id, target)
+
+        if suitable_protocol is None and protocol_ids:
+            if self.protocol_ranker is not None:
+                # Only the most promising protocols are checked, the others on later calls
+                protocol_ids = self._rank_protocols(task_schema, protocol_ids)
             protocols = [
                 self.memory.get_protocol(protocol_id) for protocol_id in protocol_ids
             ]
@@ -199,18 +378,88 @@ class Sender:
                 self.protocol_picker.pick_protocol(task_schema, protocols)
             )
 
-            for protocol_id, evaluation in protocol_evaluations.items():
-                self.memory.set_default_suitability(protocol_id, task_id, evaluation)
+            with self.memory.transaction():
+                for protocol_id, evaluation in protocol_evaluations.items():
+                    self.memory.set_default_suitability(
+                        protocol_id, task_id, evaluation
+                    )
+                    self.memory.set_verdict(protocol_id, schema_fingerprint, evaluation)
 
         if (
             suitable_protocol is None
             and self.memory.get_task_conversations(task_id, target)
             > self.negotiation_threshold
         ):
-            suitable_protocol = self._negotiate_protocol(task_id, task_schema, target)
+            if self.background_negotiation:
+                # The protocol is used by the calls made after its registration
+                self.background_runner.submit(
+                    ("negotiation", task_id, target),
+                    self._negotiate_protocol,
+                    task_id,
+                    task_schema,
+                    target,
+                )
+            else:
+                suitable_protocol = self._negotiate_protocol(
+                    task_id, task_schema, target
+                )
 
         return suitable_protocol
 
+    def _apply_cached_verdicts(
+        self, task_id: str, schema_fingerprint: str, protocol_ids: List[str]
+    ) -> List[str]:
+        """Classify protocols for a task using the verdicts already given for tasks with the same schema.
+
+        Args:
+            task_id (str): The identifier of the task.
+            schema_fingerprint (str): The fingerprint of the task schema.
+            protocol_ids (List[str]): The identifiers of the unclassified protocols.
+
+        Returns:
+            List[str]: The identifiers of the protocols that were never checked for the schema.
+        """
+        unchecked_protocol_ids = []
+
+        with self.memory.transaction():
+            for protocol_id in protocol_ids:
+                verdict = self.memory.get_verdict(protocol_id, schema_fingerprint)
+
+                if verdict is None:
+                    unchecked_protocol_ids.append(protocol_id)
+                else:
+                    self.memory.set_default_suitability(protocol_id, task_id, verdict)
+
+        return unchecked_protocol_ids
+
+    def _rank_protocols(
+        self, task_schema: TaskSchemaLike, protocol_ids: List[str]
+    ) -> List[str]:
+        """Select the candidate protocols worth checking with the protocol ranker.
+
+        The index of the ranker is first updated with the protocols added to or removed from the memory.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            protocol_ids (List[str]): The identifiers of the candidate protocols.
+
+        Returns:
+            List[str]: The identifiers of the selected protocols, from the most promising.
+        """
+        known_protocol_ids = set(self.memory.protocol_ids())
+        for protocol_id in self.protocol_ranker.protocol_ids() - known_protocol_ids:
+            self.protocol_ranker.remove_protocol(protocol_id)
+
+        indexed_protocol_ids = self.protocol_ranker.protocol_ids()
+        for protocol_id in protocol_ids:
+            if protocol_id not in indexed_protocol_ids:
+                protocol = self.memory.get_protocol(protocol_id)
+                self.protocol_ranker.add_protocol(
+                    protocol_id, protocol.protocol_document, protocol.metadata
+                )
+
+        return self.protocol_ranker.rank(task_schema, protocol_ids)
+
     def _get_implementation(self, protocol_id: str, task_schema):
         """Obtain the implementation for a specific protocol and task schema.
 
@@ -224,17 +473,327 @@ class Sender:
         # Check if a routine exists and eventually create it
         implementation = self.memory.get_implementation(protocol_id)
 
+        implementation_threshold = self.implementation_threshold
+        if self.shadow_validation_runs > 0:
+            # Each rejected candidate postpones writing the next one
+            implementation_threshold *= (
+                2 ** self.memory.get_shadow_stats(protocol_id)["rejections"]
+            )
+
         if (
             implementation is None
             and self.memory.get_protocol_conversations(protocol_id)
-            > self.implementation_threshold
+            > implementation_threshold
+            # A demoted implementation is being repaired
+            and not self.background_runner.is_running(("repair", protocol_id))
         ):
-            protocol = self.memory.get_protocol(protocol_id)
-            implementation = self.programmer(task_schema, protocol.protocol_document)
-            self.memory.register_implementation(protocol_id, implementation)
+            if self.background_programming:
+                # The implementation is used by the calls made after its registration
+                self.background_runner.submit(
+                    ("programming", protocol_id),
+                    self._program_protocol,
+                    protocol_id,
+                    task_schema,
+                )
+            else:
+                implementation = self._program_protocol(protocol_id, task_schema)
 
         return implementation
 
+    def _program_protocol(self, protocol_id: str, task_schema) -> Optional[str]:
+        """Write and register the implementation of a protocol, unless it already has one.
+
+        With shadow validation, the implementation is registered as a candidate instead, and is
+        only used once it is promoted by `_run_shadow`.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            task_schema: The schema of the task to be performed.
+
+        Returns:
+            Optional[str]: The implementation, or None if the protocol was removed in the meantime
+                or the implementation must be validated first.
+        """
+        # Concurrent calls wait instead of writing two implementations
+        with self.memory.implementation_lock(protocol_id):
+            if not self.memory.is_known(protocol_id):
+                return None
+
+            implementation = self.memory.get_implementation(protocol_id)
+
+            if implementation is None:
+                if self.shadow_validation_runs > 0:
+                    if self.memory.get_candidate_implementation(protocol_id) is None:
+                        protocol = self.memory.get_protocol(protocol_id)
+                        self.memory.register_candidate_implementation(
+                            protocol_id,
+                            self.programmer(task_schema, protocol.protocol_document),
+                        )
+                    return None
+
+                protocol = self.memory.get_protocol(protocol_id)
+                implementation = self.programmer(
+                    task_schema, protocol.protocol_document
+                )
+                self.memory.register_implementation(protocol_id, implementation)
+
+            return implementation
+
+    def _run_implementation(
+        self,
+        task_schema: TaskSchemaLike,
+        protocol_id: str,
+        implementation: str,
+        task_data: dict,
+        callback,
+    ) -> Any:
+        """Run the implementation of a protocol, recording whether it failed.
+
+        Errors raised while sending messages (e.g. by the transporter or the circuit breaker) and
+        expired deadlines are not failures of the implementation.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            protocol_id (str): The identifier of the protocol.
+            implementation (str): The implementation code to execute.
+            task_data (dict): The data required for the task.
+            callback: The callback function to send queries to the external service.
+
+        Returns:
+            Any: The result of the routine execution.
+        """
+        try:
+            response = self._run_routine(
+                protocol_id, implementation, task_data, callback
+            )
+        except (ProtocolTransportError, DeadlineExceededError):
+            raise
+        except Exception:
+            self._record_implementation_run(
+                task_schema,
+                protocol_id,
+                implementation,
+                task_data,
+                traceback.format_exc(),
+            )
+            raise
+
+        self._record_implementation_run(
+            task_schema, protocol_id, implementation, task_data, None
+        )
+        return response
+
+    def _record_implementation_run(
+        self,
+        task_schema: TaskSchemaLike,
+        protocol_id: str,
+        implementation: str,
+        task_data: dict,
+        error: Optional[str],
+    ) -> None:
+        """Record the outcome of a run of an implementation, demoting and repairing it if it fails too often.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task that was performed.
+            protocol_id (str): The identifier of the protocol.
+            implementation (str): The implementation that was run.
+            task_data (dict): The data of the task.
+            error (Optional[str]): The traceback of the failure, if the run failed.
+        """
+        if not self.memory.is_known(protocol_id):
+            return
+
+        self.memory.record_implementation_run(protocol_id, error is not None)
+
+        if error is None or self.demotion_failure_rate is None:
+            return
+
+        runs, failures = self.memory.get_implementation_stats(protocol_id)
+        if (
+            runs < self.demotion_min_runs
+            or failures < self.demotion_failure_rate * runs
+        ):
+            return
+
+        with self.memory.implementation_lock(protocol_id):
+            # Another call might have demoted or replaced it already
+            if self.memory.get_implementation(protocol_id) != implementation:
+                return
+
+            self.memory.demote_implementation(protocol_id)
+            self.background_runner.submit(
+                ("repair", protocol_id),
+                self._repair_implementation,
+                protocol_id,
+                task_schema,
+                implementation,
+                error,
+                task_data,
+            )
+
+    def _repair_implementation(
+        self,
+        protocol_id: str,
+        task_schema: TaskSchemaLike,
+        implementation: str,
+        error: str,
+        task_data: dict,
+    ) -> Optional[str]:
+        """Write a fixed version of a demoted implementation, unless a new one was registered.
+
+        With shadow validation, the fixed implementation is registered as a candidate.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            task_schema (TaskSchemaLike): The schema of the task.
+            implementation (str): The demoted implementation.
+            error (str): The traceback of its last failure.
+            task_data (dict): The task data for which it failed.
+
+        Returns:
+            Optional[str]: The fixed implementation, or None if it was not needed anymore or must be validated first.
+        """
+        with self.memory.implementation_lock(protocol_id):
+            if (
+                not self.memory.is_known(protocol_id)
+                or self.memory.get_implementation(protocol_id) is not None
+            ):
+                return None
+
+            protocol = self.memory.get_protocol(protocol_id)
+            repaired_implementation = self.programmer.repair(
+                task_schema,
+                protocol.protocol_document,
+                implementation,
+                error,
+                task_data,
+            )
+
+            if self.shadow_validation_runs > 0:
+                self.memory.register_candidate_implementation(
+                    protocol_id, repaired_implementation
+                )
+                return None
+
+            self.memory.register_implementation(protocol_id, repaired_implementation)
+            return repaired_implementation
+
+    def _validate_candidate(
+        self,
+        task_schema: TaskSchemaLike,
+        task_data: dict,
+        target: str,
+        protocol: Optional[Protocol],
+        sources: List[str],
+        expected_output: Any,
+    ) -> None:
+        """Run the candidate implementation of a protocol in shadow mode, if there is one.
+
+        With background programming, the shadow run happens in the background, and is skipped
+        if another shadow run of the protocol is in progress.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task that was performed.
+            task_data (dict): The data of the task.
+            target (str): The target of the task.
+            protocol (Optional[Protocol]): The protocol used by the querier, if any.
+            sources (List[str]): The sources of the protocol.
+            expected_output (Any): The output of the querier.
+        """
+        if (
+            self.shadow_validation_runs <= 0
+            or protocol is None
+            or self.memory.get_candidate_implementation(protocol.hash) is None
+        ):
+            return
+
+        if self.background_programming:
+            if not self.background_runner.is_running(("shadow", protocol.hash)):
+                self.background_runner.submit(
+                    ("shadow", protocol.hash),
+                    self._run_shadow,
+                    task_schema,
+                    task_data,
+                    target,
+                    protocol,
+                    sources,
+                    expected_output,
+                )
+        else:
+            self._run_shadow(
+                task_schema, task_data, target, protocol, sources, expected_output
+            )
+
+    def _run_shadow(
+        self,
+        task_schema: TaskSchemaLike,
+        task_data: dict,
+        target: str,
+        protocol: Protocol,
+        sources: List[str],
+        expected_output: Any,
+    ) -> None:
+        """Compare the output of the candidate implementation of a protocol with the output of the querier.
+
+        The candidate is promoted once it has run `shadow_validation_runs` times with enough agreements,
+        and rejected as soon as it cannot reach `shadow_min_agreement` anymore.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task that was performed.
+            task_data (dict): The data of the task.
+            target (str): The target of the task.
+            protocol (Protocol): The protocol used by the querier.
+            sources (List[str]): The sources of the protocol.
+            expected_output (Any): The output of the querier.
+        """
+        candidate = self.memory.get_candidate_implementation(protocol.hash)
+        if candidate is None:
+            return
+
+        task_schema = TaskSchema.from_taskschemalike(task_schema)
+
+        with self.transporter.new_conversation(
+            target,
+            protocol.metadata.get("multiround", True),
+            protocol.hash,
+            sources,
+        ) as external_conversation:
+
+            def send_query(query):
+                return self._send_message(target, external_conversation, query)
+
+            try:
+                output = self._run_routine(
+                    protocol.hash, candidate, task_data, send_query
+                )
+            except (CircuitOpenError, DeadlineExceededError):
+                # Not caused by the candidate
+                return
+            except Exception:
+                agreed = False
+            else:
+                agreed = outputs_agree(
+                    output, expected_output, task_schema.output_schema
+                )
+
+        with self.memory.implementation_lock(protocol.hash):
+            if (
+                not self.memory.is_known(protocol.hash)
+                or self.memory.get_candidate_implementation(protocol.hash) != candidate
+            ):
+                # Removed or replaced in the meantime
+                return
+
+            stats = self.memory.record_shadow_run(protocol.hash, agreed)
+            disagreements = stats["runs"] - stats["agreements"]
+
+            if disagreements > self.shadow_validation_runs * (
+                1 - self.shadow_min_agreement
+            ):
+                self.memory.reject_candidate_implementation(protocol.hash)
+            elif stats["runs"] >= self.shadow_validation_runs:
+                self.memory.promote_candidate_implementation(protocol.hash)
+
     def _run_routine(self, protocol_id: str, implementation: str, task_data, callback):
         """Run the routine associated with a protocol using the provided implementation and task data.
 
@@ -264,40 +823,45 @@ class Sender:
 
         send_query_tool = Tool.from_function(send_to_server)  # TODO: Handle errors
 
+        check_deadline()
         return self.executor(
             protocol_id, implementation, [send_query_tool], [task_data], {}
         )
 
-    def execute_task(
+    def _prepare_task(
         self,
         task_id: str,
         task_schema: TaskSchemaLike,
-        task_data: dict,
         target: str,
         force_no_protocol: bool = False,
         force_llm: bool = False,
-    ) -> Any:
-        """Execute a task by selecting and running an appropriate protocol or falling back to querying.
+    ) -> Tuple[Optional[Protocol], List[str], Optional[str]]:
+        """Update the statistics of a task and find the protocol and implementation to use.
+
+        This might pick, negotiate or program a protocol, which requires calling the LLM.
 
         Args:
             task_id (str): The identifier of the task.
             task_schema (TaskSchemaLike): The schema of the task to be performed.
-            task_data: The data required for the task.
             target (str): The target for which the task is being executed.
             force_no_protocol (bool, optional): If True, forces execution without a protocol. Defaults to False.
             force_llm (bool, optional): If True, forces execution using a language model. Defaults to False.
 
         Returns:
-            Any: The result of the task execution.
+            Tuple[Optional[Protocol], List[str], Optional[str]]: The protocol (if any), its sources and its implementation (if any).
         """
+        self.memory.refresh()
         self.memory.increment_task_conversations(task_id, target)
 
         if force_no_protocol:
             protocol = None
         else:
-            protocol = self._get_suitable_protocol(task_id, task_schema, target)
+            # Concurrent tasks for the same target wait instead of negotiating twice
+            with self.memory.task_lock(task_id, target):
+                protocol = self._get_suitable_protocol(task_id, task_schema, target)
 
         sources = []
+        implementation = None
 
         if protocol is not None:
             self.memory.increment_protocol_conversations(protocol.hash)
@@ -307,6 +871,33 @@ class Sender:
                 # If there are no sources, use a data URI as source
                 sources = [encode_as_data_uri(protocol.protocol_document)]
 
+            if not force_llm:
+                implementation = self._get_implementation(protocol.hash, task_schema)
+
+        return protocol, sources, implementation
+
+    def _run_task(
+        self,
+        task_schema: TaskSchemaLike,
+        task_data: dict,
+        target: str,
+        protocol: Optional[Protocol],
+        sources: List[str],
+        implementation: Optional[str],
+    ) -> Any:
+        """Run a task with a protocol and implementation found by `_prepare_task`.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data: The data required for the task.
+            target (str): The target for which the task is being executed.
+            protocol (Optional[Protocol]): The protocol to use, if any.
+            sources (List[str]): The sources of the protocol.
+            implementation (Optional[str]): The implementation of the protocol, if any.
+
+        Returns:
+            Any: The result of the task execution.
+        """
         with self.transporter.new_conversation(
             target,
             protocol.metadata.get("multiround", True) if protocol else True,
@@ -315,15 +906,10 @@ class Sender:
         ) as external_conversation:
 
             def send_query(query):
-                response = external_conversation(query)
+                response = self._send_message(target, external_conversation, query)
                 # print('Response to sender:', response)
                 return response
 
-            implementation = None
-
-            if protocol is not None and not force_llm:
-                implementation = self._get_implementation(protocol.hash, task_schema)
-
             if implementation is None:
                 response = self.querier(
                     task_schema,
@@ -333,8 +919,12 @@ class Sender:
                 )
             else:
                 try:
-                    response = self._run_routine(
-                        protocol.hash, implementation, task_data, send_query
+                    response = self._run_implementation(
+                        task_schema,
+                        protocol.hash,
+                        implementation,
+                        task_data,
+                        send_query,
                     )
                 except ExecutionError as e:
                     # print('Error running routine:', e)
@@ -347,7 +937,673 @@ class Sender:
                         send_query,
                     )
 
-            return response
+        if implementation is None:
+            self._validate_candidate(
+                task_schema, task_data, target, protocol, sources, response
+            )
+
+        return response
+
+    async def _run_task_async(
+        self,
+        task_schema: TaskSchemaLike,
+        task_data: dict,
+        target: str,
+        protocol: Optional[Protocol],
+        sources: List[str],
+        implementation: Optional[str],
+    ) -> Any:
+        """Asynchronous version of `_run_task`.
+
+        Args:
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data: The data required for the task.
+            target (str): The target for which the task is being executed.
+            protocol (Optional[Protocol]): The protocol to use, if any.
+            sources (List[str]): The sources of the protocol.
+            implementation (Optional[str]): The implementation of the protocol, if any.
+
+        Returns:
+            Any: The result of the task execution.
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self.transporter.new_conversation(
+            target,
+            protocol.metadata.get("multiround", True) if protocol else True,
+            protocol.hash if protocol else None,
+            sources,
+        ) as external_conversation:
+
+            def send_to_target(query):
+                # Called from a worker thread, the message is sent by the event loop
+                return asyncio.run_coroutine_threadsafe(
+                    external_conversation.acall(query), loop
+                ).result()
+
+            def send_query(query):
+                return self._send_message(target, send_to_target, query)
+
+            # The querier and the routines call send_query synchronously, so they run in worker threads
+            # to leave the event loop free to send the messages
+            if implementation is None:
+                response = await asyncio.to_thread(
+                    self.querier,
+                    task_schema,
+                    task_data,
+                    protocol.protocol_document if protocol else None,
+                    send_query,
+                )
+            else:
+                try:
+                    response = await asyncio.to_thread(
+                        self._run_implementation,
+                        task_schema,
+                        protocol.hash,
+                        implementation,
+                        task_data,
+                        send_query,
+                    )
+                except ExecutionError:
+                    response = await asyncio.to_thread(
+                        self.querier,
+                        task_schema,
+                        task_data,
+                        protocol.protocol_document if protocol else None,
+                        send_query,
+                    )
+
+        if implementation is None and self.shadow_validation_runs > 0:
+            await asyncio.to_thread(
+                self._validate_candidate,
+                task_schema,
+                task_data,
+                target,
+                protocol,
+                sources,
+                response,
+            )
+
+        return response
+
+    def _get_cached_result(
+        self, task_id: str, target: str, task_data: dict
+    ) -> Tuple[Optional[Hashable], Any]:
+        """Look up the cached result of a task execution.
+
+        Args:
+            task_id (str): The identifier of the task.
+            target (str): The target for which the task is being executed.
+            task_data: The data required for the task.
+
+        Returns:
+            Tuple[Optional[Hashable], Any]: The cache key (None if the task has no cache) and the cached result,
+                or a sentinel if there is none.
+        """
+        cache = self.result_caches.get(task_id)
+        if cache is None:
+            return None, _MISSING
+
+        key = ResultCache.make_key(task_id, target, task_data)
+        return key, cache.get(key, _MISSING)
+
+    def _cache_result(
+        self, task_id: str, cache_key: Optional[Hashable], result: Any
+    ) -> None:
+        """Store the result of a task execution, if the task has a cache.
+
+        Args:
+            task_id (str): The identifier of the task.
+            cache_key (Optional[Hashable]): The key returned by `_get_cached_result`.
+            result (Any): The result of the task execution.
+        """
+        if cache_key is not None:
+            self.result_caches[task_id].put(cache_key, result)
+
+    def _get_flight_key(
+        self,
+        task_id: str,
+        target: str,
+        task_data: dict,
+        force_no_protocol: bool,
+        force_llm: bool,
+    ) -> Hashable:
+        """Build the key identifying identical task executions, which are coalesced.
+
+        Args:
+            task_id (str): The identifier of the task.
+            target (str): The target for which the task is being executed.
+            task_data: The data required for the task.
+            force_no_protocol (bool): Whether execution without a protocol is forced.
+            force_llm (bool): Whether execution using a language model is forced.
+
+        Returns:
+            Hashable: The key.
+        """
+        return ResultCache.make_key(task_id, target, task_data) + (
+            force_no_protocol,
+            force_llm,
+        )
+
+    def execute_task(
+        self,
+        task_id: str,
+        task_schema: TaskSchemaLike,
+        task_data: dict,
+        target: str,
+        force_no_protocol: bool = False,
+        force_llm: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Execute a task by selecting and running an appropriate protocol or falling back to querying.
+
+        Args:
+            task_id (str): The identifier of the task.
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data: The data required for the task.
+            target (str): The target for which the task is being executed.
+            force_no_protocol (bool, optional): If True, forces execution without a protocol. Defaults to False.
+            force_llm (bool, optional): If True, forces execution using a language model. Defaults to False.
+            timeout (Optional[float], optional): Seconds after which the execution is abandoned. The deadline is checked
+                between the steps of the querier, by the routines and by the transporter. Defaults to None (no deadline).
+
+        Returns:
+            Any: The result of the task execution.
+
+        Raises:
+            DeadlineExceededError: If the deadline expires.
+            CircuitOpenError: If the circuit breaker blocks the target.
+        """
+        cache_key, result = self._get_cached_result(task_id, target, task_data)
+        if result is not _MISSING:
+            return result
+
+        def execute():
+            with self._guard_target(target):
+                protocol, sources, implementation = self._prepare_task(
+                    task_id, task_schema, target, force_no_protocol, force_llm
+                )
+
+                result = self._run_task(
+                    task_schema, task_data, target, protocol, sources, implementation
+                )
+            self._cache_result(task_id, cache_key, result)
+
+            return result
+
+        with deadline(timeout):
+            single_flight = self.single_flights.get(task_id)
+            if single_flight is None:
+                return execute()
+
+            return single_flight.do(
+                self._get_flight_key(
+                    task_id, target, task_data, force_no_protocol, force_llm
+                ),
+                execute,
+            )
+
+    async def execute_task_async(
+        self,
+        task_id: str,
+        task_schema: TaskSchemaLike,
+        task_data: dict,
+        target: str,
+        force_no_protocol: bool = False,
+        force_llm: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Asynchronous version of `execute_task`.
+
+        Messages to the target are sent by the event loop through the asynchronous interface of the transporter.
+        Synchronous work (the querier and its LLM calls, routines and memory updates) runs in worker threads,
+        so the event loop is never blocked by a message.
+
+        Args:
+            task_id (str): The identifier of the task.
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data: The data required for the task.
+            target (str): The target for which the task is being executed.
+            force_no_protocol (bool, optional): If True, forces execution without a protocol. Defaults to False.
+            force_llm (bool, optional): If True, forces execution using a language model. Defaults to False.
+            timeout (Optional[float], optional): Seconds after which the execution is abandoned. The deadline is checked
+                between the steps of the querier, by the routines and by the transporter. Defaults to None (no deadline).
+
+        Returns:
+            Any: The result of the task execution.
+
+        Raises:
+            DeadlineExceededError: If the deadline expires.
+            CircuitOpenError: If the circuit breaker blocks the target.
+        """
+        cache_key, result = self._get_cached_result(task_id, target, task_data)
+        if result is not _MISSING:
+            return result
+
+        async def execute():
+            with self._guard_target(target):
+                prepared = await asyncio.to_thread(
+                    self._prepare_task,
+                    task_id,
+                    task_schema,
+                    target,
+                    force_no_protocol,
+                    force_llm,
+                )
+                result = await self._run_task_async(
+                    task_schema, task_data, target, *prepared
+                )
+            self._cache_result(task_id, cache_key, result)
+
+            return result
+
+        with deadline(timeout):
+            single_flight = self.single_flights.get(task_id)
+            if single_flight is None:
+                return await execute()
+
+            return await single_flight.ado(
+                self._get_flight_key(
+                    task_id, target, task_data, force_no_protocol, force_llm
+                ),
+                execute,
+            )
+
+    def _count_repeated_execution(
+        self, task_id: str, target: str, protocol: Optional[Protocol]
+    ) -> None:
+        """Count an execution that reuses the protocol found for a previous one, as if it had been prepared on its own.
+
+        Args:
+            task_id (str): The identifier of the task.
+            target (str): The target for which the task is being executed.
+            protocol (Optional[Protocol]): The protocol used, if any.
+        """
+        self.memory.increment_task_conversations(task_id, target)
+        if protocol is not None:
+            self.memory.increment_protocol_conversations(protocol.hash)
+
+    def execute_many(
+        self,
+        task_id: str,
+        task_schema: TaskSchemaLike,
+        task_data_list: Iterable[dict],
+        target: str,
+        concurrency: int = 8,
+        ordered: bool = True,
+        force_no_protocol: bool = False,
+        force_llm: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Any]:
+        """Execute a task for many inputs concurrently, streaming the results.
+
+        The protocol and implementation are found once, before running the first input, and are
+        used for all of them. The conversation counters are still incremented for every input,
+        except for the inputs whose result is cached.
+        Inputs are consumed lazily, so that at most `concurrency` of them are being executed or
+        waiting to be yielded at any time. Like `execute_task`, every execution goes through the
+        circuit breaker and has its own deadline.
+
+        Args:
+            task_id (str): The identifier of the task.
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data_list (Iterable[dict]): The data of each execution of the task.
+            target (str): The target for which the task is being executed.
+            concurrency (int, optional): Maximum number of concurrent executions. Defaults to 8.
+            ordered (bool, optional): If True, results are yielded in the order of the inputs. Otherwise, they are
+                yielded as they complete, as (index, result) pairs where index is the position of the input. Defaults to True.
+            force_no_protocol (bool, optional): If True, forces execution without a protocol. Defaults to False.
+            force_llm (bool, optional): If True, forces execution using a language model. Defaults to False.
+            timeout (Optional[float], optional): Seconds after which each execution is abandoned (see `execute_task`).
+                The protocol is found within the deadline of the first execution. Defaults to None (no deadline).
+
+        Yields:
+            Any: The result of each execution, or an (index, result) pair if `ordered` is False.
+
+        Raises:
+            ValueError: If `concurrency` is smaller than 1.
+            DeadlineExceededError: If the deadline of an execution expires.
+            CircuitOpenError: If the circuit breaker blocks the target.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        prepared = None
+
+        single_flight = self.single_flights.get(task_id)
+
+        def run(task_data, cache_key):
+            def execute():
+                with self._guard_target(target):
+                    result = self._run_task(task_schema, task_data, target, *prepared)
+                self._cache_result(task_id, cache_key, result)
+                return result
+
+            with deadline(timeout):
+                if single_flight is None:
+                    return execute()
+
+                return single_flight.do(
+                    self._get_flight_key(
+                        task_id, target, task_data, force_no_protocol, force_llm
+                    ),
+                    execute,
+                )
+
+        def submit(executor, index, task_data):
+            nonlocal prepared
+
+            cache_key, result = self._get_cached_result(task_id, target, task_data)
+            if result is not _MISSING:
+                future = Future()
+                future.set_result(result)
+                return future
+
+            if prepared is None:
+                with deadline(timeout), self._guard_target(target):
+                    prepared = self._prepare_task(
+                        task_id, task_schema, target, force_no_protocol, force_llm
+                    )
+            else:
+                self._count_repeated_execution(task_id, target, prepared[0])
+
+            # The executions share the deadline of the caller, if any
+            return executor.submit(
+                contextvars.copy_context().run, run, task_data, cache_key
+            )
+
+        task_data_iterator = enumerate(task_data_list)
+
+        executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="agora-execute-many"
+        )
+        try:
+            # Maps the futures to the indexes of their inputs, in submission order
+            pending = {
+                submit(executor, index, task_data): index
+                for index, task_data in itertools.islice(
+                    task_data_iterator, concurrency
+                )
+            }
+
+            while pending:
+                if ordered:
+                    future = next(iter(pending))
+                    pending.pop(future)
+                    result = future.result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = min(done, key=pending.__getitem__)
+                    result = (pending.pop(future), future.result())
+
+                # Keep `concurrency` executions in flight
+                for index, task_data in itertools.islice(task_data_iterator, 1):
+                    pending[submit(executor, index, task_data)] = index
+
+                yield result
+        finally:
+            # Stop early if the caller stops iterating or an execution fails
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def execute_many_async(
+        self,
+        task_id: str,
+        task_schema: TaskSchemaLike,
+        task_data_list: Iterable[dict],
+        target: str,
+        concurrency: int = 8,
+        ordered: bool = True,
+        force_no_protocol: bool = False,
+        force_llm: bool = False,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Any]:
+        """Asynchronous version of `execute_many`, which runs the executions like `execute_task_async`.
+
+        Args:
+            task_id (str): The identifier of the task.
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data_list (Iterable[dict]): The data of each execution of the task.
+            target (str): The target for which the task is being executed.
+            concurrency (int, optional): Maximum number of concurrent executions. Defaults to 8.
+            ordered (bool, optional): If True, results are yielded in the order of the inputs. Otherwise, they are
+                yielded as they complete, as (index, result) pairs where index is the position of the input. Defaults to True.
+            force_no_protocol (bool, optional): If True, forces execution without a protocol. Defaults to False.
+            force_llm (bool, optional): If True, forces execution using a language model. Defaults to False.
+            timeout (Optional[float], optional): Seconds after which each execution is abandoned (see `execute_task`).
+                The protocol is found within the deadline of the first execution. Defaults to None (no deadline).
+
+        Yields:
+            Any: The result of each execution, or an (index, result) pair if `ordered` is False.
+
+        Raises:
+            ValueError: If `concurrency` is smaller than 1.
+            DeadlineExceededError: If the deadline of an execution expires.
+            CircuitOpenError: If the circuit breaker blocks the target.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        prepared = None
+
+        single_flight = self.single_flights.get(task_id)
+
+        async def run(task_data, cache_key):
+            async def execute():
+                with self._guard_target(target):
+                    result = await self._run_task_async(
+                        task_schema, task_data, target, *prepared
+                    )
+                self._cache_result(task_id, cache_key, result)
+                return result
+
+            with deadline(timeout):
+                if single_flight is None:
+                    return await execute()
+
+                return await single_flight.ado(
+                    self._get_flight_key(
+                        task_id, target, task_data, force_no_protocol, force_llm
+                    ),
+                    execute,
+                )
+
+        async def submit(task_data):
+            nonlocal prepared
+
+            cache_key, result = self._get_cached_result(task_id, target, task_data)
+            if result is not _MISSING:
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(result)
+                return future
+
+            if prepared is None:
+                with deadline(timeout), self._guard_target(target):
+                    prepared = await asyncio.to_thread(
+                        self._prepare_task,
+                        task_id,
+                        task_schema,
+                        target,
+                        force_no_protocol,
+                        force_llm,
+                    )
+            else:
+                await asyncio.to_thread(
+                    self._count_repeated_execution, task_id, target, prepared[0]
+                )
+
+            # Tasks copy the context, so the executions share the deadline of the caller, if any
+            return asyncio.create_task(run(task_data, cache_key))
+
+        task_data_iterator = enumerate(task_data_list)
+
+        # Maps the futures to the indexes of their inputs, in submission order
+        pending = {}
+        try:
+            for index, task_data in itertools.islice(task_data_iterator, concurrency):
+                pending[await submit(task_data)] = index
+
+            while pending:
+                if ordered:
+                    future = next(iter(pending))
+                    pending.pop(future)
+                    result = await future
+                else:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    future = min(done, key=pending.__getitem__)
+                    result = (pending.pop(future), future.result())
+
+                # Keep `concurrency` executions in flight
+                for index, task_data in itertools.islice(task_data_iterator, 1):
+                    pending[await submit(task_data)] = index
+
+                yield result
+        finally:
+            # Stop early if the caller stops iterating or an execution fails
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def scatter_task(
+        self,
+        task_id: str,
+        task_schema: TaskSchemaLike,
+        task_data: dict,
+        targets: List[str],
+        policy: CompletionPolicy = CompletionPolicy.ALL,
+        n: Optional[int] = None,
+        timeout: Optional[Union[float, Dict[str, float]]] = None,
+        max_workers: Optional[int] = None,
+        force_no_protocol: bool = False,
+        force_llm: bool = False,
+    ) -> ScatterResult:
+        """Execute a task against several targets in parallel and gather the results.
+
+        Each target is handled by `execute_task`, so it uses its own protocols and implementations.
+        Targets that fail or time out are reported in the errors of the result instead of raising.
+        Once the policy is settled, the execution returns without waiting for the other targets,
+        whose executions are left to finish in the background and whose results are discarded.
+
+        Args:
+            task_id (str): The identifier of the task.
+            task_schema (TaskSchemaLike): The schema of the task to be performed.
+            task_data: The data required for the task.
+            targets (List[str]): The targets against which the task is executed. Duplicates are ignored.
+            policy (CompletionPolicy, optional): When the execution completes. Defaults to CompletionPolicy.ALL.
+            n (Optional[int], optional): The number of targets required by CompletionPolicy.FIRST_N (defaults to 1)
+                and CompletionPolicy.QUORUM (defaults to a majority of the targets). Ignored with CompletionPolicy.ALL.
+            timeout (Optional[Union[float, Dict[str, float]]], optional): Seconds after which a target that has not
+                responded is considered failed, measured from the start of its execution. Either one value for all
+                targets or a value per target. It is also the deadline of the execution of the target, which is
+                then abandoned. Defaults to None (no timeout).
+            max_workers (Optional[int], optional): Maximum number of targets handled at once. Defaults to None (all of them).
+            force_no_protocol (bool, optional): If True, forces execution without a protocol. Defaults to False.
+            force_llm (bool, optional): If True, forces execution using a language model. Defaults to False.
+
+        Returns:
+            ScatterResult: The results and errors of each target.
+
+        Raises:
+            ValueError: If `n` is not between 1 and the number of targets.
+        """
+        policy = CompletionPolicy(policy)
+        targets = list(dict.fromkeys(targets))
+
+        if policy == CompletionPolicy.ALL:
+            required = len(targets)
+        elif n is not None:
+            required = n
+        elif policy == CompletionPolicy.FIRST_N:
+            required = 1
+        else:
+            required = len(targets) // 2 + 1
+
+        if policy != CompletionPolicy.ALL and not 1 <= required <= len(targets):
+            raise ValueError(f"n must be between 1 and {len(targets)}, got {required}")
+
+        def get_timeout(target):
+            if isinstance(timeout, dict):
+                return timeout.get(target)
+            return timeout
+
+        result = ScatterResult(policy, required)
+        if len(targets) == 0:
+            return result
+
+        start_times = {}
+
+        def execute(target):
+            start_times[target] = time.monotonic()
+            return self.execute_task(
+                task_id,
+                task_schema,
+                task_data,
+                target,
+                force_no_protocol,
+                force_llm,
+                timeout=get_timeout(target),
+            )
+
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(targets),
+            thread_name_prefix="agora-scatter",
+        )
+        try:
+            future_targets = {
+                executor.submit(contextvars.copy_context().run, execute, target): target
+                for target in targets
+            }
+            pending = set(future_targets)
+
+            while not result.is_settled(len(pending)):
+                now = time.monotonic()
+
+                # Targets that have not started yet cannot time out before `timeout` seconds
+                deadlines = [
+                    start_times.get(target, now) + get_timeout(target)
+                    for future, target in future_targets.items()
+                    if future in pending and get_timeout(target) is not None
+                ]
+                wait_timeout = max(min(deadlines) - now, 0) if deadlines else None
+
+                done, pending = wait(
+                    pending, timeout=wait_timeout, return_when=FIRST_COMPLETED
+                )
+
+                for future in done:
+                    target = future_targets[future]
+                    if future.exception() is None:
+                        result.add_result(target, future.result())
+                    else:
+                        result.add_error(target, future.exception())
+
+                now = time.monotonic()
+                for future in list(pending):
+                    target = future_targets[future]
+                    target_timeout = get_timeout(target)
+
+                    if (
+                        target_timeout is not None
+                        and target in start_times
+                        and now - start_times[target] >= target_timeout
+                    ):
+                        pending.discard(future)
+                        result.add_error(
+                            target,
+                            TimeoutError(
+                                f"Target {target} did not respond within {target_timeout} seconds"
+                            ),
+                        )
+
+            result.pending = [
+                target for future, target in future_targets.items() if future in pending
+            ]
+        finally:
+            # Targets that are not needed anymore are not waited for
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return result
 
     def task(
         self,
@@ -356,15 +1612,35 @@ class Sender:
         input_schema: Optional[dict] = None,
         output_schema: Optional[dict] = None,
         schema_generator: Optional[TaskSchemaGenerator] = None,
+        cache_ttl: Optional[float] = None,
+        cache_size: int = 1024,
+        cache_policy: str = "lru",
+        coalesce: bool = False,
+        timeout: Optional[float] = None,
     ):
         """Decorator to define a task with optional schemas and description.
 
+        Decorating an `async def` function produces a coroutine function, which runs the task with `execute_task_async`.
+        The decorated function has a `map` method that, like the built-in `map`, runs the task for every set of
+        positional arguments taken from its iterables, with `execute_many` (e.g. `func.map(xs, ys, target=url)`)
+        or, for coroutine functions, with `execute_many_async` (e.g. `async for y in func.map(xs, target=url)`),
+        and a `scatter` method that runs the task against several targets with `scatter_task`, whose other options
+        are passed as a dictionary (e.g. `func.scatter(x, targets=[url_1, url_2], scatter_options={"policy": CompletionPolicy.QUORUM})`).
+
         Args:
             task_id (str, optional): The identifier of the task. Defaults to None.
             description (str, optional): A brief description of the task. Defaults to None.
             input_schema (dict, optional): The input schema for the task. Defaults to None.
             output_schema (dict, optional): The output schema for the task. Defaults to None.
             schema_generator (TaskSchemaGenerator, optional): A generator to fill in missing schema fields. Defaults to None.
+            cache_ttl (Optional[float], optional): If set, results are cached for this many seconds, keyed by target and
+                task data, and cache hits do not contact the target. Only use it for idempotent tasks. Defaults to None (no cache).
+            cache_size (int, optional): Maximum number of cached results. Defaults to 1024.
+            cache_policy (str, optional): How cached results are evicted when the cache is full, "lru" or "lfu". Defaults to "lru".
+            coalesce (bool, optional): If True, concurrent calls with the same target and task data share a single execution,
+                and all of them receive its result or exception. The number of coalesced calls is counted by the
+                `collapsed` attribute of `sender.single_flights[task_id]`. Defaults to False.
+            timeout (Optional[float], optional): Deadline in seconds of each call of the decorated function. Defaults to None (no deadline).
 
         Returns:
             Callable: The decorated function.
@@ -376,6 +1652,14 @@ class Sender:
             if task_id is None:
                 task_id = func.__name__
 
+            if cache_ttl is not None:
+                self.result_caches[task_id] = ResultCache(
+                    cache_ttl, cache_size, cache_policy
+                )
+
+            if coalesce:
+                self.single_flights[task_id] = SingleFlight()
+
             try:
                 task_schema = TaskSchema.from_function(
                     func,
@@ -389,19 +1673,41 @@ class Sender:
 
                 task_schema = schema_generator.from_function(func)
 
-            def wrapped(*args, target=None, **kwargs):
+            def get_task_data(*args, **kwargs):
                 # Figure out from the function signature what the input data should be
                 signature = inspect.signature(func)
                 task_data = signature.bind(*args, **kwargs)
                 task_data.apply_defaults()
-                task_data = task_data.arguments
+                return task_data.arguments
+
+            if inspect.iscoroutinefunction(func):
 
-                return self.execute_task(task_id, task_schema, task_data, target)
+                async def wrapped(*args, target=None, **kwargs):
+                    task_data = get_task_data(*args, **kwargs)
+                    return await self.execute_task_async(
+                        task_id, task_schema, task_data, target, timeout=timeout
+                    )
+
+            else:
+
+                def wrapped(*args, target=None, **kwargs):
+                    task_data = get_task_data(*args, **kwargs)
+                    return self.execute_task(
+                        task_id, task_schema, task_data, target, timeout=timeout
+                    )
 
             if "target" in task_schema.input_schema["required"]:
                 raise ValueError("The task schema should not require a target field")
 
-            tool_input_schema = dict(task_schema.input_schema)
+            # Protocols already checked for the same schema (e.g. under another task ID) are classified right away
+            self._apply_cached_verdicts(
+                task_id,
+                task_schema.fingerprint(),
+                self.memory.get_unclassified_protocols(task_id),
+            )
+
+            # Deep copy, so that the target is not added to the task schema
+            tool_input_schema = copy.deepcopy(task_schema.input_schema)
             tool_input_schema["properties"]["target"] = {
                 "type": "string",
                 "description": "The URL of the target system or service for the task",
@@ -415,6 +1721,35 @@ class Sender:
                 wrapped,
             )
 
-            return tool.as_annotated_function()
+            def map_task(*iterables, target=None, concurrency=8, ordered=True):
+                # Like the built-in map, each iterable provides one positional argument
+                task_data_list = (get_task_data(*args) for args in zip(*iterables))
+                execute_many = (
+                    self.execute_many_async
+                    if inspect.iscoroutinefunction(func)
+                    else self.execute_many
+                )
+                return execute_many(
+                    task_id,
+                    task_schema,
+                    task_data_list,
+                    target,
+                    concurrency=concurrency,
+                    ordered=ordered,
+                    timeout=timeout,
+                )
+
+            def scatter_task(*args, targets, scatter_options=None, **kwargs):
+                # Options of scatter_task are grouped, so that they cannot collide with the task arguments
+                task_data = get_task_data(*args, **kwargs)
+                return self.scatter_task(
+                    task_id, task_schema, task_data, targets, **(scatter_options or {})
+                )
+
+            annotated_function = tool.as_annotated_function()
+            annotated_function.map = map_task
+            annotated_function.scatter = scatter_task
+
+            return annotated_function
 
         return wrapper
@@ -1,9 +1,13 @@
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 from agora.common.core import Protocol, Suitability
 from agora.common.errors import StorageError
+from agora.common.eviction import EvictionPolicy
+from agora.common.locking import KeyedLock
 from agora.common.memory import ProtocolMemory
-from agora.common.storage import Storage
+from agora.common.storage import BlobStore, Storage
 
 
 class SenderMemory(ProtocolMemory):
@@ -11,14 +15,126 @@ class SenderMemory(ProtocolMemory):
     Manages the memory for the Sender, including protocol suitability and task conversations.
     """
 
-    def __init__(self, storage: Storage):
+    def __init__(
+        self,
+        storage: Storage,
+        counter_flush_every: int = 10,
+        blob_store: Optional[BlobStore] = None,
+        cache_size: int = 128,
+        eviction_policy: Optional[EvictionPolicy] = None,
+        eviction_interval: Optional[float] = None,
+    ):
         """
         Initializes SenderMemory with a storage backend.
 
         Args:
             storage (Storage): The storage backend for memory.
+            counter_flush_every (int, optional): Number of conversation counter increments after which counters are written. Defaults to 10.
+            blob_store (Optional[BlobStore], optional): The store for protocol documents and implementations. Defaults to None (stored inline).
+            cache_size (int, optional): Maximum number of protocols, documents and implementations kept in memory. Defaults to 128.
+            eviction_policy (Optional[EvictionPolicy], optional): The policy used to evict protocols. Defaults to None.
+            eviction_interval (Optional[float], optional): Seconds between background evictions. Defaults to None (no background eviction).
+        """
+        self._task_locks = KeyedLock()
+        # Guards the suitability index. Taken after the storage transaction lock, never before it
+        self._index_lock = threading.RLock()
+
+        super().__init__(
+            storage,
+            counter_flush_every,
+            blob_store,
+            cache_size,
+            eviction_policy,
+            num_conversations={},
+        )
+        self._rebuild_indexes()
+
+        # Started once the indexes are built
+        if eviction_interval is not None:
+            self.start_eviction(eviction_interval)
+
+    def _rebuild_indexes(self) -> None:
+        """
+        Rebuilds the suitability index from the storage.
+
+        The index maps each task to the protocols that are adequate by default and to the
+        protocols that have been classified, and each (task, target) pair to its overrides.
+        Lookups of suitable and unclassified protocols are derived from it and cached.
+        """
+        super()._rebuild_indexes()
+
+        with self._index_lock:
+            self._protocol_order: Dict[str, int] = {}
+            self._next_protocol_order = 0
+            self._adequate_by_default: Dict[str, Set[str]] = {}
+            self._classified: Dict[str, Set[str]] = {}
+            self._overrides: Dict[Tuple[str, str], Dict[str, Suitability]] = {}
+
+            self._suitable_index: Dict[Tuple[str, Optional[str]], List[str]] = {}
+            self._unclassified_index: Dict[str, Dict[str, None]] = {}
+
+            for protocol_id in self.protocol_ids():
+                self._protocol_order[protocol_id] = self._next_protocol_order
+                self._next_protocol_order += 1
+
+                suitability_info = self.get_extra_field(protocol_id, "suitability", {})
+                for task_id, task_suitability in suitability_info.items():
+                    self._index_default_suitability(
+                        protocol_id, task_id, task_suitability["default"]
+                    )
+                    for target, suitability in task_suitability["overrides"].items():
+                        self._overrides.setdefault((task_id, target), {})[
+                            protocol_id
+                        ] = suitability
+
+    @contextmanager
+    def task_lock(self, task_id: str, target: Optional[str]) -> Iterator[None]:
         """
-        super().__init__(storage, num_conversations={})
+        Holds a lock specific to a task and target, e.g. to avoid negotiating two protocols for them at once.
+
+        The lock is only shared by the threads of this process.
+
+        Args:
+            task_id (str): The task identifier.
+            target (Optional[str]): The target system or service.
+
+        Yields:
+            None
+        """
+        with self._task_locks((task_id, target)):
+            yield
+
+    def _index_default_suitability(
+        self, protocol_id: str, task_id: str, suitability: Suitability
+    ) -> None:
+        """
+        Updates the index after a change of the default suitability of a protocol.
+
+        Args:
+            protocol_id (str): The protocol identifier.
+            task_id (str): The task identifier.
+            suitability (Suitability): The new default suitability.
+        """
+        with self._index_lock:
+            adequate = self._adequate_by_default.setdefault(task_id, set())
+            classified = self._classified.setdefault(task_id, set())
+
+            if suitability == Suitability.ADEQUATE:
+                adequate.add(protocol_id)
+            else:
+                adequate.discard(protocol_id)
+
+            if suitability == Suitability.UNKNOWN:
+                classified.discard(protocol_id)
+                # Rebuilt on the next lookup, to preserve the registration order
+                self._unclassified_index.pop(task_id, None)
+            else:
+                classified.add(protocol_id)
+                if task_id in self._unclassified_index:
+                    self._unclassified_index[task_id].pop(protocol_id, None)
+
+            for key in [key for key in self._suitable_index if key[0] == task_id]:
+                del self._suitable_index[key]
 
     def get_suitability(
         self, protocol_id: str, task_id: str, target: Optional[str]
@@ -55,15 +171,27 @@ class SenderMemory(ProtocolMemory):
         Returns:
             list: A list of known suitable protocol IDs.
         """
-        suitable_protocols = []
-        for protocol_id in self.protocol_ids():
-            if (
-                self.get_suitability(protocol_id, task_id, target)
-                == Suitability.ADEQUATE
-            ):
-                suitable_protocols.append(protocol_id)
+        with self._index_lock:
+            key = (task_id, target)
+
+            if key not in self._suitable_index:
+                overrides = self._overrides.get(key, {}) if target is not None else {}
 
-        return suitable_protocols
+                suitable_protocols = [
+                    protocol_id
+                    for protocol_id in self._adequate_by_default.get(task_id, set())
+                    if protocol_id not in overrides
+                ]
+                suitable_protocols += [
+                    protocol_id
+                    for protocol_id, suitability in overrides.items()
+                    if suitability == Suitability.ADEQUATE
+                ]
+                suitable_protocols.sort(key=self._protocol_order.__getitem__)
+
+                self._suitable_index[key] = suitable_protocols
+
+            return list(self._suitable_index[key])
 
     def get_suitable_protocol(self, task_id, target) -> Optional[Protocol]:
         """
@@ -89,15 +217,7 @@ class SenderMemory(ProtocolMemory):
             task_id: The task identifier.
             target: The target system or service.
         """
-        if "num_conversations" not in self.storage:
-            self.storage["num_conversations"] = {}
-        if task_id not in self.storage["num_conversations"]:
-            self.storage["num_conversations"][task_id] = {}
-        if target not in self.storage["num_conversations"][task_id]:
-            self.storage["num_conversations"][task_id][target] = 0
-        self.storage["num_conversations"][task_id][target] += 1
-
-        self.storage.save_memory()
+        self._increment_counter(("num_conversations", task_id, target))
 
     def get_task_conversations(self, task_id, target):
         """
@@ -110,35 +230,7 @@ class SenderMemory(ProtocolMemory):
         Returns:
             int: The number of conversations.
         """
-        if "num_conversations" not in self.storage:
-            return 0
-        if task_id not in self.storage["num_conversations"]:
-            return 0
-        if target not in self.storage["num_conversations"][task_id]:
-            return 0
-        return self.storage["num_conversations"][task_id][target]
-
-    def increment_protocol_conversations(self, protocol_id):
-        """
-        Increments the conversation counter for a given protocol.
-
-        Args:
-            protocol_id: The protocol identifier.
-        """
-        num_conversations = self.get_protocol_conversations(protocol_id)
-        self.set_extra_field(protocol_id, "conversations", num_conversations + 1)
-
-    def get_protocol_conversations(self, protocol_id):
-        """
-        Retrieves the number of stored conversations for a protocol.
-
-        Args:
-            protocol_id: The protocol identifier.
-
-        Returns:
-            int: The number of conversations.
-        """
-        return self.get_extra_field(protocol_id, "conversations", 0)
+        return self._get_counter(("num_conversations", task_id, target))
 
     def has_suitable_protocol(self, task_id, target):
         """
@@ -162,12 +254,16 @@ class SenderMemory(ProtocolMemory):
         Returns:
             List[str]: A list of unclassified protocol IDs.
         """
-        unclassified_protocols = []
-        for protocol_id in self.protocol_ids():
-            if self.get_suitability(protocol_id, task_id, None) == Suitability.UNKNOWN:
-                unclassified_protocols.append(protocol_id)
+        with self._index_lock:
+            if task_id not in self._unclassified_index:
+                classified = self._classified.get(task_id, set())
+                self._unclassified_index[task_id] = {
+                    protocol_id: None
+                    for protocol_id in self.protocol_ids()
+                    if protocol_id not in classified
+                }
 
-        return unclassified_protocols
+            return list(self._unclassified_index[task_id])
 
     def set_default_suitability(
         self, protocol_id: str, task_id: str, suitability: Suitability
@@ -179,17 +275,20 @@ class SenderMemory(ProtocolMemory):
             task_id (str): The identifier of the task.
             suitability (Suitability): The default suitability status to set.
         """
-        suitability_info = self.get_extra_field(protocol_id, "suitability", {})
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
 
-        if task_id not in suitability_info:
-            suitability_info[task_id] = {
-                "default": Suitability.UNKNOWN,
-                "overrides": {},
-            }
+        path = ("protocols", protocol_id, "suitability", task_id)
 
-        suitability_info[task_id]["default"] = suitability
+        with self.transaction():
+            suitability_info = self.get_extra_field(protocol_id, "suitability", {})
 
-        self.set_extra_field(protocol_id, "suitability", suitability_info)
+            if task_id not in suitability_info:
+                self.storage.set_path(path, {"default": suitability, "overrides": {}})
+            else:
+                self.storage.set_path(path + ("default",), suitability)
+
+            self._index_default_suitability(protocol_id, task_id, suitability)
 
     def set_suitability_override(
         self, protocol_id: str, task_id: str, target: str, suitability: Suitability
@@ -202,16 +301,197 @@ class SenderMemory(ProtocolMemory):
             target (str): The target for which the suitability is overridden.
             suitability (Suitability): The overridden suitability status.
         """
-        suitability_info = self.get_extra_field(protocol_id, "suitability", {})
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
+
+        path = ("protocols", protocol_id, "suitability", task_id)
+
+        with self.transaction():
+            suitability_info = self.get_extra_field(protocol_id, "suitability", {})
+
+            if task_id not in suitability_info:
+                self.storage.set_path(
+                    path,
+                    {
+                        "default": Suitability.UNKNOWN,
+                        "overrides": {target: suitability},
+                    },
+                )
+            else:
+                self.storage.set_path(path + ("overrides", target), suitability)
+
+            with self._index_lock:
+                self._overrides.setdefault((task_id, target), {})[protocol_id] = (
+                    suitability
+                )
+                self._suitable_index.pop((task_id, target), None)
+
+    def get_verdict(
+        self, protocol_id: str, schema_fingerprint: str
+    ) -> Optional[Suitability]:
+        """Retrieve the verdict of the protocol checker for a protocol and a task schema.
+
+        Verdicts are keyed by the fingerprint of the task schema instead of the task ID, so they are
+        shared by all the tasks with the same schema, and by the processes sharing the storage.
 
-        if task_id not in suitability_info:
-            suitability_info[task_id] = {
-                "default": Suitability.UNKNOWN,
-                "overrides": {},
-            }
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            schema_fingerprint (str): The fingerprint of the task schema (see TaskSchema.fingerprint).
+
+        Returns:
+            Optional[Suitability]: The verdict, or None if the protocol was never checked for the schema.
+        """
+        verdict = self.get_extra_field(protocol_id, "verdicts", {}).get(
+            schema_fingerprint
+        )
+        return None if verdict is None else Suitability(verdict)
+
+    def set_verdict(
+        self, protocol_id: str, schema_fingerprint: str, suitability: Suitability
+    ) -> None:
+        """Store the verdict of the protocol checker for a protocol and a task schema.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            schema_fingerprint (str): The fingerprint of the task schema (see TaskSchema.fingerprint).
+            suitability (Suitability): The verdict.
+
+        Raises:
+            StorageError: If the protocol is not registered.
+        """
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
+
+        path = ("protocols", protocol_id, "verdicts")
+
+        with self.transaction():
+            if self.get_extra_field(protocol_id, "verdicts") is None:
+                self.storage.set_path(path, {schema_fingerprint: suitability})
+            else:
+                self.storage.set_path(path + (schema_fingerprint,), suitability)
+
+    def get_candidate_implementation(self, protocol_id: str) -> Optional[str]:
+        """Retrieve the implementation of a protocol that is being validated in shadow mode.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+
+        Returns:
+            Optional[str]: The candidate implementation, or None if there is none.
+        """
+        candidate = self.get_extra_field(protocol_id, "candidate_implementation")
+
+        if candidate is None:
+            return None
+        if candidate.get("ref") is not None:
+            return self._load_blob(candidate["ref"])
+        return candidate["code"]
+
+    def register_candidate_implementation(
+        self, protocol_id: str, implementation: str
+    ) -> None:
+        """Register an implementation to validate in shadow mode before it is used.
+
+        The shadow statistics of the protocol are reset.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            implementation (str): The candidate implementation.
+
+        Raises:
+            StorageError: If the protocol is not registered.
+        """
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
+
+        if self.blob_store is None:
+            candidate = {"code": implementation, "ref": None}
+        else:
+            candidate = {"code": None, "ref": self._store_blob(implementation)}
+
+        with self.transaction():
+            self.set_extra_field(protocol_id, "candidate_implementation", candidate)
+            stats = self.get_shadow_stats(protocol_id)
+            stats.update(runs=0, agreements=0)
+            self.set_extra_field(protocol_id, "shadow_stats", stats)
+
+    def get_shadow_stats(self, protocol_id: str) -> Dict[str, int]:
+        """Retrieve the shadow validation statistics of a protocol.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+
+        Returns:
+            Dict[str, int]: The number of shadow runs and agreements of the current candidate implementation,
+                and the number of candidates promoted and rejected so far.
+        """
+        stats = {"runs": 0, "agreements": 0, "promotions": 0, "rejections": 0}
+        stats.update(self.get_extra_field(protocol_id, "shadow_stats", {}))
+        return stats
+
+    def record_shadow_run(self, protocol_id: str, agreed: bool) -> Dict[str, int]:
+        """Record whether a shadow run of the candidate implementation agreed with the querier.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+            agreed (bool): Whether the outputs agreed.
+
+        Returns:
+            Dict[str, int]: The updated shadow statistics (see get_shadow_stats).
+
+        Raises:
+            StorageError: If the protocol is not registered.
+        """
+        if not self.is_known(protocol_id):
+            raise StorageError(f"Protocol {protocol_id} not in memory")
+
+        with self.transaction():
+            stats = self.get_shadow_stats(protocol_id)
+            stats["runs"] += 1
+            if agreed:
+                stats["agreements"] += 1
+            self.set_extra_field(protocol_id, "shadow_stats", stats)
+
+        return stats
+
+    def promote_candidate_implementation(self, protocol_id: str) -> Optional[str]:
+        """Register the candidate implementation of a protocol as its implementation.
 
-        suitability_info[task_id]["overrides"][target] = suitability
-        self.set_extra_field(protocol_id, "suitability", suitability_info)
+        Args:
+            protocol_id (str): The identifier of the protocol.
+
+        Returns:
+            Optional[str]: The promoted implementation, or None if there was no candidate.
+        """
+        with self.transaction():
+            implementation = self.get_candidate_implementation(protocol_id)
+            if implementation is None:
+                return None
+
+            self.register_implementation(protocol_id, implementation)
+            self.set_extra_field(protocol_id, "candidate_implementation", None)
+
+            stats = self.get_shadow_stats(protocol_id)
+            stats["promotions"] += 1
+            self.set_extra_field(protocol_id, "shadow_stats", stats)
+
+        return implementation
+
+    def reject_candidate_implementation(self, protocol_id: str) -> None:
+        """Discard the candidate implementation of a protocol, so that a new one can be written.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+        """
+        with self.transaction():
+            if self.get_extra_field(protocol_id, "candidate_implementation") is None:
+                return
+
+            self.set_extra_field(protocol_id, "candidate_implementation", None)
+
+            stats = self.get_shadow_stats(protocol_id)
+            stats["rejections"] += 1
+            self.set_extra_field(protocol_id, "shadow_stats", stats)
 
     def register_new_protocol(
         self, protocol_id: str, protocol_document: str, sources: list, metadata: dict
@@ -228,5 +508,71 @@ class SenderMemory(ProtocolMemory):
             raise StorageError("Protocol already in memory:", protocol_id)
 
         super().register_new_protocol(
-            protocol_id, protocol_document, sources, metadata, None, suitability={}
+            protocol_id,
+            protocol_document,
+            sources,
+            metadata,
+            None,
+            suitability={},
+            verdicts={},
         )
+
+        # A new protocol is unclassified for every task
+        with self._index_lock:
+            self._protocol_order[protocol_id] = self._next_protocol_order
+            self._next_protocol_order += 1
+            for unclassified_protocols in self._unclassified_index.values():
+                unclassified_protocols[protocol_id] = None
+
+    def is_pinned(self, protocol_id: str) -> bool:
+        """Check whether a protocol must never be evicted.
+
+        Protocols that have an implementation and are adequate for a task, either by default or
+        for a specific target (e.g. negotiated protocols), are pinned.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+
+        Returns:
+            bool: True if the protocol is pinned, False otherwise.
+        """
+        if not self.has_implementation(protocol_id):
+            return False
+
+        with self._index_lock:
+            return any(
+                protocol_id in adequate_protocols
+                for adequate_protocols in self._adequate_by_default.values()
+            ) or any(
+                overrides.get(protocol_id) == Suitability.ADEQUATE
+                for overrides in self._overrides.values()
+            )
+
+    def remove_protocol(self, protocol_id: str) -> None:
+        """Remove a protocol, along with its suitability information.
+
+        Args:
+            protocol_id (str): The identifier of the protocol.
+
+        Raises:
+            StorageError: If the protocol is not registered.
+        """
+        with self.transaction():
+            super().remove_protocol(protocol_id)
+
+            with self._index_lock:
+                self._protocol_order.pop(protocol_id, None)
+                for protocol_ids in self._adequate_by_default.values():
+                    protocol_ids.discard(protocol_id)
+                for protocol_ids in self._classified.values():
+                    protocol_ids.discard(protocol_id)
+                for overrides in self._overrides.values():
+                    overrides.pop(protocol_id, None)
+                for unclassified_protocols in self._unclassified_index.values():
+                    unclassified_protocols.pop(protocol_id, None)
+
+                self._suitable_index = {
+                    key: protocol_ids
+                    for key, protocol_ids in self._suitable_index.items()
+                    if protocol_id not in protocol_ids
+                }
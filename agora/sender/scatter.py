@@ -0,0 +1,149 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+
+class CompletionPolicy(str, Enum):
+    """
+    Enumeration of the conditions under which a scatter-gather execution completes.
+    """
+
+    # Wait for every target
+    ALL = "all"
+    # Wait for the first N successful targets
+    FIRST_N = "first_n"
+    # Wait for N targets returning the same result
+    QUORUM = "quorum"
+
+
+class ScatterResult:
+    """The outcome of executing a task against several targets.
+
+    Attributes:
+        policy (CompletionPolicy): The completion policy of the execution.
+        required (int): The number of targets required by the policy.
+        results (Dict[str, Any]): The results of the targets that succeeded, in completion order.
+        errors (Dict[str, Exception]): The errors of the targets that failed or timed out.
+        pending (List[str]): The targets that had not completed when the execution completed.
+    """
+
+    def __init__(self, policy: CompletionPolicy, required: int) -> None:
+        """Initializes the ScatterResult.
+
+        Args:
+            policy (CompletionPolicy): The completion policy of the execution.
+            required (int): The number of targets required by the policy.
+        """
+        self.policy = policy
+        self.required = required
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self.pending: List[str] = []
+        # Groups of targets that returned equal results, as [result, targets]
+        self._agreements: List[list] = []
+
+    def add_result(self, target: str, result: Any) -> None:
+        """Records the result of a target.
+
+        Args:
+            target (str): The target.
+            result (Any): Its result.
+        """
+        self.results[target] = result
+
+        for agreement in self._agreements:
+            if agreement[0] == result:
+                agreement[1].append(target)
+                return
+
+        self._agreements.append([result, [target]])
+
+    def add_error(self, target: str, error: Exception) -> None:
+        """Records the error of a target.
+
+        Args:
+            target (str): The target.
+            error (Exception): The error raised while executing the task against it.
+        """
+        self.errors[target] = error
+
+    def _largest_agreement(self) -> Optional[list]:
+        """Finds the largest group of targets that returned equal results.
+
+        Returns:
+            Optional[list]: The group, as [result, targets], or None if no target succeeded.
+        """
+        return max(
+            self._agreements, key=lambda agreement: len(agreement[1]), default=None
+        )
+
+    def _num_agreeing(self) -> int:
+        """Counts the targets in the largest group of equal results.
+
+        Returns:
+            int: The number of targets.
+        """
+        agreement = self._largest_agreement()
+        return 0 if agreement is None else len(agreement[1])
+
+    def is_settled(self, num_pending: int) -> bool:
+        """Checks whether the execution can complete without waiting for the pending targets.
+
+        This is the case if the policy is satisfied or cannot be satisfied anymore.
+
+        Args:
+            num_pending (int): The number of targets that have not completed yet.
+
+        Returns:
+            bool: True if the execution can complete, False otherwise.
+        """
+        if num_pending == 0:
+            return True
+
+        if self.policy == CompletionPolicy.FIRST_N:
+            num_successful = len(self.results)
+        elif self.policy == CompletionPolicy.QUORUM:
+            num_successful = self._num_agreeing()
+        else:
+            return False
+
+        return (
+            num_successful >= self.required
+            or num_successful + num_pending < self.required
+        )
+
+    @property
+    def satisfied(self) -> bool:
+        """Whether the policy was satisfied, i.e. every target succeeded with CompletionPolicy.ALL,
+        at least `required` targets succeeded with CompletionPolicy.FIRST_N, or at least `required`
+        targets returned the same result with CompletionPolicy.QUORUM.
+
+        Returns:
+            bool: True if the policy was satisfied, False otherwise.
+        """
+        if self.policy == CompletionPolicy.QUORUM:
+            return self._num_agreeing() >= self.required
+
+        return len(self.results) >= self.required
+
+    @property
+    def value(self) -> Any:
+        """The result agreed on by the quorum, with CompletionPolicy.QUORUM.
+
+        Returns:
+            Any: The agreed result, or None if the quorum was not reached or the policy is not CompletionPolicy.QUORUM.
+        """
+        if self.policy != CompletionPolicy.QUORUM or not self.satisfied:
+            return None
+
+        return self._largest_agreement()[0]
+
+    def __str__(self) -> str:
+        """Returns a string representation of this result.
+
+        Returns:
+            str: String describing the outcome of each target.
+        """
+        return (
+            f"ScatterResult(policy={self.policy.value}, satisfied={self.satisfied}, "
+            f"results={self.results}, errors={self.errors}, pending={self.pending})"
+        )
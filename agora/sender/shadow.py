@@ -0,0 +1,88 @@
+import math
+from typing import Any, Optional
+
+
+def normalize_output(value: Any, schema: Optional[dict]) -> Any:
+    """Normalizes the output of a task according to its JSON schema, so that equivalent outputs compare equal.
+
+    Properties that are not declared by the schema are dropped, integral numbers are converted to int,
+    and strings are stripped.
+
+    Args:
+        value (Any): The output.
+        schema (Optional[dict]): The JSON schema of the output. None keeps the structure of the value.
+
+    Returns:
+        Any: The normalized output.
+    """
+    if not isinstance(schema, dict):
+        schema = {}
+
+    if isinstance(value, dict):
+        properties = schema.get("properties")
+        if properties is None:
+            return {key: normalize_output(item, None) for key, item in value.items()}
+        return {
+            key: normalize_output(value[key], properties[key])
+            for key in properties
+            if key in value
+        }
+
+    if isinstance(value, (list, tuple)):
+        return [normalize_output(item, schema.get("items")) for item in value]
+
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+
+    if isinstance(value, str):
+        return value.strip()
+
+    return value
+
+
+def outputs_agree(first: Any, second: Any, schema: Optional[dict]) -> bool:
+    """Checks whether two outputs of a task are equivalent under its output schema.
+
+    Args:
+        first (Any): The first output.
+        second (Any): The second output.
+        schema (Optional[dict]): The JSON schema of the output.
+
+    Returns:
+        bool: True if the outputs agree, False otherwise.
+    """
+    return _values_agree(
+        normalize_output(first, schema), normalize_output(second, schema)
+    )
+
+
+def _values_agree(first: Any, second: Any) -> bool:
+    """Compares two normalized outputs, with a tolerance for floating point numbers.
+
+    Args:
+        first (Any): The first normalized output.
+        second (Any): The second normalized output.
+
+    Returns:
+        bool: True if the outputs agree, False otherwise.
+    """
+    if isinstance(first, dict) and isinstance(second, dict):
+        return first.keys() == second.keys() and all(
+            _values_agree(first[key], second[key]) for key in first
+        )
+
+    if isinstance(first, list) and isinstance(second, list):
+        return len(first) == len(second) and all(
+            _values_agree(first_item, second_item)
+            for first_item, second_item in zip(first, second)
+        )
+
+    if (
+        isinstance(first, (int, float))
+        and isinstance(second, (int, float))
+        and not isinstance(first, bool)
+        and not isinstance(second, bool)
+    ):
+        return math.isclose(first, second, rel_tol=1e-9, abs_tol=1e-9)
+
+    return first == second
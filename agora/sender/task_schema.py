@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Callable, Optional, TypeAlias
 
 from agora.common.errors import SchemaError
 from agora.common.function_schema import schema_from_function
+from agora.utils import compute_hash
 
 if TYPE_CHECKING:
     from agora.sender.schema_generator import TaskSchemaGenerator
@@ -79,6 +80,19 @@ class TaskSchema(Mapping):
         """
         return self.fields
 
+    def fingerprint(self) -> str:
+        """
+        Computes a hash of the canonical JSON representation of the TaskSchema.
+
+        Schemas with the same content have the same fingerprint, whatever the order of their keys.
+
+        Returns:
+            str: The fingerprint.
+        """
+        return compute_hash(
+            json.dumps(self.to_json(), sort_keys=True, separators=(",", ":"))
+        )
+
     @staticmethod
     def from_function(
         func: Callable,